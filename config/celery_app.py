@@ -18,7 +18,29 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 app.conf.beat_schedule = {
     "import_loadboard123": {
         "task": "nauvus.apps.loads.tasks.get_loads_123loadboard",
-        "schedule": crontab(hour=4, minute=20),
+        "schedule": crontab(minute="*/5"),
+    },
+    "cleanup_loads": {
+        "task": "nauvus.apps.loads.tasks.cleanup_loads",
+        "schedule": crontab(hour=3, minute=40),
+    },
+    "refresh_instant_pay_offers": {
+        "task": "nauvus.apps.payments.tasks.refresh_instant_pay_offers",
+        "schedule": crontab(minute="*/15"),
+    },
+    # processes the Stripe events whose processing was lost
+    "process_pending_stripe_events": {
+        "task": "nauvus.apps.webhooks.tasks.process_pending_stripe_events",
+        "schedule": crontab(minute="*/5"),
+    },
+    # delivers the retries and the messages whose dispatch was lost
+    "dispatch_pending_outbox": {
+        "task": "nauvus.apps.outbox.tasks.dispatch_pending_outbox",
+        "schedule": crontab(minute="*"),
+    },
+    "purge_outbox": {
+        "task": "nauvus.apps.outbox.tasks.purge_outbox",
+        "schedule": crontab(hour=4, minute=10),
     },
 }
 
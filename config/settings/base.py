@@ -125,6 +125,7 @@ LOCAL_APPS = [
     "nauvus.apps.banking.apps.BankingConfig",
     "nauvus.apps.invitations.apps.InvitationsConfig",
     "nauvus.apps.webhooks.apps.WebhookConfig",
+    "nauvus.apps.outbox.apps.OutboxConfig",
     # Your stuff: custom apps go here
 ]
 # https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -503,6 +504,11 @@ LOADBOARD_CLIENT_SECRET = env("LOADBOARD_CLIENT_SECRET", default="")
 LOADBOARD_USERNAME = env("LOADBOARD_USERNAME", default="")
 LOADBOARD_PASSWORD = env("LOADBOARD_PASSWORD", default="")
 LOADBOARD_URL = env("LOADBOARD_URL", default="")
+# number of states fetched concurrently and retries of a rate limited or failed search request
+LOADBOARD_MAX_WORKERS = env.int("LOADBOARD_MAX_WORKERS", default=8)
+LOADBOARD_MAX_RETRIES = env.int("LOADBOARD_MAX_RETRIES", default=5)
+# hours between the full imports reconciling every load, the runs in between only import the new postings
+LOADBOARD_FULL_SYNC_INTERVAL_HOURS = env.int("LOADBOARD_FULL_SYNC_INTERVAL_HOURS", default=24)
 
 # MonGoDB
 MONOGO_DB_NAME = env("MONOGO_DB_NAME", default="test")
@@ -523,6 +529,9 @@ OATFI_URL = env("OATFI_URL", default="")
 OATFI_PARTNER_ID = env("OATFI_PARTNER_ID", default="")
 OATFI_STRIPE_ACCOUNT = env("OATFI_STRIPE_ACCOUNT", default="")
 OATFI_FACTORING_PRODUCT_ID = env("OATFI_FACTORING_PRODUCT_ID", default="")
+# connections kept open to Oatfi by each process and retries of a rate limited or failed request
+OATFI_MAX_CONNECTIONS = env.int("OATFI_MAX_CONNECTIONS", default=10)
+OATFI_MAX_RETRIES = env.int("OATFI_MAX_RETRIES", default=3)
 
 # FEES
 NAUVUS_HANDLING_FEE_PERCENT = env("NAUVUS_HANDLING_FEE_PERCENT", default=1.0)
@@ -0,0 +1,114 @@
+from django.utils.functional import cached_property
+
+from nauvus.apps.carrier.models import CarrierUser
+from nauvus.apps.dispatcher.models import DispatcherUser
+from nauvus.apps.driver.models import CarrierDriver, Driver
+from nauvus.users.models import User
+
+CARRIER_USER_TYPES = (User.CARRIER_OWNER, User.CARRIER_OWNER_OPERATOR)
+
+
+class ActorContext:
+    """The organizations and access of the user of a request, loaded on first use and reused for the request."""
+
+    def __init__(self, user):
+        self.user = user
+        self.user_type = getattr(user, "user_type", None)
+
+    @property
+    def is_active(self):
+        return bool(self.user and self.user.is_active)
+
+    @property
+    def is_carrier(self):
+        return self.user_type in CARRIER_USER_TYPES
+
+    @property
+    def is_dispatcher(self):
+        return self.user_type == User.DISPATCHER
+
+    @property
+    def is_driver(self):
+        return self.user_type == User.DRIVER
+
+    @cached_property
+    def carrier_users(self):
+        if not self.user or not self.user.is_authenticated:
+            return []
+        return list(CarrierUser.objects.filter(user=self.user).select_related("carrier"))
+
+    @cached_property
+    def dispatcher_users(self):
+        if not self.user or not self.user.is_authenticated:
+            return []
+        return list(DispatcherUser.objects.filter(user=self.user).select_related("dispatcher"))
+
+    @cached_property
+    def carrier_user(self):
+        """The membership of the current carrier organization, or the only membership of the user."""
+        for carrier_user in self.carrier_users:
+            if carrier_user.is_current_organization:
+                return carrier_user
+        if len(self.carrier_users) == 1:
+            return self.carrier_users[0]
+        return None
+
+    @property
+    def carrier(self):
+        """The current carrier organization of the user."""
+        carrier_user = self.carrier_user
+        if carrier_user is not None and carrier_user.is_current_organization:
+            return carrier_user.carrier
+        return None
+
+    @cached_property
+    def dispatcher_user(self):
+        for dispatcher_user in self.dispatcher_users:
+            if dispatcher_user.is_current_organization:
+                return dispatcher_user
+        return self.dispatcher_users[0] if self.dispatcher_users else None
+
+    @property
+    def dispatcher_user_ids(self):
+        return {dispatcher_user.id for dispatcher_user in self.dispatcher_users}
+
+    @property
+    def is_carrier_full_admin(self):
+        return any(carrier_user.access_type == CarrierUser.FULL_ADMIN for carrier_user in self.carrier_users)
+
+    @property
+    def is_dispatcher_full_admin(self):
+        return any(
+            dispatcher_user.access_type == DispatcherUser.FULL_ADMIN for dispatcher_user in self.dispatcher_users
+        )
+
+    @property
+    def is_dispatcher_owner(self):
+        return self.is_dispatcher and any(dispatcher_user.is_owner for dispatcher_user in self.dispatcher_users)
+
+    @cached_property
+    def driver_ids(self):
+        """The ids of the driver profiles of the user."""
+        if not self.user or not self.user.is_authenticated:
+            return set()
+        return set(Driver.objects.filter(user=self.user).values_list("id", flat=True))
+
+    @cached_property
+    def carrier_driver_ids(self):
+        """The ids of the drivers of the carrier of the user."""
+        if self.carrier_user is None:
+            return set()
+        return set(
+            CarrierDriver.objects.filter(carrier_id=self.carrier_user.carrier_id, driver__isnull=False).values_list(
+                "driver_id", flat=True
+            )
+        )
+
+
+def get_actor_context(request):
+    """Return the actor context of the request, created once and shared by the permissions and the view."""
+    context = getattr(request, "_actor_context", None)
+    if context is None or context.user != request.user:
+        context = ActorContext(request.user)
+        request._actor_context = context
+    return context
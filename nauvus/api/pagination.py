@@ -36,3 +36,35 @@ class CustomPagination(pagination.PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """Cursor pagination on the ordering of the view action, without OFFSET scans or COUNT queries."""
+
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return view.cursor_orderings[view.action]
+
+
+class SelectablePaginationMixin:
+    """Paginate the actions of ``cursor_orderings`` with a cursor when the request asks for it.
+
+    A request selects the cursor pagination with ``?pagination=cursor`` or by following a ``cursor`` link, the
+    other requests keep the default pagination.
+    """
+
+    cursor_orderings = {}
+
+    def use_cursor_pagination(self):
+        query_params = self.request.query_params
+        return self.action in self.cursor_orderings and (
+            query_params.get("pagination") == "cursor" or "cursor" in query_params
+        )
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and self.use_cursor_pagination():
+            self._paginator = KeysetPagination()
+        return super().paginator
@@ -1,11 +1,8 @@
 # -*- coding: utf-8 -*-
 
-from django.core.exceptions import ObjectDoesNotExist
 from rest_framework.permissions import BasePermission, IsAdminUser
 
-from nauvus.apps.carrier.models import CarrierUser
-from nauvus.apps.dispatcher.models import DispatcherUser
-from nauvus.apps.driver.models import CarrierDriver
+from nauvus.api.context import get_actor_context
 from nauvus.apps.loads.models import Load
 from nauvus.users.models import User
 
@@ -85,35 +82,26 @@ class CarrierHasPermission(BasePermission):
             and request.user.is_active
             and (request.user.user_type == User.CARRIER_OWNER or request.user.user_type == User.CARRIER_OWNER_OPERATOR)
         ):
-            carrier_user = CarrierUser.objects.filter(user=request.user, access_type=CarrierUser.FULL_ADMIN)
-            if carrier_user:
-                return True
-            return False
+            return get_actor_context(request).is_carrier_full_admin
         return False
 
 
 class DispatcherHasPermission(BasePermission):
     def has_permission(self, request, view):
         if request.user and request.user.is_active and request.user.user_type == User.DISPATCHER:
-            dispatcher_user = DispatcherUser.objects.filter(user=request.user, access_type=DispatcherUser.FULL_ADMIN)
-            if dispatcher_user:
-                return True
-            return False
+            return get_actor_context(request).is_dispatcher_full_admin
         return False
 
 
 class IsOwner(BasePermission):
     def has_permission(self, request, view):
-        dispatcher_owner = DispatcherUser.objects.filter(
-            user=request.user, is_owner=True, user__user_type=User.DISPATCHER
-        ).first()
         return bool(
             request.user
             and request.user.is_active
             and (
                 request.user.user_type == User.CARRIER_OWNER
                 or request.user.user_type == User.DRIVER
-                or dispatcher_owner
+                or get_actor_context(request).is_dispatcher_owner
             )
         )
 
@@ -141,14 +129,10 @@ class DispatcherOrDriverOrBookedHasPermission(BasePermission):
                 or request.user.user_type == User.CARRIER_OWNER_OPERATOR
                 or request.user.user_type == User.DISPATCHER
             )
-        if obj.dispatcher and obj.driver:
-            return request.user == obj.dispatcher.user or request.user == obj.driver.user
-        elif obj.dispatcher and not obj.driver:
-            return request.user == obj.dispatcher.user
-        elif obj.driver and not obj.dispatcher:
-            return request.user == obj.driver.user
-        else:
-            return False
+        context = get_actor_context(request)
+        return (obj.dispatcher_id is not None and obj.dispatcher_id in context.dispatcher_user_ids) or (
+            obj.driver_id is not None and obj.driver_id in context.driver_ids
+        )
 
 
 class IsLoadCarrier(BasePermission):
@@ -156,20 +140,8 @@ class IsLoadCarrier(BasePermission):
 
     def __is_load_carrier(self, request, obj):
         """Helper function to determine if the user is the carrier of the load"""
-        user = request.user
-        load = obj
-        carrier_user = CarrierUser.get_by_user(user)
-
-        carrier_drivers = CarrierDriver.objects.filter(carrier=carrier_user.carrier)
-
         # if the load driver is in the list of drivers for the carrier, then return true
-        try:
-            carrier_drivers.get(driver=load.driver)
-
-        except ObjectDoesNotExist:
-            return False
-
-        return True
+        return obj.driver_id is not None and obj.driver_id in get_actor_context(request).carrier_driver_ids
 
     def has_permission(self, request, view):
         return bool(
@@ -22,4 +22,4 @@ class BrokerSerializer(BaseModelSerializer):
 
     class Meta:
         model = Broker
-        fields = "__all__"
+        exclude = ("oatfi_sync_hash", "oatfi_registered")
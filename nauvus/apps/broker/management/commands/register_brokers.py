@@ -1,23 +1,31 @@
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
 
-from nauvus.apps.broker.models import Broker
-from nauvus.services.credit.oatfi.api import Oatfi
+from nauvus.apps.broker.services import BROKER_SYNC_BATCH_SIZE, sync_brokers_with_oatfi
 
 
 class Command(BaseCommand):
-    oatfi = Oatfi()
+    help = "Send the brokers that changed since they were last sent to Oatfi"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--workers", type=int, default=settings.OATFI_MAX_CONNECTIONS, help="number of concurrent requests"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=BROKER_SYNC_BATCH_SIZE, help="number of new brokers created per request"
+        )
+        parser.add_argument("--force", action="store_true", help="send the brokers that did not change too")
 
     def handle(self, *args, **options):
-        brokers = Broker.objects.all()
+        stats = sync_brokers_with_oatfi(
+            max_workers=options["workers"], batch_size=options["batch_size"], force=options["force"]
+        )
 
-        for broker in brokers:
-            # check to ensure
-            try:
-                self.oatfi.save_broker(broker)
-            except Exception as e:
-                self.stderr.write(
-                    self.style.ERROR_OUTPUT(
-                        f"Unable to save broker with id {broker.uid}. Due to error.  Full message: {e}"
-                    )
-                )
-        self.stdout.write(self.style.SUCCESS("Brokers registered with Oatfi"))
+        if stats["failed"]:
+            self.stderr.write(self.style.ERROR_OUTPUT(f"Unable to save {stats['failed']} brokers in Oatfi."))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Brokers registered with Oatfi: {stats['created']} created, {stats['updated']} updated, "
+                f"{stats['saved']} saved, {stats['unchanged']} unchanged"
+            )
+        )
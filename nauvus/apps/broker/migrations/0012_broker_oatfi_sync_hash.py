@@ -0,0 +1,18 @@
+# Generated by Django 3.2.13 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('broker', '0011_alter_broker_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broker',
+            name='oatfi_sync_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
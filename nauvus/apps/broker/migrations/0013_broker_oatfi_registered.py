@@ -0,0 +1,30 @@
+# Generated by Django 3.2.13 on 2026-10-18 22:10
+
+from django.db import migrations, models
+
+
+def mark_synced_brokers(apps, schema_editor):
+    # the brokers synced by the fingerprinted sync are registered, the registration of the others is unknown
+    Broker = apps.get_model('broker', 'Broker')
+    Broker.objects.filter(oatfi_sync_hash__isnull=False).update(oatfi_registered=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('broker', '0012_broker_oatfi_sync_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='broker',
+            name='oatfi_registered',
+            field=models.BooleanField(null=True),
+        ),
+        migrations.RunPython(mark_synced_brokers, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='broker',
+            name='oatfi_registered',
+            field=models.BooleanField(default=False, null=True),
+        ),
+    ]
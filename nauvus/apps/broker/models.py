@@ -1,6 +1,6 @@
 import os
 
-from django.db.models import CharField, ImageField, Index, JSONField
+from django.db.models import BooleanField, CharField, ImageField, Index, JSONField
 from django.utils.translation import gettext_lazy as _
 
 from nauvus.base.models import BaseModel
@@ -62,3 +62,7 @@ class Broker(BaseModel):
     city = CharField(_("City"), null=True, blank=True, max_length=50)
     state = CharField(_("State"), null=True, blank=True, max_length=50)
     zip_code = CharField(_("Zip"), null=True, blank=True, max_length=10)
+    # fingerprint of the business record last sent to Oatfi, the unchanged brokers are not sent again
+    oatfi_sync_hash = CharField(max_length=64, null=True, blank=True)
+    # None for the brokers created before the registrations were tracked, they may be at Oatfi already
+    oatfi_registered = BooleanField(null=True, default=False)
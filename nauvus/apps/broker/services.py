@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+from nauvus.apps.broker.models import Broker
+from nauvus.services.credit.oatfi.api import Oatfi
+
+logger = logging.getLogger(__name__)
+
+BROKER_SYNC_BATCH_SIZE = 100
+BROKER_SYNC_CHUNK_SIZE = 2000
+
+
+def get_payload_fingerprint(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def create_brokers(oatfi, items):
+    """Create the businesses of the brokers in one request, saving them one at a time if the batch is refused."""
+    try:
+        oatfi.create_businesses([payload for _, payload, _ in items])
+        return [(broker_id, fingerprint) for broker_id, _, fingerprint in items], []
+    except Exception as e:
+        logger.info(f"Batch of {len(items)} brokers was refused by Oatfi, saving them one at a time. {repr(e)}")
+
+    synced, failed = [], []
+    for broker_id, payload, fingerprint in items:
+        try:
+            oatfi.save_business(payload)
+            synced.append((broker_id, fingerprint))
+        except Exception as e:
+            logger.error(f"Unable to save broker {payload['externalId']} in Oatfi.  Full message: {repr(e)}")
+            failed.append(broker_id)
+    return synced, failed
+
+
+def update_broker(oatfi, item):
+    broker_id, payload, fingerprint = item
+    try:
+        oatfi.update_business(payload)
+        return [(broker_id, fingerprint)], []
+    except Exception as e:
+        logger.error(f"Unable to update broker {payload['externalId']} in Oatfi.  Full message: {repr(e)}")
+        return [], [broker_id]
+
+
+def save_broker(oatfi, item):
+    """Create or update the business of a broker whose registration is unknown, after looking it up at Oatfi."""
+    broker_id, payload, fingerprint = item
+    try:
+        oatfi.save_business(payload)
+        return [(broker_id, fingerprint)], []
+    except Exception as e:
+        logger.error(f"Unable to save broker {payload['externalId']} in Oatfi.  Full message: {repr(e)}")
+        return [], [broker_id]
+
+
+def save_fingerprints(synced):
+    Broker.objects.bulk_update(
+        [Broker(id=broker_id, oatfi_sync_hash=fingerprint, oatfi_registered=True) for broker_id, fingerprint in synced],
+        ["oatfi_sync_hash", "oatfi_registered"],
+        batch_size=BROKER_SYNC_BATCH_SIZE,
+    )
+
+
+def sync_brokers_with_oatfi(brokers=None, max_workers=None, batch_size=BROKER_SYNC_BATCH_SIZE, force=False):
+    """Send the brokers whose Oatfi business record changed since it was last sent.
+
+    The brokers never registered are created in batches of ``batch_size``, the registered ones are updated and the
+    ones created before the registrations were tracked are looked up and saved, by up to ``max_workers``
+    concurrent requests. The fingerprints of the records sent are saved so the next sync skips the brokers that
+    did not change, unless ``force`` is set.
+
+    Returns:
+        Counter: the number of ``created``, ``updated``, ``saved``, ``unchanged`` and ``failed`` brokers
+    """
+    if brokers is None:
+        brokers = Broker.objects.all()
+    max_workers = max_workers or settings.OATFI_MAX_CONNECTIONS
+
+    oatfi = Oatfi()
+    stats = Counter()
+    synced = []
+    new_brokers = []
+    pending = {}
+
+    def collect(futures):
+        for future in futures:
+            stage = pending.pop(future)
+            future_synced, future_failed = future.result()
+            if future_synced:
+                stats[stage] += len(future_synced)
+            if future_failed:
+                stats["failed"] += len(future_failed)
+            synced.extend(future_synced)
+        if len(synced) >= BROKER_SYNC_BATCH_SIZE:
+            save_fingerprints(synced)
+            synced.clear()
+
+    def submit(stage, function, *args):
+        # keep a bounded number of requests in flight so the brokers are streamed rather than queued in memory
+        while len(pending) >= max_workers * 2:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+        pending[executor.submit(function, oatfi, *args)] = stage
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for broker in brokers.iterator(chunk_size=BROKER_SYNC_CHUNK_SIZE):
+            payload = oatfi.get_broker_payload(broker)
+            fingerprint = get_payload_fingerprint(payload)
+            if not force and fingerprint == broker.oatfi_sync_hash:
+                stats["unchanged"] += 1
+                continue
+
+            item = (broker.id, payload, fingerprint)
+            if broker.oatfi_registered:
+                submit("updated", update_broker, item)
+                continue
+            if broker.oatfi_registered is None:
+                submit("saved", save_broker, item)
+                continue
+
+            new_brokers.append(item)
+            if len(new_brokers) >= batch_size:
+                submit("created", create_brokers, new_brokers)
+                new_brokers = []
+
+        if new_brokers:
+            submit("created", create_brokers, new_brokers)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+    save_fingerprints(synced)
+    return stats
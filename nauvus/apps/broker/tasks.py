@@ -0,0 +1,16 @@
+import logging
+
+from celery import shared_task
+
+from nauvus.apps.broker.models import Broker
+from nauvus.apps.broker.services import sync_brokers_with_oatfi
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def register_brokers_with_oatfi(broker_ids):
+    """Register the brokers created by the load imports as businesses in Oatfi."""
+    stats = sync_brokers_with_oatfi(Broker.objects.filter(id__in=broker_ids))
+    if stats["failed"]:
+        logger.error(f"Unable to save {stats['failed']} of {len(broker_ids)} brokers in Oatfi.")
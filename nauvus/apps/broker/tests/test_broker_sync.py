@@ -0,0 +1,68 @@
+import pytest
+
+from nauvus.apps.broker import services
+from nauvus.apps.broker.models import Broker
+from nauvus.services.credit.oatfi.api import Oatfi
+
+
+class FakeOatfi(Oatfi):
+    created = []
+    updated = []
+    saved = []
+
+    def create_businesses(self, payloads):
+        self.created.append([payload["externalId"] for payload in payloads])
+        return True
+
+    def update_business(self, payload):
+        self.updated.append(payload["externalId"])
+        return True
+
+    def save_business(self, payload):
+        self.saved.append(payload["externalId"])
+        return True
+
+
+@pytest.fixture
+def oatfi(monkeypatch):
+    FakeOatfi.created = []
+    FakeOatfi.updated = []
+    FakeOatfi.saved = []
+    monkeypatch.setattr(services, "Oatfi", FakeOatfi)
+    return FakeOatfi
+
+
+@pytest.mark.django_db
+def test_only_the_changed_brokers_are_sent(oatfi):
+    brokers = [Broker.objects.create(name=f"Broker {index}", mc_number=str(index)) for index in range(5)]
+
+    stats = services.sync_brokers_with_oatfi(max_workers=2, batch_size=2)
+
+    assert stats["created"] == 5
+    assert sorted(uid for batch in oatfi.created for uid in batch) == sorted(str(broker.uid) for broker in brokers)
+    assert max(len(batch) for batch in oatfi.created) == 2
+    assert not Broker.objects.filter(oatfi_sync_hash__isnull=True).exists()
+
+    Broker.objects.filter(pk=brokers[0].pk).update(name="Broker Renamed")
+    stats = services.sync_brokers_with_oatfi(max_workers=2, batch_size=2)
+
+    assert stats == {"updated": 1, "unchanged": 4}
+    assert oatfi.updated == [str(brokers[0].uid)]
+
+    stats = services.sync_brokers_with_oatfi(force=True)
+    assert stats == {"updated": 5}
+
+
+@pytest.mark.django_db
+def test_brokers_of_unknown_registration_are_looked_up_before_saving(oatfi):
+    registered = Broker.objects.create(name="Registered", mc_number="1", oatfi_registered=True)
+    unknown = Broker.objects.create(name="Unknown", mc_number="2", oatfi_registered=None)
+    new = Broker.objects.create(name="New", mc_number="3")
+
+    stats = services.sync_brokers_with_oatfi()
+
+    assert stats == {"created": 1, "updated": 1, "saved": 1}
+    assert oatfi.created == [[str(new.uid)]]
+    assert oatfi.updated == [str(registered.uid)]
+    assert oatfi.saved == [str(unknown.uid)]
+    assert Broker.objects.filter(oatfi_registered=True).count() == 3
@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 
+from nauvus.api.context import get_actor_context
 from nauvus.api.permissions import CarrierHasPermission, IsCarrier
 from nauvus.api.viewsets import BaseCreateViewSet, BaseModelViewSet
 from nauvus.apps.carrier.models import Carrier, CarrierBroker, CarrierDispatcher, CarrierUser
@@ -106,8 +107,10 @@ class CarrierBrokerCreateViewset(ModelViewSet):
     )
 
     def get_queryset(self):
-        carrier_user = CarrierUser.objects.filter(user=self.request.user, is_current_organization=True).first()
-        broker = CarrierBroker.objects.filter(carrier=carrier_user.carrier)
+        carrier = get_actor_context(self.request).carrier
+        if carrier is None:
+            return CarrierBroker.objects.none()
+        broker = CarrierBroker.objects.filter(carrier=carrier)
         return broker
 
     def get_serializer_class(self):
@@ -322,8 +325,10 @@ class CarrierDispatcherInvitationViewset(BaseModelViewSet):
 
     def get_queryset(self):
         status = self.request.GET.get("status")
-        carrier_user = CarrierUser.objects.filter(user=self.request.user, is_current_organization=True).first()
-        carrier_dispatcher = CarrierDispatcher.objects.filter(carrier=carrier_user.carrier)
+        carrier = get_actor_context(self.request).carrier
+        if carrier is None:
+            return CarrierDispatcher.objects.none()
+        carrier_dispatcher = CarrierDispatcher.objects.filter(carrier=carrier)
 
         if status:
             if status == "active":
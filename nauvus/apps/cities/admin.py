@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from nauvus.apps.cities.models import City, Country, State
+from nauvus.apps.cities.models import City, CityCoordinate, Country, State
 
 # Register your models here.
 
@@ -21,3 +21,10 @@ class StateAdmin(admin.ModelAdmin):
 class CityAdmin(admin.ModelAdmin):
 
     list_display = ["id", "name", "state_id", "country_id"]
+
+
+@admin.register(CityCoordinate)
+class CityCoordinateAdmin(admin.ModelAdmin):
+
+    list_display = ["id", "city", "state_code", "latitude", "longitude"]
+    search_fields = ["city"]
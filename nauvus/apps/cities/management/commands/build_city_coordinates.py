@@ -0,0 +1,58 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+from nauvus.apps.cities.models import City, CityCoordinate
+from nauvus.utils.location import get_search_engine, normalize_city_key
+
+
+class Command(BaseCommand):
+    help = "Builds the city coordinate table used to resolve city and state locations offline."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=5000, help="number of rows inserted per statement")
+
+    def handle(self, *args, **options):
+        coordinates = self.get_zipcode_coordinates()
+        # the cities seeded by the import_cities command take precedence over the zip code centroids
+        coordinates.update(self.get_city_coordinates())
+
+        rows = [
+            CityCoordinate(city=city, state_code=state, latitude=latitude, longitude=longitude)
+            for (city, state), (latitude, longitude) in coordinates.items()
+        ]
+
+        with transaction.atomic():
+            CityCoordinate.objects.all().delete()
+            CityCoordinate.objects.bulk_create(rows, batch_size=options.get("batch_size"))
+
+        self.stdout.write(self.style.SUCCESS(f"{len(rows)} city coordinates created."))
+
+    @staticmethod
+    def get_zipcode_coordinates():
+        """Return the average coordinates of the zip codes of each city in the uszipcode database."""
+        points = defaultdict(list)
+        for zipcode in get_search_engine().query(returns=0):
+            if not zipcode.major_city or not zipcode.state or zipcode.lat is None or zipcode.lng is None:
+                continue
+            points[normalize_city_key(zipcode.major_city, zipcode.state)].append((zipcode.lat, zipcode.lng))
+
+        return {
+            key: (sum(point[0] for point in values) / len(values), sum(point[1] for point in values) / len(values))
+            for key, values in points.items()
+        }
+
+    @staticmethod
+    def get_city_coordinates():
+        """Return the coordinates of the US cities imported into the cities app."""
+        coordinates = {}
+        cities = City.objects.filter(country__iso2="US").values_list(
+            "name", "state__state_code", "latitude", "longitude"
+        )
+        for name, state_code, latitude, longitude in cities.iterator():
+            try:
+                coordinates[normalize_city_key(name, state_code)] = (float(latitude), float(longitude))
+            except (TypeError, ValueError):
+                continue
+        return coordinates
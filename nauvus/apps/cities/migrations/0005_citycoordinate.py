@@ -0,0 +1,27 @@
+# Generated by Django 3.2.13 on 2022-11-14 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cities', '0004_auto_20220620_0528'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CityCoordinate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city', models.CharField(max_length=255, verbose_name='city')),
+                ('state_code', models.CharField(max_length=8, verbose_name='state_code')),
+                ('latitude', models.FloatField(verbose_name='latitude')),
+                ('longitude', models.FloatField(verbose_name='longitude')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='citycoordinate',
+            constraint=models.UniqueConstraint(fields=('city', 'state_code'), name='unique_city_coordinate'),
+        ),
+    ]
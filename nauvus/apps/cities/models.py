@@ -74,3 +74,16 @@ class City(models.Model):
             models.Index(fields=["country"]),
             models.Index(fields=["name", "state"]),
         ]
+
+
+class CityCoordinate(models.Model):
+
+    city = CharField(_("city"), max_length=255)
+    state_code = CharField(_("state_code"), max_length=8)
+    latitude = models.FloatField(_("latitude"))
+    longitude = models.FloatField(_("longitude"))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["city", "state_code"], name="unique_city_coordinate"),
+        ]
@@ -1,9 +1,47 @@
-import geopy
+import math
+
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
 from django_filters import rest_framework as filters
 
 from nauvus.apps.loads.models import Load
-from nauvus.utils.location import Location
+from nauvus.utils.location import EARTH_RADIUS_IN_MILES, Location, get_bounding_box
+
+# inclusive (min, max) trip distances in miles of the distance filter bands
+DISTANCE_BANDS = {
+    "local": (None, 150),
+    "medium": (150, 700),
+    "long": (700, None),
+}
+
+
+def filter_within_radius(queryset, prefix, latitude, longitude, radius):
+    """Filter the loads whose origin or destination (``prefix``) is within ``radius`` miles of the coordinates.
+
+    The bounding box is served by the coordinate indexes and only the loads inside it are refined with the
+    exact haversine distance.
+    """
+    min_latitude, max_latitude, min_longitude, max_longitude = get_bounding_box(latitude, longitude, radius)
+
+    queryset = queryset.filter(
+        **{
+            f"{prefix}_latitude__range": (min_latitude, max_latitude),
+            f"{prefix}_longitude__range": (min_longitude, max_longitude),
+        }
+    )
+
+    load_latitude = Radians(F(f"{prefix}_latitude"))
+    load_longitude = Radians(F(f"{prefix}_longitude"))
+    center_latitude = Value(math.radians(latitude))
+    center_longitude = Value(math.radians(longitude))
+
+    haversine = Power(Sin((load_latitude - center_latitude) / Value(2.0)), 2) + Cos(center_latitude) * Cos(
+        load_latitude
+    ) * Power(Sin((load_longitude - center_longitude) / Value(2.0)), 2)
+    distance = Value(2.0 * EARTH_RADIUS_IN_MILES) * ASin(Sqrt(haversine))
+
+    return queryset.annotate(**{f"{prefix}_distance": distance}).filter(**{f"{prefix}_distance__lte": radius})
 
 
 class LoadFilter(filters.FilterSet):
@@ -39,47 +77,36 @@ class LoadFilter(filters.FilterSet):
         return queryset.filter(dropoff_date__date__lte=value).filter(current_status="available")
 
     def get_loads_origin(self, queryset, field_name, value):
-        values_list = value.split(",")
-        city = values_list[0]
-        state = values_list[1]
-        radius = int(values_list[2])
-
-        zipcodes = Location().get_nearby_zipcodes(city=city, state=state, radius=radius)
-
-        return Load.objects.filter(origin__zipcode__in=zipcodes).filter(current_status="available")
+        return self.get_loads_within_radius(queryset, "origin", value)
 
     def get_loads_dropoff(self, queryset, field_name, value):
+        return self.get_loads_within_radius(queryset, "destination", value)
+
+    @staticmethod
+    def get_loads_within_radius(queryset, prefix, value):
         values_list = value.split(",")
-        city = values_list[0]
-        state = values_list[1]
+        city = values_list[0].strip()
+        state = values_list[1].strip()
         radius = int(values_list[2])
 
-        zipcodes = Location().get_nearby_zipcodes(city=city, state=state, radius=radius)
+        coordinates = Location.get_city_coordinates(city, state)
+        if not coordinates:
+            return queryset.none()
+        latitude, longitude = coordinates
 
-        return Load.objects.filter(destination__zipcode__in=zipcodes).filter(current_status="available")
+        return filter_within_radius(queryset, prefix, latitude, longitude, radius).filter(current_status="available")
 
     def get_loads_distance(self, queryset, field_name, value):
+        if value not in DISTANCE_BANDS:
+            return queryset.none()
 
-        loads_to_filter = list()
-
-        for load in queryset:
-
-            origin_coordinates = (load.origin.get("latitude"), load.origin.get("longitude"))
-            destination_coordinates = (load.destination.get("latitude"), load.destination.get("longitude"))
-
-            distance = round(geopy.distance.great_circle(origin_coordinates, destination_coordinates).miles)
-
-            if value == "local":
-                if distance <= 150:
-                    loads_to_filter.append(load.id)
-            elif value == "medium":
-                if distance >= 150 and distance <= 700:
-                    loads_to_filter.append(load.id)
-            elif value == "long":
-                if distance >= 700:
-                    loads_to_filter.append(load.id)
+        min_distance, max_distance = DISTANCE_BANDS[value]
+        if min_distance is not None:
+            queryset = queryset.filter(trip_distance_in_miles__gte=min_distance)
+        if max_distance is not None:
+            queryset = queryset.filter(trip_distance_in_miles__lte=max_distance)
 
-        return Load.objects.filter(id__in=loads_to_filter).filter(current_status="available")
+        return queryset.filter(current_status="available")
 
     class Meta:
         model = Load
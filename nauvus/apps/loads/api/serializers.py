@@ -1,6 +1,6 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import validate_email
-from django.db.models import Sum
+from django.db.models import F, OuterRef, Subquery, Sum
 from rest_framework import serializers
 
 from nauvus.apps.broker.models import Broker
@@ -8,7 +8,7 @@ from nauvus.apps.carrier.models import Carrier
 from nauvus.apps.dispatcher.api.serializers import DispatcherUserSerializer
 from nauvus.apps.driver.models import Driver
 from nauvus.apps.loads.models import DeliveryDocument, Load, LoadSource, validate_document_file
-from nauvus.apps.payments.models import Invoice, LoadSettlement, Payment
+from nauvus.apps.payments.models import Payment
 from nauvus.base.validators import ZipCodeValidator
 from nauvus.utils.location import Location
 
@@ -81,12 +81,11 @@ class LocationSerializer(serializers.Serializer):
     def validate(self, data):
         city = data["city"]
         state = data["state"]
-        try:
-            coordinates = Location().get_city_coordinates(city, state)
-            data["latitude"] = coordinates[0]
-            data["longitude"] = coordinates[1]
-        except AttributeError:
+        coordinates = Location.get_city_coordinates(city, state)
+        if not coordinates:
             raise serializers.ValidationError(f"City '{city}' and State '{state}' do not match.")
+        data["latitude"] = coordinates[0]
+        data["longitude"] = coordinates[1]
 
         return data
 
@@ -174,6 +173,17 @@ class CreateLoadSerializer(LoadSerializer):
         return load
 
 
+# the annotations added by LoadListSerializer.setup_eager_loading
+SETTLEMENT_FIGURES = [
+    "settlement_pk",
+    "settlement_nauvus_fees_in_cents",
+    "invoice_amount_due_in_cents",
+    "loan_pk",
+    "loan_fee_amount_in_cents",
+    "payments_in_cents",
+]
+
+
 class LoadListSerializer(serializers.ModelSerializer):
     source = LoadSourceSerializer(read_only=True)
     broker = BrokerSerializer(read_only=True)
@@ -184,63 +194,75 @@ class LoadListSerializer(serializers.ModelSerializer):
     fees = serializers.SerializerMethodField(read_only=True)
     remain_payment = serializers.SerializerMethodField(read_only=True)
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load the related objects and annotate the settlement, invoice, loan and payment figures of the loads."""
+        payments = (
+            Payment.objects.filter(load_settlement=OuterRef("loadsettlement__id"))
+            .order_by()
+            .values("load_settlement")
+            .annotate(total=Sum("amount_in_cents"))
+            .values("total")
+        )
+
+        return (
+            queryset.select_related("source", "broker", "dispatcher__user", "driver__user")
+            .prefetch_related("driver__user__groups", "driver__user__user_permissions")
+            .annotate(
+                settlement_pk=F("loadsettlement__id"),
+                settlement_nauvus_fees_in_cents=F("loadsettlement__nauvus_fees_in_cents"),
+                invoice_amount_due_in_cents=F("loadsettlement__invoice__amount_due_in_cents"),
+                loan_pk=F("loadsettlement__invoice__loan__id"),
+                loan_fee_amount_in_cents=F("loadsettlement__invoice__loan__fee_amount_in_cents"),
+                payments_in_cents=Subquery(payments),
+            )
+        )
+
+    def get_settlement_figures(self, obj):
+        """Return the load with the annotated figures or None when the load has no settlement."""
+        if not hasattr(obj, "settlement_pk"):
+            # the load was not loaded through setup_eager_loading
+            annotated = self.setup_eager_loading(Load.objects.filter(pk=obj.pk)).get()
+            for field in SETTLEMENT_FIGURES:
+                setattr(obj, field, getattr(annotated, field))
+
+        if obj.settlement_pk is None:
+            return None
+        return obj
+
     def get_instant_pay(self, obj):
-        try:
-            load_settlement = LoadSettlement.objects.get(load=obj)
-        except LoadSettlement.DoesNotExist:
-            return False
-        try:
-            load_settlement.invoice.loan
-            return True
-        except Invoice.loan.RelatedObjectDoesNotExist:
-            return False
+        figures = self.get_settlement_figures(obj)
+        return figures is not None and figures.loan_pk is not None
 
     def get_payment_to_date(self, obj):
-        try:
-            load_settlement = LoadSettlement.objects.get(load=obj)
-        except LoadSettlement.DoesNotExist:
+        figures = self.get_settlement_figures(obj)
+        if figures is None:
             return None
-        payments = Payment.objects.filter(load_settlement=load_settlement).aggregate(Sum("amount_in_cents"))
 
         payment_to_date = 0
-        if payments.get("amount_in_cents__sum") is not None:
-            payment_to_date = round(float(payments.get("amount_in_cents__sum") / 100), 2)
+        if figures.payments_in_cents is not None:
+            payment_to_date = round(float(figures.payments_in_cents / 100), 2)
         return payment_to_date
 
+    def get_fees_in_cents(self, figures):
+        fee_amount_in_cents = 0
+        if figures.loan_pk is not None:
+            fee_amount_in_cents = figures.loan_fee_amount_in_cents
+        return figures.settlement_nauvus_fees_in_cents + fee_amount_in_cents
+
     def get_fees(self, obj):
-        try:
-            load_settlement = LoadSettlement.objects.get(load=obj)
-        except LoadSettlement.DoesNotExist:
+        figures = self.get_settlement_figures(obj)
+        if figures is None:
             return None
-        nauvus_fees_in_cents = load_settlement.nauvus_fees_in_cents
-        fee_amount_in_cents = 0
-        if self.get_instant_pay(obj):
-            fee_amount_in_cents = load_settlement.invoice.loan.fee_amount_in_cents
-        nauvus_fees = nauvus_fees_in_cents / 100
-        fee_amount = fee_amount_in_cents / 100
-        fees = round(float(nauvus_fees + fee_amount), 2)
-        return fees
+        return round(float(self.get_fees_in_cents(figures) / 100), 2)
 
     def get_remain_payment(self, obj):
-        try:
-            load_settlement = LoadSettlement.objects.get(load=obj)
-        except LoadSettlement.DoesNotExist:
+        figures = self.get_settlement_figures(obj)
+        if figures is None or figures.invoice_amount_due_in_cents is None:
             return None
-        invoice_amount_due_in_cents = load_settlement.invoice.amount_due_in_cents
-        nauvus_fees_in_cents = load_settlement.nauvus_fees_in_cents
-
-        fee_amount_in_cents = 0
-        if self.get_instant_pay(obj):
-            fee_amount_in_cents = load_settlement.invoice.loan.fee_amount_in_cents
-
-        payments = Payment.objects.filter(load_settlement=load_settlement).aggregate(Sum("amount_in_cents"))
-
-        payment_to_date_in_cents = 0
-        if payments.get("amount_in_cents__sum") is not None:
-            payment_to_date_in_cents = payments.get("amount_in_cents__sum")
 
         remain_payment_in_cents = (
-            invoice_amount_due_in_cents - payment_to_date_in_cents - (nauvus_fees_in_cents + fee_amount_in_cents)
+            figures.invoice_amount_due_in_cents - (figures.payments_in_cents or 0) - self.get_fees_in_cents(figures)
         )
         remain_payment = round(float(remain_payment_in_cents / 100), 2)
         return remain_payment
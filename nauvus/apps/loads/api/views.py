@@ -1,6 +1,7 @@
 import logging
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import Q
 from django.shortcuts import get_object_or_404
@@ -10,6 +11,8 @@ from rest_framework.decorators import action, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
+from nauvus.api.context import get_actor_context
+from nauvus.api.pagination import SelectablePaginationMixin
 from nauvus.api.permissions import (
     CarrierHasPermission,
     DispatcherOrDriverOrBookedHasPermission,
@@ -20,7 +23,6 @@ from nauvus.api.permissions import (
     IsUnderway,
     IsUpcoming,
 )
-from nauvus.apps.dispatcher.models import DispatcherUser
 from nauvus.apps.loads.api.serializers import (
     BookedLoadSerializer,
     CompleteDeliverySerializer,
@@ -31,11 +33,10 @@ from nauvus.apps.loads.api.serializers import (
     LoadSerializer,
     RateConfirmationDocumentSerializer,
 )
+from nauvus.apps.loads.cache import LOAD_SEARCH_TTL, get_load_search_key
 from nauvus.apps.loads.services import book_load, deliver_load
 
-from ...carrier.models import CarrierUser
-from ...driver.models import CarrierDriver
-from ..models import DeliveryDocument, Load, LoadSource
+from ..models import DeliveryDocument, Load, LoadParticipant, LoadSource
 from ..utils import update_contact_broker
 from .filters import LoadFilter
 
@@ -44,10 +45,21 @@ logger = logging.getLogger(__name__)
 User = get_user_model()
 
 
-class LoadViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class LoadViewSet(
+    SelectablePaginationMixin,
+    mixins.CreateModelMixin,
+    mixins.ListModelMixin,
+    mixins.RetrieveModelMixin,
+    viewsets.GenericViewSet,
+):
     queryset = Load.objects.all()
     filter_backends = (filters.DjangoFilterBackend,)
     filterset_class = LoadFilter
+    # keyset orderings served by the composite indexes of Load when a request asks for cursor pagination
+    cursor_orderings = {
+        "list": ("-updated_at", "-id"),
+        "search": ("pickup_date", "id"),
+    }
 
     def get_object(self):
         load = get_object_or_404(Load, pk=self.kwargs["pk"])
@@ -98,8 +110,7 @@ class LoadViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retriev
         load = self.get_object()
 
         if request.user.user_type == User.DISPATCHER:
-            du = DispatcherUser.objects.get(user=request.user)
-            load.dispatcher = du
+            load.dispatcher = get_actor_context(request).dispatcher_user
 
         serializer = self.get_serializer(load, data=request.data)
 
@@ -226,15 +237,15 @@ class LoadViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retriev
 
         current_user = self.request.user
         logger.debug(f"Retrieving loads for {current_user}")
-        carrier = CarrierUser.get_current_organization(current_user)
-        carrier_drivers = CarrierDriver.objects.filter(carrier=carrier).values("driver")
+        carrier = get_actor_context(request).carrier
 
-        queryset = self.queryset.filter(
-            Q(created_by=current_user)
-            | Q(dispatcher__user=current_user)
-            | Q(driver__user=current_user)
-            | Q(driver__in=carrier_drivers)
-        ).order_by("-updated_at")
+        participants = Q(user=current_user)
+        if carrier is not None:
+            participants |= Q(carrier=carrier)
+        load_ids = LoadParticipant.objects.filter(participants).values("load_id")
+
+        queryset = self.queryset.filter(id__in=load_ids).order_by("-updated_at")
+        queryset = LoadListSerializer.setup_eager_loading(queryset)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -247,15 +258,24 @@ class LoadViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retriev
     @action(detail=False, methods=["get"], url_path="search", permission_classes=[IsAuthenticated])
     def search(self, request, validated_data=None, *args, **kwargs):
         """Search available loads"""
+        # the results only change with the version of the available loads, identical searches share them
+        key = get_load_search_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
         queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = self.get_paginated_response(serializer.data)
+        else:
+            serializer = self.get_serializer(queryset, many=True)
+            response = Response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        cache.set(key, response.data, LOAD_SEARCH_TTL)
+        return response
 
     @permission_classes([IsAvailable | CarrierHasPermission | DispatcherOrDriverOrBookedHasPermission])
     def retrieve(self, request, *args, **kwargs):
@@ -264,15 +284,11 @@ class LoadViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retriev
 
         # TODO: move to service layer
         if isinstance(instance.source, LoadSource):
-            load_id = instance.id
-            broker_id = instance.broker.id
-            external_load_id = instance.source.load_id
-
             source_name = instance.source.source
 
             try:
                 # Update the load contact and broker
-                update_contact_broker(source_name, load_id, broker_id, external_load_id)
+                instance = update_contact_broker(instance)
             except ObjectDoesNotExist:
                 message = {"message": f"Load no longer present at source {source_name}"}
                 return Response(
@@ -280,7 +296,5 @@ class LoadViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, mixins.Retriev
                     status=status.HTTP_404_NOT_FOUND,
                 )
 
-            instance = self.get_object()
-
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
@@ -5,3 +5,6 @@ from django.utils.translation import gettext_lazy as _
 class LoadsConfig(AppConfig):
     name = "nauvus.apps.loads"
     verbose_name = _("Loads")
+
+    def ready(self):
+        import nauvus.apps.loads.signals  # noqa: F401
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+# seconds the load details are served without a refresh and then served while a background refresh runs
+LOAD_DETAILS_FRESH_TTL = 5 * 60
+LOAD_DETAILS_STALE_TTL = 60 * 60
+# seconds a load missing from the loadboard is remembered
+LOAD_DETAILS_MISSING_TTL = 5 * 60
+LOAD_DETAILS_LOCK_TIMEOUT = 30
+LOAD_DETAILS_WAIT = 5
+
+# the version of the available loads, bumped whenever they change to invalidate the cached searches
+AVAILABLE_LOADS_VERSION_KEY = "available_loads_version"
+# seconds a search response is cached, an upper bound for the responses of a version
+LOAD_SEARCH_TTL = 5 * 60
+
+
+def get_load_details_key(source_name, external_load_id):
+    return f"load_details:{source_name}:{external_load_id}"
+
+
+def fetch_load_details(source_name, external_load_id):
+    """Fetch the load details from the loadboard and cache them, caching a miss when the load is gone."""
+    from nauvus.apps.loads.utils import get_loadboard
+
+    key = get_load_details_key(source_name, external_load_id)
+    try:
+        details = get_loadboard(source_name).get_load_details(external_load_id)
+    except ObjectDoesNotExist:
+        cache.set(key, {"missing": True, "fetched_at": time.time()}, LOAD_DETAILS_MISSING_TTL)
+        raise
+
+    cache.set(key, {"details": details, "fetched_at": time.time()}, LOAD_DETAILS_FRESH_TTL + LOAD_DETAILS_STALE_TTL)
+    return details
+
+
+def get_entry_details(entry, external_load_id):
+    if entry.get("missing"):
+        raise ObjectDoesNotExist(f"Could not find load {external_load_id} on the loadboard.")
+    return entry.get("details")
+
+
+def get_cached_load_details(source_name, external_load_id):
+    """Return the details of a load from the loadboard with stale-while-revalidate caching.
+
+    Fresh details are returned as is. Stale details are returned immediately while a single background task
+    refreshes them. On a miss, one request fetches the details while the concurrent requests wait for it.
+
+    Raises:
+        ObjectDoesNotExist: the load is no longer on the loadboard
+    """
+    from nauvus.apps.loads.tasks import refresh_load_details
+
+    key = get_load_details_key(source_name, external_load_id)
+    lock_key = f"{key}:lock"
+
+    entry = cache.get(key)
+    if entry:
+        age = time.time() - entry.get("fetched_at", 0)
+        if age >= LOAD_DETAILS_FRESH_TTL and not entry.get("missing"):
+            if cache.add(lock_key, True, LOAD_DETAILS_LOCK_TIMEOUT):
+                transaction.on_commit(lambda: refresh_load_details.delay(source_name, external_load_id))
+        return get_entry_details(entry, external_load_id)
+
+    locked = cache.add(lock_key, True, LOAD_DETAILS_LOCK_TIMEOUT)
+    if not locked:
+        # another request is fetching the same load, wait for its result
+        deadline = time.monotonic() + LOAD_DETAILS_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.1)
+            entry = cache.get(key)
+            if entry:
+                return get_entry_details(entry, external_load_id)
+
+    try:
+        return fetch_load_details(source_name, external_load_id)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+
+
+def get_available_loads_version():
+    # a missing version restarts from the current time so the searches cached before it was evicted are not reused
+    return cache.get_or_set(AVAILABLE_LOADS_VERSION_KEY, int(time.time()), None)
+
+
+def bump_available_loads_version():
+    """Invalidate the cached searches of the available loads."""
+    try:
+        return cache.incr(AVAILABLE_LOADS_VERSION_KEY)
+    except ValueError:
+        if not cache.add(AVAILABLE_LOADS_VERSION_KEY, int(time.time()), None):
+            return cache.incr(AVAILABLE_LOADS_VERSION_KEY)
+        return get_available_loads_version()
+
+
+def invalidate_load_searches():
+    """Bump the version of the available loads now and, inside a transaction, again once it commits.
+
+    A search running before the commit can cache the old loads under the first version, the second bump
+    makes sure the searches after the commit do not use it.
+    """
+    bump_available_loads_version()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump_available_loads_version)
+
+
+def get_load_search_key(request, version=None):
+    """Return the cache key of a search, the same for the same filters in any order."""
+    if version is None:
+        version = get_available_loads_version()
+    params = []
+    for name in sorted(request.query_params):
+        values = sorted(value.strip() for value in request.query_params.getlist(name) if value.strip())
+        if values:
+            params.append([name, values])
+    digest = hashlib.sha256(json.dumps([request.get_host(), params]).encode()).hexdigest()
+    return f"load_search:{version}:{digest}"
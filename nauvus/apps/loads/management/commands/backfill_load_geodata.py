@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandParser
+
+from nauvus.apps.loads.models import Load
+
+GEODATA_FIELDS = [
+    "origin_latitude",
+    "origin_longitude",
+    "destination_latitude",
+    "destination_longitude",
+    "trip_distance_in_miles",
+    "geodata_updated_at",
+]
+
+
+class Command(BaseCommand):
+    help = "Populates the indexed geodata columns of the loads."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--batch-size", type=int, default=2000, help="number of loads updated per statement")
+        parser.add_argument(
+            "--all", action="store_true", help="recompute every load instead of only the loads never computed"
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options.get("batch_size")
+
+        loads = Load.objects.only("id", "origin", "destination")
+        if not options.get("all"):
+            # the loads whose locations could not be resolved were attempted already and are not retried
+            loads = loads.filter(geodata_updated_at__isnull=True)
+
+        batch = []
+        updated = 0
+        for load in loads.iterator(chunk_size=batch_size):
+            batch.append(load)
+
+            if len(batch) >= batch_size:
+                updated += self.update_batch(batch)
+                batch = []
+
+        if batch:
+            updated += self.update_batch(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Geodata updated for {updated} loads."))
+
+    @staticmethod
+    def update_batch(batch):
+        for load in batch:
+            load.update_geodata()
+
+        Load.objects.bulk_update(batch, GEODATA_FIELDS)
+        return len(batch)
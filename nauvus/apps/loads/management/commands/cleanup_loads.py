@@ -1,26 +1,39 @@
 import datetime
 from datetime import date
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandParser
 
 from nauvus.apps.loads.models import Load
+from nauvus.apps.loads.services import LOAD_DELETE_BATCH_SIZE, cleanup_expired_loads
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--days", type=int, default=2, help="delete the loads picked up this many days ago")
+        parser.add_argument(
+            "--batch-size", type=int, default=LOAD_DELETE_BATCH_SIZE, help="number of loads deleted per statement"
+        )
+        parser.add_argument(
+            "--no-input", action="store_false", dest="interactive", help="delete the loads without asking"
+        )
+
     def handle(self, *args, **options):
-        day_before_yesterday = (date.today() - datetime.timedelta(days=2)).strftime("%Y-%m-%d")
+        days = options.get("days")
+        day_before_yesterday = (date.today() - datetime.timedelta(days=days)).strftime("%Y-%m-%d")
 
-        loads_to_delete = Load.objects.filter(
-            pickup_date__lte=day_before_yesterday, current_status=Load.Status.AVAILABLE
-        )
+        if options.get("interactive"):
+            loads_to_delete = Load.objects.filter(
+                pickup_date__date__lte=day_before_yesterday, current_status=Load.Status.AVAILABLE
+            )
 
-        answer = input(
-            f"{loads_to_delete.count()} loads are from {day_before_yesterday} or earlier."
-            + " Are you sure you want to delete them? (Y/n)"
-        )
+            answer = input(
+                f"{loads_to_delete.count()} loads are from {day_before_yesterday} or earlier."
+                + " Are you sure you want to delete them? (Y/n)"
+            )
+
+            if answer != "Y":
+                self.stdout.write("Loads were not deleted.")
+                return
 
-        if answer == "Y":
-            loads_to_delete.delete()
-            self.stdout.write(f"Deleted all loads with pickup dates on or before {day_before_yesterday}")
-        else:
-            self.stdout.write("Loads were not deleted.")
+        deleted = cleanup_expired_loads(days, options.get("batch_size"))
+        self.stdout.write(f"Deleted {deleted} loads with pickup dates on or before {day_before_yesterday}")
@@ -6,6 +6,9 @@ from nauvus.services.loadboards.loadboard123.api import Loadboard123
 class Command(BaseCommand):
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument("--states", type=str, help="a comma separated list of states to import from loadboard123 ")
+        parser.add_argument(
+            "--full", action="store_true", default=None, help="import every load instead of only the new postings"
+        )
 
     def handle(self, *args, **options):
 
@@ -13,5 +16,5 @@ class Command(BaseCommand):
         arg_states = options.get("states")
         if arg_states:
             states = arg_states.split(",")
-        Loadboard123().process_loads(states=states)
+        Loadboard123().process_loads(states=states, full_sync=options.get("full"))
         self.stdout.write("Loads imported.")
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.13 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loads', '0027_alter_load_current_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='load',
+            name='destination_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='load',
+            name='destination_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='load',
+            name='origin_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='load',
+            name='origin_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['origin_latitude', 'origin_longitude'], name='loads_origin_coords_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['destination_latitude', 'destination_longitude'], name='loads_dest_coords_idx'),
+        ),
+    ]
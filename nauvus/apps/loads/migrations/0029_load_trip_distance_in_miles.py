@@ -0,0 +1,22 @@
+# Generated by Django 3.2.13 on 2026-10-18 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loads', '0028_load_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='load',
+            name='trip_distance_in_miles',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['current_status', 'trip_distance_in_miles'], name='loads_trip_distance_idx'),
+        ),
+    ]
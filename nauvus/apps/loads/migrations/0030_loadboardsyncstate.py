@@ -0,0 +1,33 @@
+# Generated by Django 3.2.13 on 2026-10-18 14:05
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loads', '0029_load_trip_distance_in_miles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadboardSyncState',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('loadboard_name', models.CharField(max_length=300)),
+                ('state', models.CharField(max_length=2)),
+                ('last_posted_date', models.DateTimeField(blank=True, null=True)),
+                ('last_full_sync', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'loadboard_sync_state',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='loadboardsyncstate',
+            constraint=models.UniqueConstraint(fields=('loadboard_name', 'state'), name='unique_loadboard_sync_state'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.13 on 2026-10-18 16:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loads', '0030_loadboardsyncstate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['updated_at', 'id'], name='loads_updated_at_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='load',
+            index=models.Index(fields=['current_status', 'pickup_date', 'id'], name='loads_status_pickup_id_idx'),
+        ),
+    ]
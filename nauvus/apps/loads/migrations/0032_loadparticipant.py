@@ -0,0 +1,78 @@
+# Generated by Django 3.2.13 on 2026-10-18 17:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def backfill_load_participants(apps, schema_editor):
+    Load = apps.get_model('loads', 'Load')
+    LoadParticipant = apps.get_model('loads', 'LoadParticipant')
+    CarrierDriver = apps.get_model('driver', 'CarrierDriver')
+
+    carriers_by_driver = {}
+    for driver_id, carrier_id in CarrierDriver.objects.filter(carrier__isnull=False).values_list('driver_id', 'carrier_id'):
+        carriers_by_driver.setdefault(driver_id, set()).add(carrier_id)
+
+    loads = (
+        Load.objects.filter(
+            models.Q(created_by__isnull=False) | models.Q(dispatcher__isnull=False) | models.Q(driver__isnull=False)
+        )
+        .values_list('id', 'created_by_id', 'dispatcher__user_id', 'driver_id', 'driver__user_id')
+    )
+
+    participants = []
+    for load_id, created_by_id, dispatcher_user_id, driver_id, driver_user_id in loads.iterator():
+        rows = set()
+        if created_by_id:
+            rows.add((created_by_id, None, 'creator'))
+        if dispatcher_user_id:
+            rows.add((dispatcher_user_id, None, 'dispatcher'))
+        if driver_user_id:
+            rows.add((driver_user_id, None, 'driver'))
+        for carrier_id in carriers_by_driver.get(driver_id, ()):
+            rows.add((None, carrier_id, 'carrier'))
+        participants.extend(
+            LoadParticipant(load_id=load_id, user_id=user_id, carrier_id=carrier_id, role=role)
+            for user_id, carrier_id, role in rows
+        )
+
+    LoadParticipant.objects.bulk_create(participants, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('carrier', '0031_carrier_invoice_email'),
+        ('driver', '0017_auto_20230106_1258'),
+        ('loads', '0031_load_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoadParticipant',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('role', models.CharField(choices=[('creator', 'CREATOR'), ('dispatcher', 'DISPATCHER'), ('driver', 'DRIVER'), ('carrier', 'CARRIER')], max_length=20)),
+                ('carrier', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='carrier.carrier')),
+                ('load', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='loads.load')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'load_participants',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='loadparticipant',
+            index=models.Index(fields=['user', 'load'], name='load_participants_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='loadparticipant',
+            index=models.Index(fields=['carrier', 'load'], name='load_participants_carrier_idx'),
+        ),
+        migrations.RunPython(backfill_load_participants, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.13 on 2026-10-18 21:05
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_computed_geodata(apps, schema_editor):
+    # the loads with complete geodata were computed already, the others are left to the backfill
+    Load = apps.get_model('loads', 'Load')
+    Load.objects.filter(origin_latitude__isnull=False, trip_distance_in_miles__isnull=False).update(
+        geodata_updated_at=timezone.now()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loads', '0032_loadparticipant'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='load',
+            name='geodata_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_computed_geodata, migrations.RunPython.noop),
+    ]
@@ -12,6 +12,7 @@ from nauvus.apps.carrier.models import Carrier
 from nauvus.apps.dispatcher.models import DispatcherUser
 from nauvus.apps.driver.models import Driver
 from nauvus.users.models import User
+from nauvus.utils.location import get_location_coordinates, get_trip_distance
 
 
 def upload_to(instance, filename):
@@ -62,6 +63,21 @@ class AccessToken(BaseModel):
         db_table = "access_tokens"
 
 
+class LoadboardSyncState(BaseModel):
+    """High-water mark of the loads imported from a loadboard for the loads with the origin in a state."""
+
+    loadboard_name = models.CharField(max_length=300)
+    state = models.CharField(max_length=2)
+    last_posted_date = models.DateTimeField(null=True, blank=True)
+    last_full_sync = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "loadboard_sync_state"
+        constraints = [
+            models.UniqueConstraint(fields=["loadboard_name", "state"], name="unique_loadboard_sync_state"),
+        ]
+
+
 class LoadSource(BaseModel):
     source = models.CharField(max_length=300, null=True, blank=True)
     load_id = models.CharField(max_length=100, null=True, blank=True)
@@ -116,13 +132,69 @@ class Load(BaseModel):
     invoice_email = models.EmailField(null=True)
     notes = models.TextField(null=True, blank=True)
 
+    # indexed copies of the origin and destination coordinates used by the radius searches
+    origin_latitude = models.FloatField(null=True, blank=True)
+    origin_longitude = models.FloatField(null=True, blank=True)
+    destination_latitude = models.FloatField(null=True, blank=True)
+    destination_longitude = models.FloatField(null=True, blank=True)
+    trip_distance_in_miles = models.IntegerField(null=True, blank=True)
+    # when the columns above were last computed, the locations that cannot be resolved are not retried by the backfill
+    geodata_updated_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         db_table = "loads"
+        indexes = [
+            models.Index(fields=["origin_latitude", "origin_longitude"], name="loads_origin_coords_idx"),
+            models.Index(fields=["destination_latitude", "destination_longitude"], name="loads_dest_coords_idx"),
+            models.Index(fields=["current_status", "trip_distance_in_miles"], name="loads_trip_distance_idx"),
+            models.Index(fields=["updated_at", "id"], name="loads_updated_at_id_idx"),
+            models.Index(fields=["current_status", "pickup_date", "id"], name="loads_status_pickup_id_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # the status the load was loaded with, to tell the status transitions apart on save
+        instance._loaded_status = instance.__dict__.get("current_status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.update_geodata()
+        super().save(*args, **kwargs)
+
+    def update_geodata(self):
+        """Refresh the indexed coordinate columns from the origin and destination of the load."""
+        self.origin_latitude, self.origin_longitude = get_location_coordinates(self.origin)
+        self.destination_latitude, self.destination_longitude = get_location_coordinates(self.destination)
+        self.trip_distance_in_miles = get_trip_distance(self.origin, self.destination)
+        self.geodata_updated_at = timezone.now()
 
     def get_carrier(self):
         return self.carrier
 
 
+class LoadParticipant(BaseModel):
+    """A user or carrier that sees the load in its list of loads, maintained when the load is saved."""
+
+    class Role(models.TextChoices):
+        CREATOR = "creator", _("CREATOR")
+        DISPATCHER = "dispatcher", _("DISPATCHER")
+        DRIVER = "driver", _("DRIVER")
+        CARRIER = "carrier", _("CARRIER")
+
+    load = models.ForeignKey(Load, on_delete=models.CASCADE, related_name="participants")
+    user = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE)
+    carrier = models.ForeignKey(Carrier, null=True, blank=True, on_delete=models.CASCADE)
+    role = models.CharField(max_length=20, choices=Role.choices)
+
+    class Meta:
+        db_table = "load_participants"
+        indexes = [
+            models.Index(fields=["user", "load"], name="load_participants_user_idx"),
+            models.Index(fields=["carrier", "load"], name="load_participants_carrier_idx"),
+        ]
+
+
 class LoadStatusHistory(BaseModel):
     load_id = models.ForeignKey(Load, null=True, blank=True, on_delete=models.PROTECT)
     status = models.CharField(max_length=50, null=True, blank=True)
@@ -3,20 +3,27 @@ from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.db import transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
 
 from nauvus.apps.carrier.models import CarrierUser
-from nauvus.apps.loads.models import DeliveryDocument, Load
+from nauvus.apps.driver.models import CarrierDriver
+from nauvus.apps.loads.cache import invalidate_load_searches
+from nauvus.apps.loads.models import DeliveryDocument, Load, LoadParticipant, LoadSource
+from nauvus.apps.outbox.services import enqueue
 from nauvus.apps.payments.models import Invoice, LoadSettlement
-from nauvus.services.credit.oatfi.api import Oatfi
-from nauvus.services.stripe import StripeClient
+from nauvus.apps.payments.tasks import start_invoice_processing
 
 logger = logging.getLogger(__name__)
 
-oatfi_client = Oatfi()
+LOAD_DELETE_BATCH_SIZE = 1000
 
 
 def deliver_load(load: Load, delivery_date):
-    """Marks the load as deliver and initiates the invoice
+    """Marks the load as delivered and starts the settlement of its invoice
+
+    The payment link, the Oatfi invoice history and the invoice email are produced by the stages of
+    ``start_invoice_processing`` once the delivery is committed.
 
     Args:
         load (Load): The load that was delivered
@@ -27,8 +34,7 @@ def deliver_load(load: Load, delivery_date):
     """
 
     # validate that there is at least one delivery document
-    docs = DeliveryDocument.objects.filter(load_id=load.id)
-    if len(docs) == 0:
+    if not DeliveryDocument.objects.filter(load_id=load.id).exists():
         raise Exception("Cannot mark a load as delivered without delivery documents.")
 
     try:
@@ -44,10 +50,6 @@ def deliver_load(load: Load, delivery_date):
             f"Delivery of load {load.id} from {origin_city} to {dest_city} on {delivery_date_string} by {carrier_name}"
         )
         amount_due = int(float(load.final_rate) * 100)  # cents
-        stripe_payment_link = StripeClient().get_payment_link(amount_due, load.id)
-
-        if not stripe_payment_link:
-            raise Exception
 
         inv_due_date = datetime.now() + timedelta(days=30)
 
@@ -67,18 +69,15 @@ def deliver_load(load: Load, delivery_date):
                 load_settlement=load_settlement,
                 amount_due_in_cents=amount_due,
                 description=invoice_desc,
-                stripe_payment_link=stripe_payment_link.get("url"),
-                stripe_payment_id=stripe_payment_link.get("id"),
             )
 
             load.current_status = Load.Status.DELIVERED
             load.delivered_date = delivery_date
             load.save()
 
-        oatfi_client.send_invoice_history([invoice])
-        invoice.send()
+            transaction.on_commit(lambda: start_invoice_processing(invoice.id))
     except Exception as e:
-        # revert any objects in memory and clean up stripe if there is an issue
+        # revert any objects in memory if there is an issue
         logger.error(
             f"Encountered exception '{e}' while attempting to mark load as delivered. "
             + f" Load id {load.id} was not marked as delivered.",
@@ -92,5 +91,99 @@ def book_load(load: Load):
     Args:
         load (Load): The load to book
     """
-    broker = load.broker
-    oatfi_client.save_broker(broker)
+    if load.broker_id:
+        enqueue("oatfi.save_broker", {"broker_id": load.broker_id})
+
+
+def delete_available_loads(loads, batch_size=LOAD_DELETE_BATCH_SIZE):
+    """Delete the available loads of the queryset in batches, along with the sources no other load references.
+
+    Args:
+        loads (QuerySet): the loads to delete, the loads that are not available are kept
+        batch_size (int): the number of loads deleted per statement
+
+    Returns:
+        int: the number of deleted loads
+    """
+    loads = loads.filter(current_status=Load.Status.AVAILABLE)
+    skipped_ids = set()
+    deleted = 0
+
+    while True:
+        batch = list(loads.exclude(id__in=skipped_ids).values_list("id", "source_id")[:batch_size])
+        if not batch:
+            break
+
+        load_ids = [load_id for load_id, _ in batch]
+        source_ids = [source_id for _, source_id in batch if source_id]
+        try:
+            with transaction.atomic():
+                _, deleted_objects = Load.objects.filter(id__in=load_ids, current_status=Load.Status.AVAILABLE).delete()
+                deleted += deleted_objects.get(Load._meta.label, 0)
+        except ProtectedError:
+            # some loads are referenced by other records, delete the batch one load at a time to keep them
+            for load in Load.objects.filter(id__in=load_ids, current_status=Load.Status.AVAILABLE):
+                try:
+                    with transaction.atomic():
+                        load.delete()
+                        deleted += 1
+                except ProtectedError:
+                    logger.info(f"Load {load.id} is referenced by other records and was not deleted.")
+                    skipped_ids.add(load.id)
+        LoadSource.objects.filter(id__in=source_ids, load__isnull=True).delete()
+
+    if deleted:
+        invalidate_load_searches()
+    return deleted
+
+
+def delete_loads_by_external_id(load_ids):
+    """Delete the available loads imported with the external ids and the sources left without a load."""
+    deleted = delete_available_loads(Load.objects.filter(source__load_id__in=load_ids))
+    LoadSource.objects.filter(load_id__in=load_ids, load__isnull=True).delete()
+    return deleted
+
+
+def cleanup_expired_loads(days=2, batch_size=LOAD_DELETE_BATCH_SIZE):
+    """Delete the available loads with a pickup date that is at least ``days`` in the past."""
+    pickup_before = (timezone.now() - timedelta(days=days)).date()
+    loads = Load.objects.filter(pickup_date__date__lte=pickup_before)
+    return delete_available_loads(loads, batch_size)
+
+
+def get_load_participants(load: Load):
+    """Return the (user_id, carrier_id, role) of the users and carriers that see the load in their list."""
+    participants = set()
+    if load.created_by_id:
+        participants.add((load.created_by_id, None, LoadParticipant.Role.CREATOR))
+    if load.dispatcher_id and load.dispatcher.user_id:
+        participants.add((load.dispatcher.user_id, None, LoadParticipant.Role.DISPATCHER))
+    if load.driver_id:
+        if load.driver.user_id:
+            participants.add((load.driver.user_id, None, LoadParticipant.Role.DRIVER))
+        carrier_ids = CarrierDriver.objects.filter(driver_id=load.driver_id, carrier__isnull=False).values_list(
+            "carrier_id", flat=True
+        )
+        participants.update((None, carrier_id, LoadParticipant.Role.CARRIER) for carrier_id in carrier_ids)
+    return participants
+
+
+def sync_load_participants(load: Load):
+    """Insert and delete the participants of the load that changed since it was last saved."""
+    participants = get_load_participants(load)
+
+    existing = {}
+    for participant_id, user_id, carrier_id, role in LoadParticipant.objects.filter(load=load).values_list(
+        "id", "user_id", "carrier_id", "role"
+    ):
+        existing[(user_id, carrier_id, role)] = participant_id
+
+    removed_ids = [participant_id for key, participant_id in existing.items() if key not in participants]
+    if removed_ids:
+        LoadParticipant.objects.filter(id__in=removed_ids).delete()
+
+    LoadParticipant.objects.bulk_create(
+        LoadParticipant(load=load, user_id=user_id, carrier_id=carrier_id, role=role)
+        for user_id, carrier_id, role in participants
+        if (user_id, carrier_id, role) not in existing
+    )
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from nauvus.apps.driver.models import CarrierDriver
+from nauvus.apps.loads.cache import invalidate_load_searches
+from nauvus.apps.loads.models import Load
+from nauvus.apps.loads.services import sync_load_participants
+
+PARTICIPANT_FIELDS = {"created_by", "dispatcher", "driver"}
+
+
+@receiver(post_save, sender=Load)
+def load_participants_post_save(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and not PARTICIPANT_FIELDS.intersection(update_fields):
+        return
+    if created and not (instance.created_by_id or instance.dispatcher_id or instance.driver_id):
+        # loads imported from the loadboards have no participants
+        return
+    sync_load_participants(instance)
+
+
+@receiver(post_save, sender=Load)
+def available_loads_version_post_save(sender, instance, created, update_fields=None, **kwargs):
+    loaded_status = None if created else getattr(instance, "_loaded_status", None)
+    instance._loaded_status = instance.current_status
+    # a saved available load or a load that stops being available changes the searches
+    if Load.Status.AVAILABLE in (instance.current_status, loaded_status):
+        invalidate_load_searches()
+
+
+@receiver(post_save, sender=CarrierDriver)
+@receiver(post_delete, sender=CarrierDriver)
+def carrier_driver_load_participants(sender, instance, **kwargs):
+    # the carriers of a driver see the loads of the driver
+    if instance.driver_id:
+        for load in Load.objects.filter(driver_id=instance.driver_id).select_related("dispatcher", "driver"):
+            sync_load_participants(load)
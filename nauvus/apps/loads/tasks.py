@@ -1,8 +1,43 @@
+import logging
+
 from celery import shared_task
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
 
+from nauvus.apps.loads.cache import fetch_load_details, get_load_details_key
+from nauvus.apps.loads.services import cleanup_expired_loads
 from nauvus.services.loadboards.loadboard123.api import Loadboard123
 
+logger = logging.getLogger(__name__)
+
+IMPORT_LOCK_KEY = "loads:import_loadboard123:lock"
+IMPORT_SOFT_TIME_LIMIT = 18000
+
+
+@shared_task(soft_time_limit=IMPORT_SOFT_TIME_LIMIT)
+def get_loads_123loadboard(full_sync=None):
+    # the import runs every few minutes, skip the run when the previous one is still importing
+    if not cache.add(IMPORT_LOCK_KEY, True, IMPORT_SOFT_TIME_LIMIT):
+        logger.info("The previous 123Loadboard import is still running.")
+        return
+
+    try:
+        Loadboard123().process_loads(full_sync=full_sync)
+    finally:
+        cache.delete(IMPORT_LOCK_KEY)
+
+
+@shared_task
+def cleanup_loads():
+    deleted = cleanup_expired_loads()
+    logger.info(f"{deleted} expired loads were deleted.")
+
 
-@shared_task(soft_time_limit=18000)
-def get_loads_123loadboard():
-    Loadboard123().process_loads()
+@shared_task
+def refresh_load_details(source_name, external_load_id):
+    try:
+        fetch_load_details(source_name, external_load_id)
+    except ObjectDoesNotExist:
+        logger.info(f"Load {external_load_id} is no longer present at source {source_name}.")
+    finally:
+        cache.delete(f"{get_load_details_key(source_name, external_load_id)}:lock")
@@ -0,0 +1,38 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+
+from nauvus.api.context import get_actor_context
+from nauvus.api.permissions import CarrierHasPermission, IsLoadCarrier
+from nauvus.apps.carrier.models import CarrierUser
+from nauvus.apps.driver.models import CarrierDriver
+
+
+@pytest.mark.django_db
+def test_permissions_share_the_actor_context_of_the_request(carrier_user, load):
+    carrier_user.access_type = CarrierUser.FULL_ADMIN
+    carrier_user.is_current_organization = True
+    carrier_user.save()
+    load.driver = CarrierDriver.objects.filter(carrier=carrier_user.carrier).first().driver
+
+    request = APIRequestFactory().get("/api/v1/loads/")
+    request.user = carrier_user.user
+
+    with CaptureQueriesContext(connection) as queries:
+        for _ in range(3):
+            assert CarrierHasPermission().has_permission(request, None)
+            assert IsLoadCarrier().has_object_permission(request, None, load)
+        assert get_actor_context(request).carrier == carrier_user.carrier
+
+    # one query for the memberships of the user and one for the drivers of the carrier
+    assert len(queries) == 2
+
+
+@pytest.mark.django_db
+def test_load_carrier_is_denied_without_a_carrier(user, load):
+    request = APIRequestFactory().get("/api/v1/loads/")
+    request.user = user
+
+    assert not IsLoadCarrier().has_object_permission(request, None, load)
+    assert get_actor_context(request).carrier is None
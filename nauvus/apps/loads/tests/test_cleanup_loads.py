@@ -0,0 +1,41 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from nauvus.apps.loads.models import Load, LoadSource
+from nauvus.apps.loads.services import cleanup_expired_loads, delete_loads_by_external_id
+from nauvus.apps.loads.tests.fixtures import create_load
+
+
+def save_load(faker, broker, status=Load.Status.AVAILABLE, days_ago=0, source=None):
+    load = create_load(faker)
+    load.broker = broker
+    load.current_status = status
+    load.pickup_date = timezone.now() - timedelta(days=days_ago)
+    load.source = source
+    load.save()
+    return load
+
+
+@pytest.mark.django_db
+def test_cleanup_expired_loads_keeps_recent_and_booked_loads(faker, broker):
+    recent_load = save_load(faker, broker)
+    expired_load = save_load(faker, broker, days_ago=3)
+    booked_load = save_load(faker, broker, status=Load.Status.BOOKED, days_ago=3)
+
+    assert cleanup_expired_loads(days=2, batch_size=1) == 1
+    assert set(Load.objects.values_list("id", flat=True)) == {recent_load.id, booked_load.id}
+    assert not Load.objects.filter(id=expired_load.id).exists()
+
+
+@pytest.mark.django_db
+def test_delete_loads_by_external_id_keeps_sources_of_unavailable_loads(faker, broker):
+    available_source = LoadSource.objects.create(source="LOADBOARD_123", load_id="available")
+    booked_source = LoadSource.objects.create(source="LOADBOARD_123", load_id="booked")
+    save_load(faker, broker, source=available_source)
+    booked_load = save_load(faker, broker, status=Load.Status.BOOKED, source=booked_source)
+
+    assert delete_loads_by_external_id(["available", "booked"]) == 1
+    assert list(Load.objects.values_list("id", flat=True)) == [booked_load.id]
+    assert list(LoadSource.objects.values_list("load_id", flat=True)) == ["booked"]
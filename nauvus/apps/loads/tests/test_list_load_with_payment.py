@@ -2,6 +2,8 @@ from datetime import datetime, timedelta
 from decimal import Decimal
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework.test import APITestCase
 
 from nauvus.apps.dispatcher.models import Dispatcher, DispatcherUser
@@ -62,3 +64,29 @@ class TestListLoadWithPayment(APITestCase):
         response = self.client.get(self.url)
         self.assertEqual(response.data.get('results')[0].get('payment_to_date'), 600.0)
         self.assertEqual(response.data.get('results')[0].get('remain_payment'), 370.9)
+
+    def test_list_loads_query_count_does_not_depend_on_the_number_of_loads(self):
+        with CaptureQueriesContext(connection) as single_load_queries:
+            self.client.get(self.url)
+
+        for _ in range(5):
+            load = Load.objects.create(
+                origin=self.load.origin,
+                destination=self.load.destination,
+                pickup_date=self.load.pickup_date,
+                current_status="delivered",
+                posted_rate=Decimal(1000),
+                dispatcher=self.dispatcher_user,
+                created_by=self.user_dispatcher,
+                driver=self.driver,
+            )
+            settlement = LoadSettlement.objects.create(load=load, nauvus_fees_in_cents=100)
+            invoice = Invoice.objects.create(amount_due_in_cents=100000, load_settlement=settlement)
+            Loan.objects.create(principal_amount_in_cents=1000, fee_amount_in_cents=100, invoice=invoice)
+            Payment.objects.create(load_settlement=settlement, amount_in_cents=500)
+
+        with CaptureQueriesContext(connection) as many_loads_queries:
+            response = self.client.get(self.url)
+
+        self.assertEqual(len(response.data.get('results')), 6)
+        self.assertEqual(len(many_loads_queries), len(single_load_queries))
@@ -0,0 +1,44 @@
+import time
+
+import pytest
+from django.core.cache import cache
+
+from nauvus.apps.loads import cache as load_cache
+from nauvus.apps.loads import tasks, utils
+
+
+class FakeLoadboard:
+    def __init__(self):
+        self.calls = 0
+
+    def get_load_details(self, load_id):
+        self.calls += 1
+        return {"id": load_id, "version": self.calls}
+
+
+@pytest.fixture
+def loadboard(monkeypatch):
+    cache.clear()
+    fake_loadboard = FakeLoadboard()
+    monkeypatch.setattr(utils, "get_loadboard", lambda source_name: fake_loadboard)
+    return fake_loadboard
+
+
+def test_fresh_load_details_are_served_from_the_cache(loadboard):
+    assert load_cache.get_cached_load_details("LOADBOARD_123", "1") == {"id": "1", "version": 1}
+    assert load_cache.get_cached_load_details("LOADBOARD_123", "1") == {"id": "1", "version": 1}
+    assert loadboard.calls == 1
+
+
+def test_stale_load_details_are_served_while_one_refresh_is_scheduled(loadboard, monkeypatch):
+    refreshes = []
+    monkeypatch.setattr(tasks.refresh_load_details, "delay", lambda *args: refreshes.append(args))
+    monkeypatch.setattr(load_cache.transaction, "on_commit", lambda callback: callback())
+
+    stale_entry = {"details": {"id": "1", "version": 0}, "fetched_at": time.time() - load_cache.LOAD_DETAILS_FRESH_TTL}
+    cache.set(load_cache.get_load_details_key("LOADBOARD_123", "1"), stale_entry)
+
+    assert load_cache.get_cached_load_details("LOADBOARD_123", "1") == {"id": "1", "version": 0}
+    assert load_cache.get_cached_load_details("LOADBOARD_123", "1") == {"id": "1", "version": 0}
+    assert refreshes == [("LOADBOARD_123", "1")]
+    assert loadboard.calls == 0
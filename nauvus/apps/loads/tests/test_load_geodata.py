@@ -0,0 +1,78 @@
+from io import StringIO
+
+import pytest
+from django.core.cache import cache
+from django.core.management import call_command
+
+from nauvus.apps.cities.models import CityCoordinate
+from nauvus.apps.loads.api.filters import filter_within_radius
+from nauvus.apps.loads.models import Load
+from nauvus.utils.location import Location, _get_cached_city_coordinates, get_bounding_box, get_trip_distance
+
+
+def test_bounding_box_contains_center():
+    min_latitude, max_latitude, min_longitude, max_longitude = get_bounding_box(33.749, -84.388, 25)
+
+    assert min_latitude < 33.749 < max_latitude
+    assert min_longitude < -84.388 < max_longitude
+    # 25 miles is a bit more than a third of a degree of latitude
+    assert round(max_latitude - min_latitude, 2) == round(50 / 69.0, 2)
+
+
+@pytest.mark.django_db
+def test_save_load_populates_coordinates(load):
+    load.refresh_from_db()
+
+    assert load.origin_latitude is not None
+    assert load.origin_longitude is not None
+    assert load.destination_latitude is not None
+    assert load.destination_longitude is not None
+
+
+@pytest.mark.django_db
+def test_filter_within_radius(load):
+    # the load fixture goes from Atlanta, GA to Miami, FL
+    atlanta = Load.objects.filter(pk=load.pk)
+
+    assert filter_within_radius(atlanta, "origin", 33.749, -84.388, 50).count() == 1
+    assert filter_within_radius(atlanta, "destination", 33.749, -84.388, 50).count() == 0
+    assert filter_within_radius(atlanta, "destination", 25.7617, -80.1918, 50).count() == 1
+
+
+@pytest.mark.django_db
+def test_city_coordinates_are_resolved_from_the_table():
+    cache.clear()
+    _get_cached_city_coordinates.cache_clear()
+    CityCoordinate.objects.create(city="springfield", state_code="IL", latitude=39.78, longitude=-89.65)
+
+    assert Location.get_city_coordinates(" Springfield ", "il") == (39.78, -89.65)
+    # the second lookup is served by the in-process cache
+    CityCoordinate.objects.all().delete()
+    assert Location.get_city_coordinates("Springfield", "IL") == (39.78, -89.65)
+
+
+def test_trip_distance():
+    atlanta = {"latitude": "33.749", "longitude": "-84.388"}
+    miami = {"latitude": "25.7617", "longitude": "-80.1918"}
+
+    assert 600 < get_trip_distance(atlanta, miami) < 620
+    assert get_trip_distance(atlanta, {"latitude": "", "longitude": ""}) is None
+
+
+@pytest.mark.django_db
+def test_backfill_does_not_retry_unresolvable_loads(load):
+    Load.objects.filter(pk=load.pk).update(
+        origin={}, origin_latitude=None, origin_longitude=None, trip_distance_in_miles=None, geodata_updated_at=None
+    )
+
+    out = StringIO()
+    call_command("backfill_load_geodata", stdout=out)
+    load.refresh_from_db()
+
+    assert "Geodata updated for 1 loads." in out.getvalue()
+    assert load.origin_latitude is None
+    assert load.geodata_updated_at is not None
+
+    out = StringIO()
+    call_command("backfill_load_geodata", stdout=out)
+    assert "Geodata updated for 0 loads." in out.getvalue()
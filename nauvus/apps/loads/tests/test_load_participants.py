@@ -0,0 +1,30 @@
+import pytest
+from django.contrib.auth import get_user_model
+
+from nauvus.apps.carrier.models import Carrier
+from nauvus.apps.driver.models import CarrierDriver, Driver
+from nauvus.apps.loads.models import LoadParticipant
+
+
+@pytest.mark.django_db
+def test_participants_follow_the_driver_of_the_load(load):
+    assert not LoadParticipant.objects.filter(load=load).exists()
+
+    driver_user = get_user_model().objects.create_user(username="participant_driver", password="somestrongpass2022")
+    driver = Driver.objects.create(user=driver_user)
+    carrier = Carrier.objects.create(organization_name="Participant Carrier Inc.")
+    CarrierDriver.objects.create(driver=driver, carrier=carrier)
+
+    load.driver = driver
+    load.save()
+
+    participants = set(LoadParticipant.objects.filter(load=load).values_list("user_id", "carrier_id", "role"))
+    assert participants == {
+        (driver_user.id, None, LoadParticipant.Role.DRIVER),
+        (None, carrier.id, LoadParticipant.Role.CARRIER),
+    }
+
+    load.driver = None
+    load.save()
+
+    assert not LoadParticipant.objects.filter(load=load).exists()
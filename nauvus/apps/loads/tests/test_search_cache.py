@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from nauvus.apps.loads.models import Load
+from nauvus.apps.loads.services import delete_available_loads
+
+
+class TestSearchCache(APITestCase):
+    def setUp(self):
+        self.load_url = "/api/v1/loads/search/"
+
+        self.user = get_user_model().objects.create_user(
+            username="search_cache_test",
+            email="search_cache_demo@demo.com",
+            password="somestrongpass2022",
+        )
+        self.load = self.create_load()
+
+        self.client.force_authenticate(user=self.user)
+
+        return super().setUp()
+
+    def create_load(self):
+        return Load.objects.create(
+            origin={"city": "Atlanta", "state": "GA", "zipcode": "30342"},
+            destination={"city": "Miami", "state": "FL", "zipcode": "33140"},
+            pickup_date=(datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S"),
+            current_status="available",
+            posted_rate=Decimal(1000),
+        )
+
+    def test_identical_searches_are_served_from_the_cache(self):
+        response = self.client.get(self.load_url, {"pagination": "cursor", "limit": 10})
+
+        with CaptureQueriesContext(connection) as queries:
+            cached_response = self.client.get(self.load_url, {"limit": 10, "pagination": "cursor"})
+
+        self.assertEqual(cached_response.status_code, 200)
+        self.assertEqual(cached_response.data, response.data)
+        self.assertFalse([query for query in queries if "FROM \"loads\"" in query["sql"]])
+
+    def test_searches_are_invalidated_when_the_available_loads_change(self):
+        response = self.client.get(self.load_url, {"pagination": "cursor"})
+        self.assertEqual(len(response.data.get("results")), 1)
+
+        self.create_load()
+        response = self.client.get(self.load_url, {"pagination": "cursor"})
+        self.assertEqual(len(response.data.get("results")), 2)
+
+        self.load.current_status = Load.Status.BOOKED
+        self.load.save()
+        response = self.client.get(self.load_url, {"pagination": "cursor"})
+        self.assertEqual(len(response.data.get("results")), 1)
+
+        delete_available_loads(Load.objects.all())
+        response = self.client.get(self.load_url, {"pagination": "cursor"})
+        self.assertEqual(len(response.data.get("results")), 0)
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from nauvus.apps.loads.models import Load
+
+
+class TestSearchCursorPagination(APITestCase):
+    def setUp(self):
+        self.load_url = "/api/v1/loads/search/"
+
+        self.user = get_user_model().objects.create_user(
+            username="cursor_test",
+            email="cursor_demo@demo.com",
+            password="somestrongpass2022",
+        )
+
+        for days in range(3):
+            Load.objects.create(
+                origin={"city": "Atlanta", "state": "GA", "zipcode": "30342"},
+                destination={"city": "Miami", "state": "FL", "zipcode": "33140"},
+                pickup_date=(datetime.now() + timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S"),
+                current_status="available",
+                posted_rate=Decimal(1000),
+            )
+
+        self.client.force_authenticate(user=self.user)
+
+        return super().setUp()
+
+    def test_search_with_cursor_pagination_follows_the_next_link(self):
+        response = self.client.get(self.load_url, {"pagination": "cursor", "limit": 2})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data.get("results")), 2)
+        self.assertNotIn("count", response.data)
+
+        next_response = self.client.get(response.data.get("next"))
+
+        self.assertEqual(len(next_response.data.get("results")), 1)
+        self.assertIsNone(next_response.data.get("next"))
+
+    def test_search_without_cursor_keeps_limit_offset_pagination(self):
+        response = self.client.get(self.load_url, {"limit": 2})
+
+        self.assertEqual(response.data.get("count"), 3)
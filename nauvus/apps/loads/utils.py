@@ -1,9 +1,11 @@
 from enum import Enum
+from functools import lru_cache
 from importlib import import_module
 
 import httpx
 
 from ..broker.models import Broker
+from .cache import get_cached_load_details
 from .models import Load
 
 
@@ -14,6 +16,7 @@ class LoadboardsEnum(Enum):
     }
 
 
+@lru_cache(maxsize=None)
 def get_loadboard(source_name):
     loadboard = LoadboardsEnum[source_name].value
     loadboard_path = loadboard.get("path")
@@ -22,13 +25,15 @@ def get_loadboard(source_name):
     return loadboard_class()
 
 
-def update_contact_broker(source_name, load_id, broker_id, external_load_id):
-    # Get the Loadboard class
-    loadboard_class = get_loadboard(source_name)
+def update_contact_broker(load: Load):
+    """Overlay the contact and broker details from the loadboard onto the load, saving only what changed.
 
-    try:
-        load_details = loadboard_class.get_load_details(external_load_id)
+    Raises:
+        ObjectDoesNotExist: the load is no longer on the loadboard
+    """
+    load_details = get_cached_load_details(load.source.source, load.source.load_id)
 
+    try:
         name = load_details.get("dispatchName")
         phone = load_details.get("dispatchPhone").get("number")
         email = load_details.get("dispatchEmail")
@@ -44,11 +49,19 @@ def update_contact_broker(source_name, load_id, broker_id, external_load_id):
 
         broker_phone = load_details.get("poster").get("phone").get("number")
         dot_number = load_details.get("poster").get("usdotNumber")
-        Broker.objects.filter(id=broker_id).update(phone=broker_phone, dot_number=dot_number)
-
-        Load.objects.filter(id=load_id).update(contact=contact_details)
     except AttributeError:
-        pass
+        return load
+
+    broker = load.broker
+    if broker and (broker.phone, broker.dot_number) != (broker_phone, dot_number):
+        Broker.objects.filter(id=broker.id).update(phone=broker_phone, dot_number=dot_number)
+        broker.phone, broker.dot_number = broker_phone, dot_number
+
+    if load.contact != contact_details:
+        Load.objects.filter(id=load.id).update(contact=contact_details)
+        load.contact = contact_details
+
+    return load
 
 
 def get_broker_from_fmcsa(mc_number):
@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from nauvus.apps.outbox.models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+
+    list_display = ["id", "provider", "action", "status", "attempts", "available_at", "processed_at"]
+    list_filter = ["provider", "status"]
+    search_fields = ["action"]
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class OutboxConfig(AppConfig):
+    name = "nauvus.apps.outbox"
+    verbose_name = _("Outbox")
+
+    def ready(self):
+        import nauvus.apps.outbox.handlers  # noqa: F401
@@ -0,0 +1,52 @@
+from nauvus.apps.broker.models import Broker
+from nauvus.apps.carrier.models import CarrierUser
+from nauvus.apps.outbox.models import OutboxMessage
+from nauvus.apps.outbox.services import outbox_handler
+from nauvus.apps.payments.models import Invoice, Loan
+from nauvus.auth.tasks import send_welcome_mail
+from nauvus.services.credit.oatfi.api import Oatfi
+from nauvus.services.docusign.docusign import docusign_worker
+from nauvus.users.models import User
+
+oatfi = Oatfi()
+
+
+@outbox_handler("oatfi.save_broker", OutboxMessage.Provider.OATFI)
+def save_broker(payload):
+    oatfi.save_broker(Broker.objects.get(pk=payload["broker_id"]))
+    Broker.objects.filter(pk=payload["broker_id"]).update(oatfi_registered=True)
+
+
+@outbox_handler("oatfi.save_carrier", OutboxMessage.Provider.OATFI)
+def save_carrier(payload):
+    oatfi.save_carrier(CarrierUser.objects.select_related("carrier", "user").get(pk=payload["carrier_user_id"]))
+
+
+@outbox_handler("oatfi.send_invoice_history", OutboxMessage.Provider.OATFI, batch=True)
+def send_invoice_history(payloads):
+    invoice_ids = {payload["invoice_id"] for payload in payloads}
+    invoices = Invoice.objects.filter(pk__in=invoice_ids).select_related("broker", "carrier_user__carrier")
+    oatfi.send_invoice_history(list(invoices))
+
+
+@outbox_handler("oatfi.update_invoice", OutboxMessage.Provider.OATFI)
+def update_invoice(payload):
+    oatfi.update_invoice(Invoice.objects.get(pk=payload["invoice_id"]))
+
+
+@outbox_handler("oatfi.record_loan_repayment", OutboxMessage.Provider.OATFI)
+def record_loan_repayment(payload):
+    loan = Loan.objects.select_related("invoice__carrier_user__carrier").get(pk=payload["loan_id"])
+    oatfi.record_loan_repayment(loan, payload["transfer_id"], payload["amount_in_cents"])
+
+
+@outbox_handler("email.welcome", OutboxMessage.Provider.EMAIL)
+def welcome_mail(payload):
+    send_welcome_mail(
+        email=payload.get("email"), first_name=payload.get("first_name"), last_name=payload.get("last_name")
+    )
+
+
+@outbox_handler("docusign.service_agreement", OutboxMessage.Provider.DOCUSIGN)
+def send_service_agreement(payload):
+    docusign_worker(User.objects.get(pk=payload["user_id"]))
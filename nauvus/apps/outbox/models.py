@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from nauvus.base.models import BaseModel
+
+
+class OutboxMessage(BaseModel):
+    """A call to an external service, saved with the change that requires it and delivered by the outbox worker."""
+
+    class Provider(models.TextChoices):
+        STRIPE = "stripe", _("STRIPE")
+        OATFI = "oatfi", _("OATFI")
+        EMAIL = "email", _("EMAIL")
+        SMS = "sms", _("SMS")
+        FCM = "fcm", _("FCM")
+        DOCUSIGN = "docusign", _("DOCUSIGN")
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("PENDING")
+        PROCESSING = "processing", _("PROCESSING")
+        DONE = "done", _("DONE")
+        FAILED = "failed", _("FAILED")
+
+    provider = models.CharField(max_length=20, choices=Provider.choices)
+    action = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, default=Status.PENDING, choices=Status.choices)
+    attempts = models.PositiveIntegerField(default=0)
+    # the message is delivered once this time is past, pushed back by the retries and the leases of the worker
+    available_at = models.DateTimeField(default=timezone.now)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(default="", blank=True)
+
+    class Meta:
+        db_table = "outbox_messages"
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_status_available_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.action} ({self.status})"
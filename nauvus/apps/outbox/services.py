@@ -0,0 +1,146 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, NamedTuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from nauvus.apps.outbox.models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 8
+# seconds before the first retry of a message, doubled on every attempt up to the maximum
+OUTBOX_RETRY_DELAY = 30
+OUTBOX_MAX_RETRY_DELAY = 60 * 60
+# seconds a claimed message is left to the worker before another worker may claim it again
+OUTBOX_LEASE = 5 * 60
+
+
+class OutboxHandler(NamedTuple):
+    provider: str
+    function: Callable
+    # a batch handler receives the payloads of all the claimed messages of its action in one call
+    batch: bool
+
+
+handlers = {}
+
+
+def outbox_handler(action, provider, batch=False):
+    """Register the function that delivers the messages of an action."""
+
+    def decorator(function):
+        handlers[action] = OutboxHandler(provider, function, batch)
+        return function
+
+    return decorator
+
+
+def enqueue(action, payload=None):
+    """Save a message for the action in the current transaction, delivered by the outbox worker after the commit."""
+    from nauvus.apps.outbox.tasks import dispatch_outbox
+
+    provider = handlers[action].provider
+    message = OutboxMessage.objects.create(provider=provider, action=action, payload=payload or {})
+    transaction.on_commit(lambda: dispatch_outbox.delay(provider))
+    return message
+
+
+def claim_messages(provider, batch_size=OUTBOX_BATCH_SIZE):
+    """Lease the next messages of the provider, skipping the messages other workers are delivering."""
+    now = timezone.now()
+    with transaction.atomic():
+        messages = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(
+                provider=provider,
+                status__in=[OutboxMessage.Status.PENDING, OutboxMessage.Status.PROCESSING],
+                available_at__lte=now,
+            )
+            .order_by("available_at")[:batch_size]
+        )
+        OutboxMessage.objects.filter(id__in=[message.id for message in messages]).update(
+            status=OutboxMessage.Status.PROCESSING, available_at=now + timedelta(seconds=OUTBOX_LEASE)
+        )
+    return messages
+
+
+def get_retry_delay(attempts):
+    return timedelta(seconds=min(OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), OUTBOX_MAX_RETRY_DELAY))
+
+
+def mark_delivered(messages):
+    OutboxMessage.objects.filter(id__in=[message.id for message in messages]).update(
+        status=OutboxMessage.Status.DONE, processed_at=timezone.now(), last_error=""
+    )
+
+
+def mark_failed(message, error):
+    """Schedule the retry of the message, or give up on it after OUTBOX_MAX_ATTEMPTS."""
+    message.attempts += 1
+    message.last_error = repr(error)
+    if message.attempts >= OUTBOX_MAX_ATTEMPTS:
+        logger.error(f"Outbox message {message.id} for {message.action} failed.  Full message: {repr(error)}")
+        message.status = OutboxMessage.Status.FAILED
+    else:
+        message.status = OutboxMessage.Status.PENDING
+        message.available_at = timezone.now() + get_retry_delay(message.attempts)
+    message.save(update_fields=["attempts", "last_error", "status", "available_at", "updated_at"])
+
+
+def deliver_messages(action, messages):
+    handler = handlers.get(action)
+    if handler is None:
+        for message in messages:
+            mark_failed(message, LookupError(f"No outbox handler for {action}"))
+        return 0
+
+    if handler.batch:
+        try:
+            handler.function([message.payload for message in messages])
+        except Exception as e:
+            for message in messages:
+                mark_failed(message, e)
+            return 0
+        mark_delivered(messages)
+        return len(messages)
+
+    delivered = []
+    for message in messages:
+        try:
+            handler.function(message.payload)
+        except Exception as e:
+            mark_failed(message, e)
+        else:
+            delivered.append(message)
+    mark_delivered(delivered)
+    return len(delivered)
+
+
+def dispatch_messages(provider, batch_size=OUTBOX_BATCH_SIZE):
+    """Deliver a batch of the messages of the provider, grouped by action.
+
+    Returns:
+        tuple: the number of claimed messages and the number of delivered messages
+    """
+    messages = claim_messages(provider, batch_size)
+
+    messages_by_action = defaultdict(list)
+    for message in messages:
+        messages_by_action[message.action].append(message)
+
+    delivered = 0
+    for action, action_messages in messages_by_action.items():
+        delivered += deliver_messages(action, action_messages)
+    return len(messages), delivered
+
+
+def purge_delivered_messages(days=7):
+    processed_before = timezone.now() - timedelta(days=days)
+    deleted, _ = OutboxMessage.objects.filter(
+        status=OutboxMessage.Status.DONE, processed_at__lt=processed_before
+    ).delete()
+    return deleted
@@ -0,0 +1,44 @@
+import logging
+
+from celery import shared_task
+from django.utils import timezone
+
+from nauvus.apps.outbox.models import OutboxMessage
+from nauvus.apps.outbox.services import OUTBOX_BATCH_SIZE, dispatch_messages, purge_delivered_messages
+
+logger = logging.getLogger(__name__)
+
+# batches delivered by a single run before it leaves the rest to the next run
+OUTBOX_MAX_BATCHES = 10
+
+
+@shared_task
+def dispatch_outbox(provider):
+    """Deliver the pending messages of a provider, so a slow provider does not hold back the others."""
+    for _ in range(OUTBOX_MAX_BATCHES):
+        claimed, delivered = dispatch_messages(provider)
+        if claimed:
+            logger.info(f"{delivered} of {claimed} outbox messages for {provider} were delivered.")
+        if claimed < OUTBOX_BATCH_SIZE:
+            break
+
+
+@shared_task
+def dispatch_pending_outbox():
+    """Start a dispatch for every provider with messages due, including the retries and the expired leases."""
+    providers = (
+        OutboxMessage.objects.filter(
+            status__in=[OutboxMessage.Status.PENDING, OutboxMessage.Status.PROCESSING],
+            available_at__lte=timezone.now(),
+        )
+        .values_list("provider", flat=True)
+        .distinct()
+    )
+    for provider in providers:
+        dispatch_outbox.delay(provider)
+
+
+@shared_task
+def purge_outbox():
+    deleted = purge_delivered_messages()
+    logger.info(f"{deleted} delivered outbox messages were deleted.")
@@ -0,0 +1,74 @@
+import pytest
+from django.utils import timezone
+
+from nauvus.apps.outbox import services
+from nauvus.apps.outbox.models import OutboxMessage
+
+
+@pytest.fixture
+def outbox_handlers(monkeypatch):
+    calls = []
+    registered = {}
+    monkeypatch.setattr(services, "handlers", registered)
+
+    def register(action, function, batch=False):
+        registered[action] = services.OutboxHandler(OutboxMessage.Provider.OATFI, function, batch)
+
+    register("test.batch", lambda payloads: calls.append(payloads), batch=True)
+    return calls, register
+
+
+def create_message(action, payload):
+    return OutboxMessage.objects.create(provider=OutboxMessage.Provider.OATFI, action=action, payload=payload)
+
+
+@pytest.mark.django_db
+def test_messages_of_a_batch_action_are_delivered_in_one_call(outbox_handlers):
+    calls, _ = outbox_handlers
+    for invoice_id in range(3):
+        create_message("test.batch", {"invoice_id": invoice_id})
+
+    claimed, delivered = services.dispatch_messages(OutboxMessage.Provider.OATFI)
+
+    assert (claimed, delivered) == (3, 3)
+    assert calls == [[{"invoice_id": 0}, {"invoice_id": 1}, {"invoice_id": 2}]]
+    assert OutboxMessage.objects.filter(status=OutboxMessage.Status.DONE).count() == 3
+
+
+@pytest.mark.django_db
+def test_failed_messages_are_retried_later_and_then_given_up(outbox_handlers):
+    _, register = outbox_handlers
+
+    def fail(payload):
+        raise ConnectionError("provider is down")
+
+    register("test.fail", fail)
+    message = create_message("test.fail", {})
+
+    assert services.dispatch_messages(OutboxMessage.Provider.OATFI) == (1, 0)
+    message.refresh_from_db()
+    assert message.status == OutboxMessage.Status.PENDING
+    assert message.attempts == 1
+    assert message.available_at > timezone.now()
+
+    # the retry is not due yet
+    assert services.dispatch_messages(OutboxMessage.Provider.OATFI) == (0, 0)
+
+    OutboxMessage.objects.filter(pk=message.pk).update(
+        attempts=services.OUTBOX_MAX_ATTEMPTS - 1, available_at=timezone.now()
+    )
+    services.dispatch_messages(OutboxMessage.Provider.OATFI)
+    message.refresh_from_db()
+    assert message.status == OutboxMessage.Status.FAILED
+    assert "provider is down" in message.last_error
+
+
+@pytest.mark.django_db
+def test_messages_with_an_expired_lease_are_claimed_again(outbox_handlers):
+    message = create_message("test.batch", {})
+    services.claim_messages(OutboxMessage.Provider.OATFI)
+
+    assert services.claim_messages(OutboxMessage.Provider.OATFI) == []
+
+    OutboxMessage.objects.filter(pk=message.pk).update(available_at=timezone.now())
+    assert services.claim_messages(OutboxMessage.Provider.OATFI) == [message]
@@ -1,4 +1,3 @@
-from django.core.exceptions import ObjectDoesNotExist
 from rest_framework import serializers
 
 
@@ -18,10 +17,9 @@ class PaymentTermsSerializer(serializers.Serializer):
 
     def validate_instant(self, value):
         if value is True:
-            # if instant_payment is true, ensure that there is a loan
-            load = self.context["load"]
-            try:
-                load.loadsettlement.invoice.loan
-            except ObjectDoesNotExist:
+            # if instant_payment is true, ensure that a loan was offered
+            # a settlement without a snapshot yet is checked by the view once the offer is computed
+            load_settlement = self.context["load"].loadsettlement
+            if load_settlement.instant_pay_refreshed_at is not None and not load_settlement.instant_pay_eligible:
                 raise serializers.ValidationError("Instant pay is only available if loan terms have been offered.")
         return value
@@ -2,6 +2,7 @@ import logging
 
 import stripe
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from rest_framework import status, views
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
@@ -12,6 +13,7 @@ from nauvus.api.permissions import IsDelivered, IsLoadCarrier
 from nauvus.apps.loads.models import Load
 from nauvus.apps.payments.api.serializers import PaymentTermsSerializer, TransferUserMoneyToExternalAccountSerializer
 from nauvus.apps.payments.models import Invoice
+from nauvus.apps.payments.services import INSTANT_PAY_OFFER_MAX_AGE, refresh_instant_pay_offer
 from nauvus.services.credit.oatfi.api import Oatfi
 
 oatfi = Oatfi()
@@ -31,28 +33,39 @@ class LoadPaymentViewSet(ViewSet):
         self.check_object_permissions(self.request, load)
         return load
 
-    def __get_instant_payment_details(self, invoice):
+    def __get_instant_pay_snapshot(self, load_settlement, max_age=None):
+        refreshed_at = load_settlement.instant_pay_refreshed_at
+        if refreshed_at is None:
+            # the offer is computed in the background after the delivery, compute it now if the carrier is faster
+            invoice = load_settlement.invoice
+            if invoice.processing_status not in (Invoice.ProcessingStatus.OATFI_SYNCED, Invoice.ProcessingStatus.SENT):
+                oatfi.send_invoice_history([invoice])
+            load_settlement = refresh_instant_pay_offer(invoice)
+        elif max_age is not None and refreshed_at < timezone.now() - max_age:
+            load_settlement = refresh_instant_pay_offer(load_settlement.invoice)
+        return load_settlement
 
-        loan = oatfi.get_loan_offer(invoice)
-        loan.save()
+    def __get_instant_payment_details(self, load_settlement):
 
-        fees = (loan.fee_amount_in_cents + invoice.load_settlement.nauvus_fees_in_cents) / 100
-        available_today = loan.principal_amount_in_cents / 100
+        fees = (load_settlement.instant_pay_fee_in_cents + load_settlement.nauvus_fees_in_cents) / 100
+        available_today = load_settlement.instant_pay_principal_in_cents / 100
 
-        available_later = round(float(invoice.load_settlement.load.final_rate) - available_today - fees, 2)
+        available_later = round(float(load_settlement.load.final_rate) - available_today - fees, 2)
 
         payment_details = {
             "available_today": available_today,
             "available_on_broker_payment": available_later,
             "fees": fees,
-            "total": invoice.load_settlement.load.final_rate,
-            "terms_link": loan.terms,
+            "total": load_settlement.load.final_rate,
+            "terms_link": load_settlement.instant_pay_terms,
         }
 
         return payment_details
 
     def __accept_instant_payment_terms(self, load_settlement):
 
+        # the funding is not delivered by the outbox: the payout it creates is returned to the carrier and the
+        # funding call is not idempotent, a retried delivery could fund the loan twice
         payment = oatfi.accept_loan(load_settlement.invoice.loan)
 
         return {"payment_id": payment.uid}
@@ -62,16 +75,17 @@ class LoadPaymentViewSet(ViewSet):
         load = self.get_object()
 
         try:
-            instant_pay_preapproval = oatfi.get_broker_preapproval(load.broker)
+            load_settlement = self.__get_instant_pay_snapshot(load.loadsettlement)
+            instant_pay_eligible = load_settlement.instant_pay_eligible
         except Exception:
             logger.debug(
-                f"Encountered exception getting pre-approval for {load.broker.name}. Force pre-approval to False",
+                f"Encountered exception getting the instant pay offer of load {load.id}. Force it to False",
                 stack_info=True,
             )
-            instant_pay_preapproval = False
+            instant_pay_eligible = False
 
-        payment_types = {"instant": instant_pay_preapproval}
-        logger.debug(f"instant pay approval for load {load.id} is {instant_pay_preapproval}")
+        payment_types = {"instant": instant_pay_eligible}
+        logger.debug(f"instant pay approval for load {load.id} is {instant_pay_eligible}")
 
         return Response(
             payment_types,
@@ -83,14 +97,15 @@ class LoadPaymentViewSet(ViewSet):
 
         load_settlement = load.loadsettlement
 
-        # send the invoice history even if the user does not do instant payment
-        invoice = Invoice.objects.get(load_settlement=load_settlement)
-        oatfi.send_invoice_history([invoice])
-
         instant_payment = request.query_params.get("instant")
 
         if instant_payment is not None and instant_payment.lower() == "true":
-            return Response(self.__get_instant_payment_details(invoice))
+            load_settlement = self.__get_instant_pay_snapshot(load_settlement)
+            if not load_settlement.instant_pay_eligible:
+                return Response(
+                    {"error": "Instant payment is not available for this load."}, status=status.HTTP_400_BAD_REQUEST
+                )
+            return Response(self.__get_instant_payment_details(load_settlement))
 
         fees = load_settlement.nauvus_fees_in_cents / 100
 
@@ -132,22 +147,32 @@ class LoadPaymentViewSet(ViewSet):
         load.current_status = Load.Status.PARTIAL_SETTLED
         load_settlement = load.loadsettlement
 
-        load_settlement.accept_terms(serializer.validated_data["terms_accepted_timestamp"])
-
-        # if instant pay, accept the loan with oatfi and do the payment
-        # if not instant pay, accept the terms and do nothing else
+        # if instant pay, the loan offered in the snapshot is taken once the snapshot is recent enough
         instant_payment = serializer.validated_data["instant"]
         if instant_payment:
-            response = Response(self.__accept_instant_payment_terms(load_settlement), status=status.HTTP_200_OK)
+            load_settlement = self.__get_instant_pay_snapshot(load_settlement, max_age=INSTANT_PAY_OFFER_MAX_AGE)
+            if not load_settlement.instant_pay_eligible:
+                return Response(
+                    {"error": "Instant payment is no longer available for this load."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            load_settlement.save_instant_pay_loan()
+
+        load_settlement.accept_terms(serializer.validated_data["terms_accepted_timestamp"])
+        if instant_payment:
             load_settlement.invoice.loan.save()
-        else:
-            response = Response(status=status.HTTP_200_OK)
 
-        # save at the end to ensure that all the steps are completed
         load.save()
         load_settlement.save()
 
-        return response
+        # if instant pay, accept the loan with oatfi and do the payment
+        # if not instant pay, accept the terms and do nothing else
+        # the loan is funded after the local changes are saved, so a failure rolls the request back before any
+        # money moves
+        if instant_payment:
+            return Response(self.__accept_instant_payment_terms(load_settlement), status=status.HTTP_200_OK)
+
+        return Response(status=status.HTTP_200_OK)
 
 
 class TransferUserMoneyToExternalAccount(views.APIView):
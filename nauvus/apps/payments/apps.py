@@ -4,3 +4,6 @@ from django.utils.translation import gettext_lazy as _
 class PaymentsConfig(AppConfig):
     name = "nauvus.apps.payments"
     verbose_name = _("Payments")
+
+    def ready(self):
+        import nauvus.apps.payments.signals  # noqa: F401
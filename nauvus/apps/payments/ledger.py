@@ -0,0 +1,152 @@
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import BigIntegerField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from nauvus.apps.carrier.models import CarrierUser
+from nauvus.apps.payments.models import CarrierBalance, CarrierLedgerEntry, Invoice
+
+EntryType = CarrierLedgerEntry.EntryType
+
+
+def get_invoice_entries(invoice: Invoice):
+    """Returns the amounts the invoice, its fees and its loan add to the balance of the carrier user, by entry type."""
+    if invoice.carrier_user_id is None:
+        return {}
+
+    amounts = {
+        EntryType.INVOICE: invoice.amount_due_in_cents,
+        EntryType.NAUVUS_FEE: -invoice.load_settlement.nauvus_fees_in_cents,
+    }
+    try:
+        amounts[EntryType.LOAN_PAYOUT] = -invoice.loan.principal_amount_in_cents
+        amounts[EntryType.LOAN_FEE] = -invoice.loan.fee_amount_in_cents
+    except ObjectDoesNotExist:
+        pass
+    if invoice.status == "paid":
+        amounts[EntryType.SETTLEMENT] = -sum(amounts.values())
+
+    return {(invoice.carrier_user_id, entry_type): amount for entry_type, amount in amounts.items()}
+
+
+def update_balance(carrier_user_id, amount_in_cents):
+    CarrierBalance.objects.get_or_create(carrier_user_id=carrier_user_id)
+    CarrierBalance.objects.filter(carrier_user_id=carrier_user_id).update(
+        pending_balance_in_cents=F("pending_balance_in_cents") + amount_in_cents
+    )
+
+
+def post_invoice_entries(invoice_id):
+    """Post the entries that bring the ledger of the invoice in line with the invoice, its fees and its loan.
+
+    Returns:
+        list: the entries posted, none if the ledger of the invoice is up to date
+    """
+    with transaction.atomic():
+        # the lock keeps concurrent saves of the invoice from posting the same adjustment twice
+        invoice = (
+            Invoice.objects.select_for_update(of=("self",)).select_related("load_settlement", "loan").get(pk=invoice_id)
+        )
+        expected = get_invoice_entries(invoice)
+        posted = {
+            (row["carrier_user_id"], row["entry_type"]): row["total"]
+            for row in CarrierLedgerEntry.objects.filter(invoice=invoice)
+            .values("carrier_user_id", "entry_type")
+            .annotate(total=Sum("amount_in_cents"))
+        }
+
+        entries = []
+        for carrier_user_id, entry_type in expected.keys() | posted.keys():
+            amount = expected.get((carrier_user_id, entry_type), 0) - posted.get((carrier_user_id, entry_type), 0)
+            if amount:
+                entries.append(
+                    CarrierLedgerEntry(
+                        carrier_user_id=carrier_user_id, invoice=invoice, entry_type=entry_type, amount_in_cents=amount
+                    )
+                )
+        if not entries:
+            return []
+
+        CarrierLedgerEntry.objects.bulk_create(entries)
+        for carrier_user_id in {entry.carrier_user_id for entry in entries}:
+            update_balance(
+                carrier_user_id,
+                sum(entry.amount_in_cents for entry in entries if entry.carrier_user_id == carrier_user_id),
+            )
+        return entries
+
+
+def get_pending_balance_in_cents(carrier_user):
+    balance = (
+        CarrierBalance.objects.filter(carrier_user=carrier_user)
+        .values_list("pending_balance_in_cents", flat=True)
+        .first()
+    )
+    return balance or 0
+
+
+def get_ledger_discrepancies():
+    """Returns the carrier users whose balance, ledger and unpaid invoices do not agree, in a single query.
+
+    The carrier users are annotated with their ``pending_balance``, their ``ledger_balance`` and the
+    ``expected_balance`` computed from their unpaid invoices, the fees of the loads and the loans.
+    """
+    unpaid_invoices = (
+        Invoice.objects.filter(carrier_user=OuterRef("pk"))
+        .exclude(status="paid")
+        .order_by()
+        .values("carrier_user")
+        .annotate(
+            total=Sum(
+                ExpressionWrapper(
+                    F("amount_due_in_cents")
+                    - F("load_settlement__nauvus_fees_in_cents")
+                    - Coalesce(F("loan__principal_amount_in_cents"), 0)
+                    - Coalesce(F("loan__fee_amount_in_cents"), 0),
+                    output_field=BigIntegerField(),
+                )
+            )
+        )
+        .values("total")
+    )
+    ledger = (
+        CarrierLedgerEntry.objects.filter(carrier_user=OuterRef("pk"))
+        .order_by()
+        .values("carrier_user")
+        .annotate(total=Sum("amount_in_cents"))
+        .values("total")
+    )
+
+    return CarrierUser.objects.annotate(
+        expected_balance=Coalesce(Subquery(unpaid_invoices), Value(0), output_field=BigIntegerField()),
+        ledger_balance=Coalesce(Subquery(ledger), Value(0), output_field=BigIntegerField()),
+        pending_balance=Coalesce(
+            F("carrierbalance__pending_balance_in_cents"), Value(0), output_field=BigIntegerField()
+        ),
+    ).exclude(expected_balance=F("ledger_balance"), pending_balance=F("ledger_balance"))
+
+
+def rebuild_carrier_ledger():
+    """Post the missing entries of every invoice and reset the balances to the sums of the ledger.
+
+    Returns:
+        int: the number of entries posted
+    """
+    posted = 0
+    for invoice_id in Invoice.objects.order_by("pk").values_list("pk", flat=True).iterator():
+        posted += len(post_invoice_entries(invoice_id))
+
+    with transaction.atomic():
+        totals = dict(
+            CarrierLedgerEntry.objects.order_by()
+            .values("carrier_user_id")
+            .annotate(total=Sum("amount_in_cents"))
+            .values_list("carrier_user_id", "total")
+        )
+        for carrier_user_id, total in totals.items():
+            CarrierBalance.objects.update_or_create(
+                carrier_user_id=carrier_user_id, defaults={"pending_balance_in_cents": total}
+            )
+        CarrierBalance.objects.exclude(carrier_user_id__in=totals.keys()).update(pending_balance_in_cents=0)
+
+    return posted
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from nauvus.apps.payments.ledger import get_ledger_discrepancies, rebuild_carrier_ledger
+
+
+class Command(BaseCommand):
+    help = "Post the missing carrier ledger entries of the invoices and reset the carrier balances from the ledger"
+
+    def handle(self, *args, **options):
+        posted = rebuild_carrier_ledger()
+        self.stdout.write(f"{posted} carrier ledger entries posted.")
+
+        for carrier_user in get_ledger_discrepancies():
+            self.stderr.write(
+                self.style.ERROR_OUTPUT(
+                    f"Carrier user {carrier_user.pk}: balance {carrier_user.pending_balance}, "
+                    f"ledger {carrier_user.ledger_balance}, unpaid invoices {carrier_user.expected_balance}"
+                )
+            )
+        self.stdout.write(self.style.SUCCESS("Carrier ledger rebuilt"))
@@ -0,0 +1,30 @@
+# Generated by Django 3.2.13 on 2026-10-18 18:20
+
+from django.db import migrations, models
+
+
+def mark_existing_invoices_sent(apps, schema_editor):
+    # the invoices created before the delivery pipeline were sent when the load was delivered
+    Invoice = apps.get_model('payments', 'Invoice')
+    Invoice.objects.update(processing_status='sent')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0008_invoice_stripe_payment_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='processing_status',
+            field=models.CharField(blank=True, choices=[('pending', 'PENDING'), ('payment_link_created', 'PAYMENT_LINK_CREATED'), ('oatfi_synced', 'OATFI_SYNCED'), ('sent', 'SENT')], default='pending', max_length=30),
+        ),
+        migrations.AddField(
+            model_name='invoice',
+            name='processing_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RunPython(mark_existing_invoices_sent, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 3.2.13 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+def snapshot_offered_loans(apps, schema_editor):
+    # the offers made before the snapshot were saved as offered loans, the snapshot starts from them
+    LoadSettlement = apps.get_model('payments', 'LoadSettlement')
+    Loan = apps.get_model('payments', 'Loan')
+
+    settlements = []
+    loans = Loan.objects.filter(current_status='offered', invoice__load_settlement__terms_accepted=False)
+    for loan in loans.select_related('invoice').iterator():
+        settlements.append(
+            LoadSettlement(
+                id=loan.invoice.load_settlement_id,
+                instant_pay_eligible=True,
+                instant_pay_principal_in_cents=loan.principal_amount_in_cents,
+                instant_pay_fee_in_cents=loan.fee_amount_in_cents,
+                instant_pay_terms=loan.terms,
+                instant_pay_refreshed_at=loan.updated_at,
+            )
+        )
+    LoadSettlement.objects.bulk_update(
+        settlements,
+        [
+            'instant_pay_eligible',
+            'instant_pay_principal_in_cents',
+            'instant_pay_fee_in_cents',
+            'instant_pay_terms',
+            'instant_pay_refreshed_at',
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0009_invoice_processing_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='loadsettlement',
+            name='instant_pay_eligible',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='loadsettlement',
+            name='instant_pay_principal_in_cents',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loadsettlement',
+            name='instant_pay_fee_in_cents',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='loadsettlement',
+            name='instant_pay_terms',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='loadsettlement',
+            name='instant_pay_refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(snapshot_offered_loans, migrations.RunPython.noop),
+    ]
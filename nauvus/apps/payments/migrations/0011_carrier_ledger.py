@@ -0,0 +1,94 @@
+# Generated by Django 3.2.13 on 2026-10-18 20:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def build_carrier_ledger(apps, schema_editor):
+    # post the entries of the existing invoices as payments.ledger.get_invoice_entries does and sum the balances
+    Invoice = apps.get_model('payments', 'Invoice')
+    CarrierLedgerEntry = apps.get_model('payments', 'CarrierLedgerEntry')
+    CarrierBalance = apps.get_model('payments', 'CarrierBalance')
+
+    invoices = Invoice.objects.filter(carrier_user__isnull=False).values_list(
+        'id',
+        'carrier_user_id',
+        'status',
+        'amount_due_in_cents',
+        'load_settlement__nauvus_fees_in_cents',
+        'loan__principal_amount_in_cents',
+        'loan__fee_amount_in_cents',
+    )
+
+    entries = []
+    balances = {}
+    for invoice_id, carrier_user_id, status, amount_due, nauvus_fees, loan_principal, loan_fee in invoices.iterator():
+        amounts = {'invoice': amount_due, 'nauvus_fee': -nauvus_fees}
+        if loan_principal is not None:
+            amounts['loan_payout'] = -loan_principal
+            amounts['loan_fee'] = -loan_fee
+        if status == 'paid':
+            amounts['settlement'] = -sum(amounts.values())
+
+        for entry_type, amount in amounts.items():
+            entries.append(
+                CarrierLedgerEntry(
+                    carrier_user_id=carrier_user_id,
+                    invoice_id=invoice_id,
+                    entry_type=entry_type,
+                    amount_in_cents=amount,
+                )
+            )
+        balances[carrier_user_id] = balances.get(carrier_user_id, 0) + sum(amounts.values())
+
+    CarrierLedgerEntry.objects.bulk_create(entries, batch_size=1000)
+    CarrierBalance.objects.bulk_create(
+        [
+            CarrierBalance(carrier_user_id=carrier_user_id, pending_balance_in_cents=balance)
+            for carrier_user_id, balance in balances.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('carrier', '0031_carrier_invoice_email'),
+        ('payments', '0010_loadsettlement_instant_pay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CarrierBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(default=uuid.uuid4, max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('pending_balance_in_cents', models.BigIntegerField(default=0)),
+                ('carrier_user', models.OneToOneField(on_delete=django.db.models.deletion.PROTECT, to='carrier.carrieruser')),
+            ],
+            options={
+                'db_table': 'carrier_balances',
+            },
+        ),
+        migrations.CreateModel(
+            name='CarrierLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('uid', models.UUIDField(default=uuid.uuid4, max_length=100, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('entry_type', models.CharField(choices=[('invoice', 'INVOICE'), ('nauvus_fee', 'NAUVUS_FEE'), ('loan_payout', 'LOAN_PAYOUT'), ('loan_fee', 'LOAN_FEE'), ('settlement', 'SETTLEMENT')], max_length=30)),
+                ('amount_in_cents', models.BigIntegerField()),
+                ('carrier_user', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='carrier.carrieruser')),
+                ('invoice', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='payments.invoice')),
+            ],
+            options={
+                'db_table': 'carrier_ledger_entries',
+            },
+        ),
+        migrations.RunPython(build_carrier_ledger, migrations.RunPython.noop),
+    ]
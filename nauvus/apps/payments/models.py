@@ -20,6 +20,13 @@ class LoadSettlement(BaseModel):
     terms_accepted = models.BooleanField(default=False)
     terms_accepted_timestamp = models.DateTimeField(null=True, blank=True)
 
+    # snapshot of the instant payment offer, refreshed in the background until the terms are accepted
+    instant_pay_eligible = models.BooleanField(default=False)
+    instant_pay_principal_in_cents = models.PositiveIntegerField(null=True, blank=True)
+    instant_pay_fee_in_cents = models.PositiveIntegerField(null=True, blank=True)
+    instant_pay_terms = models.TextField(default="", blank=True)
+    instant_pay_refreshed_at = models.DateTimeField(null=True, blank=True)
+
     def accept_terms(self, terms_accepted_time):
         """User accepts the terms; if there is a loan accept those terms too"""
         self.terms_accepted = True
@@ -34,6 +41,22 @@ class LoadSettlement(BaseModel):
         except ObjectDoesNotExist:
             pass
 
+    def save_instant_pay_loan(self):
+        """Saves the loan of the instant payment offer of the snapshot, reusing the loan offered for the invoice."""
+        loan, _ = Loan.objects.update_or_create(
+            invoice=self.invoice,
+            defaults={
+                "current_status": Loan.Status.OFFERED,
+                "lender": Loan.Source.OATFI,
+                "principal_amount_in_cents": self.instant_pay_principal_in_cents,
+                "fee_amount_in_cents": self.instant_pay_fee_in_cents,
+                "terms": self.instant_pay_terms,
+            },
+        )
+        # cache the loan on the invoice for the acceptance of its terms
+        loan.invoice = self.invoice
+        return loan
+
 
 class LoadSettlementStatusHistory(BaseModel):
     load_settlement_id = models.ForeignKey(LoadSettlement, null=True, blank=True, on_delete=models.PROTECT)
@@ -46,6 +69,14 @@ class LoadSettlementStatusHistory(BaseModel):
 class Invoice(BaseModel):
     """An invoice to the broker to pay the agreed rate for the completion of delivery."""
 
+    class ProcessingStatus(models.TextChoices):
+        """The last completed stage of the delivery settlement of the invoice, in order."""
+
+        PENDING = "pending", _("PENDING")
+        PAYMENT_LINK_CREATED = "payment_link_created", _("PAYMENT_LINK_CREATED")
+        OATFI_SYNCED = "oatfi_synced", _("OATFI_SYNCED")
+        SENT = "sent", _("SENT")
+
     broker = models.ForeignKey(Broker, null=True, blank=True, on_delete=models.PROTECT)
     carrier_user = models.ForeignKey(CarrierUser, null=True, blank=True, on_delete=models.PROTECT)
 
@@ -66,6 +97,12 @@ class Invoice(BaseModel):
 
     status = models.CharField(max_length=255, null=True, blank=True, default="unpaid")
 
+    processing_status = models.CharField(
+        max_length=30, default=ProcessingStatus.PENDING, choices=ProcessingStatus.choices, blank=True
+    )
+    # the error of the stage that ran out of retries, cleared when a stage completes
+    processing_error = models.TextField(default="", blank=True)
+
     def due_date_in_milliseconds(self):
         return convert_date_to_ms_since_epoch(self.due_date)
 
@@ -155,3 +192,37 @@ class Payment(BaseModel):
     load_settlement = models.ForeignKey(LoadSettlement, null=False, blank=False, on_delete=models.PROTECT)
     stripe_ref_id = models.CharField(max_length=300, null=False, blank=False)
     payment_type = models.CharField(max_length=30, null=False, blank=False, choices=PaymentType.choices)
+
+
+class CarrierLedgerEntry(BaseModel):
+    """A credit or debit of the pending balance of a carrier user, from the unpaid invoices of their loads.
+
+    Entries are never changed, a change of an invoice, its fees or its loan is posted as adjusting entries.
+    """
+
+    class EntryType(models.TextChoices):
+        INVOICE = "invoice", _("INVOICE")
+        NAUVUS_FEE = "nauvus_fee", _("NAUVUS_FEE")
+        LOAN_PAYOUT = "loan_payout", _("LOAN_PAYOUT")
+        LOAN_FEE = "loan_fee", _("LOAN_FEE")
+        # the broker paid the invoice, the balance of the invoice is transferred out of the pending balance
+        SETTLEMENT = "settlement", _("SETTLEMENT")
+
+    carrier_user = models.ForeignKey(CarrierUser, on_delete=models.PROTECT)
+    invoice = models.ForeignKey(Invoice, on_delete=models.PROTECT)
+    entry_type = models.CharField(max_length=30, choices=EntryType.choices)
+    # credits are positive and debits negative
+    amount_in_cents = models.BigIntegerField()
+
+    class Meta:
+        db_table = "carrier_ledger_entries"
+
+
+class CarrierBalance(BaseModel):
+    """The sum of the ledger entries of a carrier user, updated with every entry."""
+
+    carrier_user = models.OneToOneField(CarrierUser, on_delete=models.PROTECT)
+    pending_balance_in_cents = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "carrier_balances"
@@ -1,118 +1,219 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List, NamedTuple
+
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Sum
+from django.db import transaction
+from django.utils import timezone
 
 from nauvus.apps.loads.models import Load
-from nauvus.apps.payments.models import Invoice, LoadSettlement, Loan, Payment
+from nauvus.apps.outbox.services import enqueue
+from nauvus.apps.payments.ledger import get_pending_balance_in_cents
+from nauvus.apps.payments.models import Invoice, LoadSettlement, Payment
 from nauvus.services.credit.oatfi.api import Oatfi
 from nauvus.services.stripe import StripeClient
 
 stripe_client = StripeClient()
 oatfi = Oatfi()
+logger = logging.getLogger(__name__)
+
+# an instant payment offer older than this is refreshed before the carrier can take it
+INSTANT_PAY_OFFER_MAX_AGE = timedelta(minutes=15)
 
 
 def get_unpaid_invoices_balance_in_cents(carrier_user):
     """Returns the total amount of money from unpaid invoices that is due to the user."""
-    unpaid_invoices = Invoice.objects.filter(carrier_user=carrier_user).exclude(status="paid")
-
-    unpaid_invoice_balance = 0
-    nauvus_fees = 0
-    if unpaid_invoices:
-        unpaid_invoice_balance = unpaid_invoices.aggregate(Sum("amount_due_in_cents")).get("amount_due_in_cents__sum")
-        nauvus_fees = (
-            LoadSettlement.objects.filter(invoice__in=unpaid_invoices)
-            .aggregate(Sum("nauvus_fees_in_cents"))
-            .get("nauvus_fees_in_cents__sum")
-        )
-
-    loans = Loan.objects.filter(invoice__in=unpaid_invoices)
-
-    loan_totals = 0
-
-    # if there are loans, get the balances of the principals and the fees
-    if loans:
-        loan_subtotals = loans.aggregate(Sum("principal_amount_in_cents"), Sum("fee_amount_in_cents"))
-        loan_totals = loan_subtotals.get("principal_amount_in_cents__sum") + loan_subtotals.get(
-            "fee_amount_in_cents__sum"
-        )
+    return get_pending_balance_in_cents(carrier_user)
 
-    total_balance = unpaid_invoice_balance - nauvus_fees - loan_totals
 
-    return total_balance
+def refresh_instant_pay_offer(invoice: Invoice) -> LoadSettlement:
+    """Store whether the invoice can be paid instantly and the terms of the loan offered for it.
 
+    The snapshot is left alone once the terms of the load settlement are accepted.
+    """
+    load_settlement = invoice.load_settlement
+    if load_settlement.terms_accepted:
+        return load_settlement
 
-def transfer_nauvus_fees(load_settlement: LoadSettlement) -> Payment:
-    """Transfer the fee amount to the Nauvus fees account"""
+    loan = oatfi.get_loan_offer(invoice)
 
-    transfer_amount = load_settlement.nauvus_fees_in_cents
+    load_settlement.instant_pay_eligible = loan is not None
+    load_settlement.instant_pay_principal_in_cents = loan.principal_amount_in_cents if loan else None
+    load_settlement.instant_pay_fee_in_cents = loan.fee_amount_in_cents if loan else None
+    load_settlement.instant_pay_terms = loan.terms if loan else ""
+    load_settlement.instant_pay_refreshed_at = timezone.now()
 
-    if transfer_amount == 0:
-        return None
-    stripe_transfer = stripe_client.create_transfer(
-        transfer_amount, settings.NAUVUS_FEE_ACCOUNT, f"Nauvus fee for load {load_settlement.load.id}"
+    # the terms may have been accepted while the offer was requested
+    LoadSettlement.objects.filter(pk=load_settlement.pk, terms_accepted=False).update(
+        instant_pay_eligible=load_settlement.instant_pay_eligible,
+        instant_pay_principal_in_cents=load_settlement.instant_pay_principal_in_cents,
+        instant_pay_fee_in_cents=load_settlement.instant_pay_fee_in_cents,
+        instant_pay_terms=load_settlement.instant_pay_terms,
+        instant_pay_refreshed_at=load_settlement.instant_pay_refreshed_at,
     )
 
-    transfer_id = stripe_transfer["id"]
+    return load_settlement
 
-    # create the payment and reference the transfer
-    payment = Payment.objects.create(
-        payment_type=Payment.PaymentType.FEE,
-        amount_in_cents=transfer_amount,
-        load_settlement=load_settlement,
-        stripe_ref_id=transfer_id,
-    )
 
-    return payment
+class SettlementError(Exception):
+    pass
 
 
-def transfer_carrier_balance(invoice: Invoice, amount):
-    carrier_account = invoice.carrier_user.user.stripe_customer_id
-    stripe_transfer = stripe_client.create_transfer(
-        amount, carrier_account, f"Remaining payout for load {invoice.load_settlement.load.id}"
-    )
-    transfer_id = stripe_transfer["id"]
-
-    # create the payment and reference the transfer
-    payment = Payment.objects.create(
-        payment_type=Payment.PaymentType.TO_CARRIER,
-        amount_in_cents=amount,
-        load_settlement=invoice.load_settlement,
-        stripe_ref_id=transfer_id,
-    )
+class PlannedTransfer(NamedTuple):
+    """A transfer of part of the payment of an invoice, planned before any transfer is made."""
 
-    return payment
+    payment_type: str
+    amount_in_cents: int
+    destination: str
+    description: str
+    idempotency_key: str
 
 
-def process_broker_payment(invoice: Invoice, broker_payment: Payment):
-    """Distribute the payment from the broker to loan provider and carrier while taking agreed fees"""
+def plan_broker_payment_transfers(invoice: Invoice) -> List[PlannedTransfer]:
+    """Plan the transfers that distribute the payment of the invoice to the lender, Nauvus and the carrier.
 
-    # mark the invoice as paid
-    invoice.amount_paid_in_cents = broker_payment.amount_in_cents
-    invoice.paid_date = broker_payment.created_at
-    invoice.status = "paid"
+    The transfers whose payment is already recorded for the load settlement are not planned again.
 
-    invoice.save()
+    Raises:
+        SettlementError: the loan repayment and the fees exceed the invoice, no transfer can be made
+    """
+    load_id = invoice.load_settlement.load_id
+    transfers = []
+    # the idempotency keys are only kept by Stripe for a day, the recorded payments keep later runs from paying twice
+    recorded_payment_types = set(
+        Payment.objects.filter(load_settlement_id=invoice.load_settlement_id).values_list("payment_type", flat=True)
+    )
 
-    oatfi.update_invoice(invoice)
+    def plan(payment_type, amount_in_cents, destination, description):
+        if amount_in_cents > 0 and payment_type not in recorded_payment_types:
+            # the key comes from the invoice so a settlement that runs again does not transfer the money twice
+            idempotency_key = f"invoice-{invoice.uid}-{payment_type}"
+            transfers.append(PlannedTransfer(payment_type, amount_in_cents, destination, description, idempotency_key))
 
     loan_repayment_amount = 0
     try:
         # payback the loan principal and fees
         loan = invoice.loan
-        loan_repayment = oatfi.repay_loan(loan)
-        loan_repayment_amount = loan_repayment.amount_in_cents
-
+        loan_repayment_amount = loan.fee_amount_in_cents + loan.principal_amount_in_cents
+        plan(
+            Payment.PaymentType.LOAN_REPAYMENT,
+            loan_repayment_amount,
+            settings.OATFI_STRIPE_ACCOUNT,
+            f"Repayment of loan {loan.uid} for {load_id}",
+        )
     except ObjectDoesNotExist:
         # if no loan, then no need to process it
         pass
 
     # transfer nauvus fees to the fees account
-    nauvus_fee_payment = transfer_nauvus_fees(invoice.load_settlement)
+    nauvus_fees = invoice.load_settlement.nauvus_fees_in_cents
+    plan(Payment.PaymentType.FEE, nauvus_fees, settings.NAUVUS_FEE_ACCOUNT, f"Nauvus fee for load {load_id}")
 
     # transfer remaining balance to carrier
-    balance_due_to_carrier = invoice.amount_due_in_cents - loan_repayment_amount - nauvus_fee_payment.amount_in_cents
-    transfer_carrier_balance(invoice, balance_due_to_carrier)
+    carrier_amount = invoice.amount_due_in_cents - loan_repayment_amount - nauvus_fees
+    if carrier_amount < 0:
+        raise SettlementError(
+            f"The loan repayment of {loan_repayment_amount} and the fees of {nauvus_fees} exceed the "
+            f"{invoice.amount_due_in_cents} due on invoice {invoice.uid} of load {load_id}."
+        )
+    plan(
+        Payment.PaymentType.TO_CARRIER,
+        carrier_amount,
+        invoice.carrier_user.user.stripe_customer_id,
+        f"Remaining payout for load {load_id}",
+    )
+
+    return transfers
+
+
+def execute_transfers(load_settlement: LoadSettlement, transfers: List[PlannedTransfer]):
+    """Make the transfers at the same time and record the payments of the transfers made in a single insert.
+
+    A failed transfer does not undo the others, their payments are recorded so the next run skips them.
+
+    Returns:
+        tuple: the payments recorded and the transfers that failed
+    """
+    if not transfers:
+        return [], []
+
+    def create_transfer(transfer):
+        return stripe_client.create_transfer(
+            transfer.amount_in_cents, transfer.destination, transfer.description, transfer.idempotency_key
+        )
+
+    # the transfers do not depend on each other
+    with ThreadPoolExecutor(max_workers=len(transfers)) as executor:
+        futures = [executor.submit(create_transfer, transfer) for transfer in transfers]
+
+    made, failed = [], []
+    for transfer, future in zip(transfers, futures):
+        try:
+            made.append((transfer, future.result()))
+        except Exception as e:
+            logger.error(f"Transfer {transfer.idempotency_key} failed.  Full message: {repr(e)}")
+            failed.append(transfer)
+
+    payments = Payment.objects.bulk_create(
+        [
+            Payment(
+                payment_type=transfer.payment_type,
+                amount_in_cents=transfer.amount_in_cents,
+                load_settlement=load_settlement,
+                stripe_ref_id=stripe_transfer["id"],
+            )
+            for transfer, stripe_transfer in made
+        ]
+    )
+    return payments, failed
+
+
+def settle_invoice(invoice: Invoice):
+    """Make the transfers of the paid invoice that are not recorded yet and complete the load once all are made.
+
+    Returns:
+        tuple: the payments recorded and the transfers that failed
+    """
+    payments, failed = execute_transfers(invoice.load_settlement, plan_broker_payment_transfers(invoice))
+
+    for payment in payments:
+        if payment.payment_type == Payment.PaymentType.LOAN_REPAYMENT:
+            # send oatfi the repayment in order to get the loan closed out
+            enqueue(
+                "oatfi.record_loan_repayment",
+                {
+                    "loan_id": invoice.loan.id,
+                    "transfer_id": payment.stripe_ref_id,
+                    "amount_in_cents": payment.amount_in_cents,
+                },
+            )
 
     # as a final step, mark the load as COMPLETED
-    invoice.load_settlement.load.current_status = Load.Status.COMPLETED
-    invoice.load_settlement.load.save()
+    if not failed:
+        invoice.load_settlement.load.current_status = Load.Status.COMPLETED
+        invoice.load_settlement.load.save()
+
+    return payments, failed
+
+
+def process_broker_payment(invoice: Invoice, broker_payment: Payment):
+    """Distribute the payment from the broker to loan provider and carrier while taking agreed fees"""
+    from nauvus.apps.payments.tasks import retry_invoice_settlement
+
+    # mark the invoice as paid
+    invoice.amount_paid_in_cents = broker_payment.amount_in_cents
+    invoice.paid_date = broker_payment.created_at
+    invoice.status = "paid"
+
+    invoice.save()
+
+    enqueue("oatfi.update_invoice", {"invoice_id": invoice.id})
+
+    payments, failed = settle_invoice(invoice)
+    if failed:
+        # the transfers made are kept with the payment, the failed ones are made again by the worker
+        transaction.on_commit(lambda: retry_invoice_settlement.delay(invoice.id))
+
+    return payments
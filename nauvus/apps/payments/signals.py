@@ -0,0 +1,31 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from nauvus.apps.payments.ledger import post_invoice_entries
+from nauvus.apps.payments.models import Invoice, LoadSettlement, Loan
+
+INVOICE_LEDGER_FIELDS = {"amount_due_in_cents", "carrier_user", "load_settlement", "status"}
+LOAN_LEDGER_FIELDS = {"principal_amount_in_cents", "fee_amount_in_cents", "invoice"}
+LOAD_SETTLEMENT_LEDGER_FIELDS = {"nauvus_fees_in_cents"}
+
+
+@receiver(post_save, sender=Invoice)
+def invoice_ledger_post_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not INVOICE_LEDGER_FIELDS.intersection(update_fields):
+        return
+    post_invoice_entries(instance.pk)
+
+
+@receiver(post_save, sender=Loan)
+def loan_ledger_post_save(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not LOAN_LEDGER_FIELDS.intersection(update_fields):
+        return
+    post_invoice_entries(instance.invoice_id)
+
+
+@receiver(post_save, sender=LoadSettlement)
+def load_settlement_ledger_post_save(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not LOAD_SETTLEMENT_LEDGER_FIELDS.intersection(update_fields)):
+        return
+    for invoice_id in Invoice.objects.filter(load_settlement=instance).values_list("pk", flat=True):
+        post_invoice_entries(invoice_id)
@@ -0,0 +1,137 @@
+import logging
+from datetime import timedelta
+
+from celery import chain, shared_task
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from nauvus.apps.loads.models import Load
+from nauvus.apps.payments.models import Invoice
+from nauvus.apps.payments.services import refresh_instant_pay_offer, settle_invoice
+from nauvus.services.credit.oatfi.api import Oatfi
+from nauvus.services.stripe import StripeClient
+
+logger = logging.getLogger(__name__)
+
+INVOICE_STAGE_MAX_RETRIES = 5
+# seconds before the first retry of a stage, doubled on every retry
+INVOICE_STAGE_RETRY_DELAY = 30
+
+# age of the instant payment offer snapshot after which it is refreshed
+INSTANT_PAY_REFRESH_INTERVAL = timedelta(hours=1)
+
+PROCESSING_ORDER = [status for status, _ in Invoice.ProcessingStatus.choices]
+
+
+def start_invoice_processing(invoice_id):
+    """Run the stages of the delivery settlement of the invoice that did not complete yet, one after the other."""
+    invoice_id = str(invoice_id)
+    return chain(
+        create_invoice_payment_link.si(invoice_id),
+        sync_invoice_with_oatfi.si(invoice_id),
+        update_instant_pay_offer.si(invoice_id),
+        send_invoice.si(invoice_id),
+    ).delay()
+
+
+def run_invoice_stage(task, invoice_id, completed_status, stage):
+    """Run a stage of the invoice unless it already completed, retrying it with a backoff when it fails."""
+    invoice = Invoice.objects.select_related("broker", "carrier_user__carrier", "load_settlement__load").get(
+        pk=invoice_id
+    )
+    if PROCESSING_ORDER.index(invoice.processing_status or Invoice.ProcessingStatus.PENDING) >= PROCESSING_ORDER.index(
+        completed_status
+    ):
+        return
+
+    try:
+        stage(invoice)
+    except Exception as e:
+        if task.request.retries >= task.max_retries:
+            logger.error(f"Stage {task.name} of invoice {invoice_id} failed.  Full message: {repr(e)}")
+            Invoice.objects.filter(pk=invoice_id).update(processing_error=f"{task.name}: {repr(e)}")
+            raise
+        raise task.retry(exc=e, countdown=INVOICE_STAGE_RETRY_DELAY * 2**task.request.retries)
+
+    Invoice.objects.filter(pk=invoice_id).update(processing_status=completed_status, processing_error="")
+
+
+def create_payment_link(invoice):
+    stripe_payment_link = StripeClient().get_payment_link(invoice.amount_due_in_cents, invoice.load_settlement.load_id)
+    if not stripe_payment_link:
+        raise Exception(f"Unable to create the payment link of invoice {invoice.id}")
+
+    invoice.stripe_payment_link = stripe_payment_link.get("url")
+    invoice.stripe_payment_id = stripe_payment_link.get("id")
+    invoice.save(update_fields=["stripe_payment_link", "stripe_payment_id", "updated_at"])
+
+
+@shared_task(bind=True, max_retries=INVOICE_STAGE_MAX_RETRIES)
+def create_invoice_payment_link(self, invoice_id):
+    run_invoice_stage(self, invoice_id, Invoice.ProcessingStatus.PAYMENT_LINK_CREATED, create_payment_link)
+
+
+@shared_task(bind=True, max_retries=INVOICE_STAGE_MAX_RETRIES)
+def sync_invoice_with_oatfi(self, invoice_id):
+    run_invoice_stage(
+        self, invoice_id, Invoice.ProcessingStatus.OATFI_SYNCED, lambda invoice: Oatfi().send_invoice_history([invoice])
+    )
+
+
+@shared_task(bind=True, max_retries=INVOICE_STAGE_MAX_RETRIES)
+def send_invoice(self, invoice_id):
+    run_invoice_stage(self, invoice_id, Invoice.ProcessingStatus.SENT, lambda invoice: invoice.send())
+
+
+@shared_task
+def update_instant_pay_offer(invoice_id):
+    """Store the instant payment offer of the invoice, which needs the invoice at Oatfi."""
+    invoice = Invoice.objects.select_related("broker", "carrier_user__carrier", "load_settlement__load").get(
+        pk=invoice_id
+    )
+    try:
+        refresh_instant_pay_offer(invoice)
+    except Exception as e:
+        # the offer is refreshed on schedule, do not hold the invoice back
+        logger.warning(f"Unable to refresh the instant payment offer of invoice {invoice_id}.  Full message: {repr(e)}")
+
+
+@shared_task
+def refresh_instant_pay_offers():
+    """Refresh the stale instant payment offers of the delivered loads whose terms are not accepted yet."""
+    stale = timezone.now() - INSTANT_PAY_REFRESH_INTERVAL
+    invoice_ids = (
+        Invoice.objects.filter(
+            processing_status__in=[Invoice.ProcessingStatus.OATFI_SYNCED, Invoice.ProcessingStatus.SENT],
+            load_settlement__terms_accepted=False,
+            load_settlement__load__current_status=Load.Status.DELIVERED,
+        )
+        .filter(
+            Q(load_settlement__instant_pay_refreshed_at__isnull=True)
+            | Q(load_settlement__instant_pay_refreshed_at__lt=stale)
+        )
+        .values_list("id", flat=True)
+    )
+    for invoice_id in invoice_ids:
+        update_instant_pay_offer.delay(invoice_id)
+
+
+@shared_task(bind=True, max_retries=INVOICE_STAGE_MAX_RETRIES)
+def retry_invoice_settlement(self, invoice_id):
+    """Make the transfers of the paid invoice that failed, the recorded ones are not made again."""
+    with transaction.atomic():
+        # the lock keeps two runs from planning the same transfers
+        invoice = (
+            Invoice.objects.select_for_update(of=("self",))
+            .select_related("carrier_user__user", "load_settlement__load")
+            .get(pk=invoice_id)
+        )
+        _, failed = settle_invoice(invoice)
+
+    if failed:
+        if self.request.retries >= self.max_retries:
+            logger.error(f"Unable to settle invoice {invoice_id}, {len(failed)} transfers failed.")
+            Invoice.objects.filter(pk=invoice_id).update(processing_error=f"{len(failed)} settlement transfers failed")
+            return
+        raise self.retry(countdown=INVOICE_STAGE_RETRY_DELAY * 2**self.request.retries)
@@ -0,0 +1,111 @@
+import pytest
+from django.db import transaction
+
+from nauvus.apps.loads.models import Load
+from nauvus.apps.outbox.models import OutboxMessage
+from nauvus.apps.payments import services, tasks
+from nauvus.apps.payments.models import Invoice, LoadSettlement, Loan, Payment
+
+
+@pytest.fixture
+def loan_invoice(load, carrier_user):
+    settlement = LoadSettlement.objects.create(load=load, nauvus_fees_in_cents=300)
+    invoice = Invoice.objects.create(
+        amount_due_in_cents=10000, description="Delivery", load_settlement=settlement, carrier_user=carrier_user
+    )
+    Loan.objects.create(
+        current_status=Loan.Status.OUTSTANDING,
+        terms="terms",
+        principal_amount_in_cents=8000,
+        fee_amount_in_cents=200,
+        invoice=invoice,
+    )
+    return invoice
+
+
+@pytest.fixture
+def transfers(monkeypatch):
+    created = []
+    failing = set()
+
+    def create_transfer(amount_in_cents, destination_account, description="", idempotency_key=None):
+        if idempotency_key in failing:
+            raise ConnectionError("Stripe is down")
+        created.append((idempotency_key, amount_in_cents))
+        return {"id": f"tr_{idempotency_key}"}
+
+    monkeypatch.setattr(services.stripe_client, "create_transfer", create_transfer)
+    return created, failing
+
+
+def create_broker_payment(invoice):
+    return Payment.objects.create(
+        payment_type=Payment.PaymentType.FROM_BROKER,
+        amount_in_cents=invoice.amount_due_in_cents,
+        load_settlement=invoice.load_settlement,
+        stripe_ref_id="pi_test",
+    )
+
+
+@pytest.mark.django_db
+def test_the_broker_payment_is_distributed_in_planned_transfers(loan_invoice, transfers):
+    created, _ = transfers
+
+    payments = services.process_broker_payment(loan_invoice, create_broker_payment(loan_invoice))
+
+    assert sorted(created) == sorted(
+        [
+            (f"invoice-{loan_invoice.uid}-loan_repayment", 8200),
+            (f"invoice-{loan_invoice.uid}-fee", 300),
+            (f"invoice-{loan_invoice.uid}-to_carrier", 1500),
+        ]
+    )
+    assert {payment.payment_type: payment.amount_in_cents for payment in payments} == {
+        Payment.PaymentType.LOAN_REPAYMENT: 8200,
+        Payment.PaymentType.FEE: 300,
+        Payment.PaymentType.TO_CARRIER: 1500,
+    }
+    assert OutboxMessage.objects.filter(action="oatfi.record_loan_repayment").count() == 1
+
+
+@pytest.mark.django_db
+def test_a_failed_transfer_is_made_again_without_repeating_the_others(loan_invoice, transfers):
+    created, failing = transfers
+    failing.add(f"invoice-{loan_invoice.uid}-to_carrier")
+
+    payments = services.process_broker_payment(loan_invoice, create_broker_payment(loan_invoice))
+
+    # the transfers made are recorded even though the carrier transfer failed
+    assert {payment.payment_type for payment in payments} == {
+        Payment.PaymentType.LOAN_REPAYMENT,
+        Payment.PaymentType.FEE,
+    }
+    assert Load.objects.get(pk=loan_invoice.load_settlement.load_id).current_status != Load.Status.COMPLETED
+
+    failing.clear()
+    tasks.retry_invoice_settlement.apply(args=[loan_invoice.id])
+
+    # only the failed transfer is made again, the others are planned against the recorded payments
+    assert sorted(created) == sorted(
+        [
+            (f"invoice-{loan_invoice.uid}-loan_repayment", 8200),
+            (f"invoice-{loan_invoice.uid}-fee", 300),
+            (f"invoice-{loan_invoice.uid}-to_carrier", 1500),
+        ]
+    )
+    assert Payment.objects.exclude(payment_type=Payment.PaymentType.FROM_BROKER).count() == 3
+    assert OutboxMessage.objects.filter(action="oatfi.record_loan_repayment").count() == 1
+    assert Load.objects.get(pk=loan_invoice.load_settlement.load_id).current_status == Load.Status.COMPLETED
+
+
+@pytest.mark.django_db
+def test_a_settlement_exceeding_the_invoice_makes_no_transfer(loan_invoice, transfers):
+    created, _ = transfers
+    Invoice.objects.filter(pk=loan_invoice.pk).update(amount_due_in_cents=8000)
+    loan_invoice.refresh_from_db()
+
+    with pytest.raises(services.SettlementError), transaction.atomic():
+        services.process_broker_payment(loan_invoice, create_broker_payment(loan_invoice))
+
+    assert created == []
+    assert not Payment.objects.exclude(payment_type=Payment.PaymentType.FROM_BROKER).exists()
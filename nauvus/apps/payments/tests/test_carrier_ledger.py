@@ -0,0 +1,51 @@
+import pytest
+
+from nauvus.apps.payments.ledger import get_ledger_discrepancies, rebuild_carrier_ledger
+from nauvus.apps.payments.models import CarrierBalance, CarrierLedgerEntry, Invoice, LoadSettlement, Loan
+from nauvus.apps.payments.services import get_unpaid_invoices_balance_in_cents
+
+
+@pytest.fixture
+def carrier_invoice(load, carrier_user):
+    settlement = LoadSettlement.objects.create(load=load, nauvus_fees_in_cents=100)
+    return Invoice.objects.create(
+        amount_due_in_cents=10000, description="Delivery", load_settlement=settlement, carrier_user=carrier_user
+    )
+
+
+@pytest.mark.django_db
+def test_the_balance_follows_the_invoice_and_its_loan(carrier_invoice, carrier_user):
+    assert get_unpaid_invoices_balance_in_cents(carrier_user) == 9900
+
+    Loan.objects.create(
+        current_status=Loan.Status.OUTSTANDING,
+        terms="terms",
+        principal_amount_in_cents=8000,
+        fee_amount_in_cents=200,
+        invoice=carrier_invoice,
+    )
+    assert get_unpaid_invoices_balance_in_cents(carrier_user) == 1700
+
+    # saving an invoice that did not change posts nothing
+    carrier_invoice.save()
+    assert CarrierLedgerEntry.objects.filter(invoice=carrier_invoice).count() == 4
+
+    carrier_invoice.status = "paid"
+    carrier_invoice.save()
+    assert get_unpaid_invoices_balance_in_cents(carrier_user) == 0
+    assert CarrierLedgerEntry.objects.get(entry_type=CarrierLedgerEntry.EntryType.SETTLEMENT).amount_in_cents == -1700
+
+    assert not get_ledger_discrepancies().exists()
+
+
+@pytest.mark.django_db
+def test_the_rebuild_repairs_the_balance(carrier_invoice, carrier_user):
+    CarrierBalance.objects.filter(carrier_user=carrier_user).update(pending_balance_in_cents=0)
+    CarrierLedgerEntry.objects.filter(entry_type=CarrierLedgerEntry.EntryType.NAUVUS_FEE).delete()
+
+    discrepancy = get_ledger_discrepancies().get()
+    assert (discrepancy.pending_balance, discrepancy.ledger_balance, discrepancy.expected_balance) == (0, 10000, 9900)
+
+    assert rebuild_carrier_ledger() == 1
+    assert get_unpaid_invoices_balance_in_cents(carrier_user) == 9900
+    assert not get_ledger_discrepancies().exists()
@@ -0,0 +1,71 @@
+import pytest
+from django.utils import timezone
+
+from nauvus.apps.loads.models import Load
+from nauvus.apps.payments import services, tasks
+from nauvus.apps.payments.models import Invoice, LoadSettlement, Loan
+
+
+@pytest.fixture
+def synced_invoice(load):
+    load.current_status = Load.Status.DELIVERED
+    load.save()
+    settlement = LoadSettlement.objects.create(load=load, nauvus_fees_in_cents=100)
+    return Invoice.objects.create(
+        amount_due_in_cents=10000,
+        description="Delivery",
+        load_settlement=settlement,
+        processing_status=Invoice.ProcessingStatus.SENT,
+    )
+
+
+@pytest.fixture
+def loan_offers(monkeypatch):
+    offers = []
+
+    def get_loan_offer(invoice):
+        offers.append(invoice.id)
+        return Loan(principal_amount_in_cents=8000, fee_amount_in_cents=200, terms="https://terms")
+
+    monkeypatch.setattr(services.oatfi, "get_loan_offer", get_loan_offer)
+    return offers
+
+
+@pytest.mark.django_db
+def test_the_offer_is_stored_until_the_terms_are_accepted(synced_invoice, loan_offers):
+    tasks.update_instant_pay_offer.apply(args=[synced_invoice.id])
+
+    settlement = LoadSettlement.objects.get(pk=synced_invoice.load_settlement_id)
+    assert settlement.instant_pay_eligible
+    assert settlement.instant_pay_principal_in_cents == 8000
+    assert settlement.instant_pay_fee_in_cents == 200
+    assert settlement.instant_pay_terms == "https://terms"
+    assert settlement.instant_pay_refreshed_at is not None
+    # no loan is created until the carrier takes the offer
+    assert not Loan.objects.exists()
+
+    LoadSettlement.objects.filter(pk=settlement.pk).update(terms_accepted=True)
+    tasks.update_instant_pay_offer.apply(args=[synced_invoice.id])
+
+    assert loan_offers == [synced_invoice.id]
+
+
+@pytest.mark.django_db
+def test_only_the_stale_offers_are_refreshed(synced_invoice, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(tasks.update_instant_pay_offer, "delay", refreshed.append)
+
+    tasks.refresh_instant_pay_offers.apply()
+    assert refreshed == [synced_invoice.id]
+
+    LoadSettlement.objects.filter(pk=synced_invoice.load_settlement_id).update(
+        instant_pay_refreshed_at=timezone.now()
+    )
+    tasks.refresh_instant_pay_offers.apply()
+    assert refreshed == [synced_invoice.id]
+
+    LoadSettlement.objects.filter(pk=synced_invoice.load_settlement_id).update(
+        instant_pay_refreshed_at=timezone.now() - tasks.INSTANT_PAY_REFRESH_INTERVAL, terms_accepted=True
+    )
+    tasks.refresh_instant_pay_offers.apply()
+    assert refreshed == [synced_invoice.id]
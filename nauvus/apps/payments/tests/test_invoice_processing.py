@@ -0,0 +1,49 @@
+import pytest
+
+from nauvus.apps.payments import tasks
+from nauvus.apps.payments.models import Invoice, LoadSettlement
+
+
+@pytest.fixture
+def pending_invoice(load):
+    settlement = LoadSettlement.objects.create(load=load, nauvus_fees_in_cents=100)
+    return Invoice.objects.create(amount_due_in_cents=10000, description="Delivery", load_settlement=settlement)
+
+
+@pytest.mark.django_db
+def test_completed_stage_is_not_run_again(pending_invoice, monkeypatch):
+    payment_links = []
+
+    def get_payment_link(price, load_id):
+        payment_links.append(price)
+        return {"url": "https://buy.stripe.com/test", "id": "plink_test"}
+
+    monkeypatch.setattr(tasks.StripeClient, "get_payment_link", staticmethod(get_payment_link))
+
+    tasks.create_invoice_payment_link.apply(args=[pending_invoice.id])
+    tasks.create_invoice_payment_link.apply(args=[pending_invoice.id])
+
+    pending_invoice.refresh_from_db()
+    assert pending_invoice.processing_status == Invoice.ProcessingStatus.PAYMENT_LINK_CREATED
+    assert pending_invoice.stripe_payment_link == "https://buy.stripe.com/test"
+    assert pending_invoice.stripe_payment_id == "plink_test"
+    assert payment_links == [10000]
+
+
+@pytest.mark.django_db
+def test_stage_out_of_retries_records_the_error(pending_invoice, monkeypatch):
+    attempts = []
+
+    def get_payment_link(price, load_id):
+        attempts.append(price)
+        return None
+
+    monkeypatch.setattr(tasks.StripeClient, "get_payment_link", staticmethod(get_payment_link))
+
+    result = tasks.create_invoice_payment_link.apply(args=[pending_invoice.id])
+
+    pending_invoice.refresh_from_db()
+    assert result.failed()
+    assert len(attempts) == tasks.INVOICE_STAGE_MAX_RETRIES + 1
+    assert pending_invoice.processing_status == Invoice.ProcessingStatus.PENDING
+    assert pending_invoice.processing_error.startswith(tasks.create_invoice_payment_link.name)
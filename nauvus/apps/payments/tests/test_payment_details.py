@@ -1,9 +1,14 @@
 import datetime
+from unittest import mock
 
 import pytest
+from django.utils import timezone
 from rest_framework.test import APITestCase
 
 from nauvus.apps.loads.models import Load
+from nauvus.apps.payments import services
+from nauvus.apps.payments.api import views
+from nauvus.apps.payments.models import LoadSettlement, Loan
 
 
 @pytest.mark.usefixtures("load_for_testclass", "carrier_user_for_testclass")
@@ -68,6 +73,65 @@ class TestPaymentDetails(APITestCase):
         self.assertEqual(result.status_code, 200)
         self.assertIn("payment_id", result.data)
 
+    @pytest.mark.django_db
+    def test_accept_refreshes_a_stale_instant_pay_offer(self):
+        stale = timezone.now() - services.INSTANT_PAY_OFFER_MAX_AGE - datetime.timedelta(minutes=1)
+        LoadSettlement.objects.filter(pk=self.load_settlement.pk).update(
+            instant_pay_eligible=True,
+            instant_pay_principal_in_cents=8000,
+            instant_pay_fee_in_cents=200,
+            instant_pay_refreshed_at=stale,
+        )
+
+        url = f"{self.payment_url_base}/{self.load.id}/accept/"
+        payload = {
+            "instant": "true",
+            "terms_accepted": "true",
+            "terms_accepted_timestamp": datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        # the offer was withdrawn since the snapshot was taken
+        with mock.patch.object(services.oatfi, "get_loan_offer", return_value=None) as get_loan_offer:
+            result = self.client.post(url, data=payload, format="json")
+
+        self.assertEqual(result.status_code, 400)
+        get_loan_offer.assert_called_once()
+        self.assertFalse(Loan.objects.exists())
+        self.assertFalse(LoadSettlement.objects.get(pk=self.load_settlement.pk).instant_pay_eligible)
+
+    @pytest.mark.django_db
+    def test_accept_reuses_the_loan_offered_for_the_invoice(self):
+        Loan.objects.create(
+            current_status=Loan.Status.OFFERED,
+            invoice=self.invoice,
+            principal_amount_in_cents=5000,
+            fee_amount_in_cents=100,
+            terms="old terms",
+        )
+        LoadSettlement.objects.filter(pk=self.load_settlement.pk).update(
+            instant_pay_eligible=True,
+            instant_pay_principal_in_cents=8000,
+            instant_pay_fee_in_cents=200,
+            instant_pay_terms="terms",
+            instant_pay_refreshed_at=timezone.now(),
+        )
+
+        url = f"{self.payment_url_base}/{self.load.id}/accept/"
+        payload = {
+            "instant": "true",
+            "terms_accepted": "true",
+            "terms_accepted_timestamp": datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        with mock.patch.object(views.oatfi, "accept_loan", return_value=mock.Mock(uid="payment")):
+            result = self.client.post(url, data=payload, format="json")
+
+        self.assertEqual(result.status_code, 200)
+        loan = Loan.objects.get(invoice=self.invoice)
+        self.assertEqual(loan.principal_amount_in_cents, 8000)
+        self.assertEqual(loan.terms, "terms")
+        self.assertTrue(loan.terms_accepted)
+
     @pytest.mark.django_db
     def test_get_payment_details_delayed(self):
 
@@ -1,3 +1,20 @@
 from django.contrib import admin
 
-# Register your models here.
+from nauvus.apps.webhooks.models import StripeEvent
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+
+    list_display = [
+        "id",
+        "stripe_event_id",
+        "event_type",
+        "load_id",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "processed_at",
+    ]
+    list_filter = ["event_type", "status"]
+    search_fields = ["stripe_event_id"]
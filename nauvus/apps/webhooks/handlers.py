@@ -2,7 +2,7 @@ import logging
 from abc import abstractmethod
 from typing import final
 
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
 
 from nauvus.apps.loads.models import Load
 from nauvus.apps.payments.models import Payment
@@ -27,17 +27,17 @@ class StripeEventHandler:
 
     @final
     def handle(self):
-        try:
-            ProcessedStripeEvent.objects.get(pk=self.event_id)
-            # if the event has already been processed than return and do nothing
-            logger.debug(f"Previously processed Stripe event with id {self.event_id}.  Doing nothing.")
-            return
-        except ObjectDoesNotExist:
-            pass
-        logger.debug(f"Received stripe event with id {self.event_id}.  ")
-        self.handle_event()
-        # once processing the event is complete, store it in the database so that it will not be re-run
-        ProcessedStripeEvent.objects.create(stripe_event_id=self.event_id)
+        with transaction.atomic():
+            try:
+                # the primary key lets a single worker record the event, the record is rolled back if handling fails
+                with transaction.atomic():
+                    ProcessedStripeEvent.objects.create(stripe_event_id=self.event_id)
+            except IntegrityError:
+                # if the event has already been processed than return and do nothing
+                logger.debug(f"Previously processed Stripe event with id {self.event_id}.  Doing nothing.")
+                return
+            logger.debug(f"Received stripe event with id {self.event_id}.  ")
+            self.handle_event()
 
 
 class CheckoutSessionCompletedEventHandler(StripeEventHandler):
@@ -78,3 +78,16 @@ class CheckoutSessionPaymentSucceededEventHandler(StripeEventHandler):
         )
 
         process_broker_payment(invoice, payment)
+
+
+event_handlers = {
+    StripeClient.EventTypes.CHECKOUT_SESSION_COMPLETED: CheckoutSessionCompletedEventHandler,
+    StripeClient.EventTypes.CHECKOUT_SESSION_ASYNC_PAYMENT_SUCCEEDED: CheckoutSessionPaymentSucceededEventHandler,
+}
+
+
+def get_event_handler(event):
+    handler = event_handlers.get(event["type"])
+    if handler:
+        return handler(event)
+    return None
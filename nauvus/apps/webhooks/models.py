@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils.translation import gettext_lazy as _
 
 from nauvus.base.models import BaseModel
 
@@ -7,3 +8,33 @@ class ProcessedStripeEvent(BaseModel):
     """Log for tracking events from stripe that have been processed already."""
 
     stripe_event_id = models.CharField(max_length=50, primary_key=True)
+
+
+class StripeEvent(BaseModel):
+    """An event received from Stripe, saved as it was sent before it is handled by the webhook worker."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("PENDING")
+        PROCESSED = "processed", _("PROCESSED")
+        FAILED = "failed", _("FAILED")
+
+    stripe_event_id = models.CharField(max_length=50, unique=True)
+    event_type = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    # the events of a load are handled one at a time, in the order they were received
+    load_id = models.UUIDField(null=True, blank=True)
+    status = models.CharField(max_length=20, default=Status.PENDING, choices=Status.choices)
+    attempts = models.PositiveIntegerField(default=0)
+    # the event is not handled before this time, set while it waits for the retry of a failed event
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(default="", blank=True)
+
+    class Meta:
+        db_table = "stripe_events"
+        indexes = [
+            models.Index(fields=["status", "load_id"], name="stripe_event_status_load_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.stripe_event_id} ({self.status})"
@@ -0,0 +1,110 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from nauvus.apps.loads.models import Load
+from nauvus.apps.webhooks.handlers import event_handlers, get_event_handler
+from nauvus.apps.webhooks.models import StripeEvent
+
+logger = logging.getLogger(__name__)
+
+STRIPE_EVENT_MAX_RETRIES = 5
+# seconds before the first retry of an event, doubled on every retry
+STRIPE_EVENT_RETRY_DELAY = 30
+
+
+class StripeEventError(Exception):
+    pass
+
+
+def get_event_load_id(event):
+    metadata = event["data"]["object"].get("metadata") or {}
+    return metadata.get("load_id")
+
+
+def record_stripe_event(event):
+    """Save the event so it is handled by the webhook worker once the request commits.
+
+    Returns:
+        StripeEvent: the saved event, or None if the type of the event is not handled
+    """
+    if event["type"] not in event_handlers:
+        return None
+
+    # Stripe sends an event again until it is acknowledged, the copies are dropped
+    stripe_event, created = StripeEvent.objects.get_or_create(
+        stripe_event_id=event["id"],
+        defaults={"event_type": event["type"], "payload": event, "load_id": get_event_load_id(event)},
+    )
+    if created:
+        from nauvus.apps.webhooks.tasks import process_stripe_event
+
+        transaction.on_commit(lambda: process_stripe_event.delay(stripe_event.id))
+    return stripe_event
+
+
+def record_failure(event, error):
+    """Count the failed attempt of the event and schedule its retry, or give it up after the last retry."""
+    event.attempts += 1
+    event.last_error = repr(error)
+    if event.attempts > STRIPE_EVENT_MAX_RETRIES:
+        logger.error(f"Stripe event {event.stripe_event_id} could not be processed.  Full message: {repr(error)}")
+        event.status = StripeEvent.Status.FAILED
+        event.next_attempt_at = None
+    else:
+        retry_delay = timedelta(seconds=STRIPE_EVENT_RETRY_DELAY * 2 ** (event.attempts - 1))
+        event.next_attempt_at = timezone.now() + retry_delay
+    event.save(update_fields=["attempts", "last_error", "status", "next_attempt_at", "updated_at"])
+
+
+def process_stripe_events(stripe_event_id):
+    """Handle the event and the pending events of its load received before it, in the order they were received.
+
+    Each event is handled in its own savepoint. A failure is recorded on the event that raised and the later
+    events wait for its retry, unless it was given up.
+
+    Returns:
+        StripeEvent: the pending event the remaining events wait for, or None when they were all handled
+    """
+    stripe_event = StripeEvent.objects.get(pk=stripe_event_id)
+
+    with transaction.atomic():
+        if stripe_event.load_id is None:
+            events = StripeEvent.objects.filter(pk=stripe_event.pk)
+        else:
+            # the lock on the load keeps the workers from handling the events of the load at the same time
+            list(Load.objects.select_for_update().filter(pk=stripe_event.load_id))
+            events = StripeEvent.objects.filter(load_id=stripe_event.load_id, id__lte=stripe_event.id)
+
+        now = timezone.now()
+        for event in events.filter(status=StripeEvent.Status.PENDING).order_by("id"):
+            # an earlier event waiting for its retry is left to its own worker
+            if event.pk != stripe_event.pk and event.next_attempt_at and event.next_attempt_at > now:
+                return event
+
+            try:
+                with transaction.atomic():
+                    get_event_handler(event.payload).handle()
+            except Exception as e:
+                record_failure(event, e)
+                if event.pk == stripe_event.pk or event.status == StripeEvent.Status.PENDING:
+                    return event
+                continue
+
+            event.status = StripeEvent.Status.PROCESSED
+            event.processed_at = timezone.now()
+            event.next_attempt_at = None
+            event.save(update_fields=["status", "processed_at", "next_attempt_at", "updated_at"])
+
+    return None
+
+
+def get_lost_stripe_events(dispatch_delay):
+    """Return the pending events whose processing was not started, or whose retry is late, after the delay."""
+    lost_before = timezone.now() - dispatch_delay
+    return StripeEvent.objects.filter(status=StripeEvent.Status.PENDING).filter(
+        Q(next_attempt_at__isnull=True, created_at__lt=lost_before) | Q(next_attempt_at__lt=lost_before)
+    )
@@ -0,0 +1,42 @@
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from django.utils import timezone
+
+from nauvus.apps.webhooks.models import StripeEvent
+from nauvus.apps.webhooks.services import StripeEventError, get_lost_stripe_events, process_stripe_events
+
+logger = logging.getLogger(__name__)
+
+# time after which a pending event, or the retry of a failed one, is assumed lost
+STRIPE_EVENT_DISPATCH_DELAY = timedelta(minutes=5)
+
+
+@shared_task(bind=True)
+def process_stripe_event(self, stripe_event_id):
+    """Process the event, retrying it when it or an earlier event of its load is due again.
+
+    The attempts are counted on the events by process_stripe_events, the retries of the task are not limited.
+    """
+    pending_event = process_stripe_events(stripe_event_id)
+    if pending_event is None:
+        return
+
+    if pending_event.status == StripeEvent.Status.FAILED:
+        raise StripeEventError(f"Stripe event {pending_event.stripe_event_id} failed: {pending_event.last_error}")
+
+    # the event is not dispatched again by process_pending_stripe_events while it waits for the retry
+    StripeEvent.objects.filter(pk=stripe_event_id, status=StripeEvent.Status.PENDING).update(
+        next_attempt_at=pending_event.next_attempt_at
+    )
+    countdown = max((pending_event.next_attempt_at - timezone.now()).total_seconds(), 0)
+    raise self.retry(countdown=countdown, max_retries=None)
+
+
+@shared_task
+def process_pending_stripe_events():
+    """Process the events whose processing or retry was lost, the handled events are skipped."""
+    stripe_event_ids = get_lost_stripe_events(STRIPE_EVENT_DISPATCH_DELAY).values_list("id", flat=True)
+    for stripe_event_id in stripe_event_ids:
+        process_stripe_event.delay(stripe_event_id)
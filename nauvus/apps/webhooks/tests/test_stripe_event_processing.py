@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from nauvus.apps.webhooks import handlers, services, tasks
+from nauvus.apps.webhooks.handlers import StripeEventHandler
+from nauvus.apps.webhooks.models import ProcessedStripeEvent, StripeEvent
+
+
+@pytest.fixture
+def handled_events(monkeypatch):
+    handled = []
+
+    class RecordingEventHandler(StripeEventHandler):
+        def handle_event(self):
+            if self.object.get("fail"):
+                raise ConnectionError("Stripe is down")
+            handled.append(self.event_id)
+
+    monkeypatch.setitem(handlers.event_handlers, "test.event", RecordingEventHandler)
+    return handled
+
+
+def create_event(event_id, load_id=None, **data):
+    return {"id": event_id, "type": "test.event", "data": {"object": {"metadata": {"load_id": load_id}, **data}}}
+
+
+@pytest.mark.django_db
+def test_the_events_of_a_load_are_handled_in_order_once(handled_events, load):
+    for event_id in ["evt_1", "evt_2", "evt_3"]:
+        services.record_stripe_event(create_event(event_id, str(load.id)))
+    # the copy of an event sent again by Stripe is dropped
+    services.record_stripe_event(create_event("evt_1", str(load.id)))
+    assert StripeEvent.objects.count() == 3
+
+    services.process_stripe_events(StripeEvent.objects.get(stripe_event_id="evt_2").id)
+    assert handled_events == ["evt_1", "evt_2"]
+
+    services.process_stripe_events(StripeEvent.objects.get(stripe_event_id="evt_3").id)
+    services.process_stripe_events(StripeEvent.objects.get(stripe_event_id="evt_3").id)
+    assert handled_events == ["evt_1", "evt_2", "evt_3"]
+    assert not StripeEvent.objects.filter(status=StripeEvent.Status.PENDING).exists()
+
+
+@pytest.mark.django_db
+def test_a_failed_event_is_retried_and_then_given_up(handled_events):
+    stripe_event = services.record_stripe_event(create_event("evt_fail", fail=True))
+
+    result = tasks.process_stripe_event.apply(args=[stripe_event.id])
+
+    stripe_event.refresh_from_db()
+    assert result.failed()
+    assert stripe_event.status == StripeEvent.Status.FAILED
+    assert stripe_event.attempts == services.STRIPE_EVENT_MAX_RETRIES + 1
+    assert "Stripe is down" in stripe_event.last_error
+    # the record of the event is rolled back with the failed handling
+    assert not ProcessedStripeEvent.objects.filter(pk="evt_fail").exists()
+
+
+@pytest.mark.django_db
+def test_a_failed_event_holds_back_the_later_events_of_its_load(handled_events, load):
+    failing_event = services.record_stripe_event(create_event("evt_1", str(load.id), fail=True))
+    later_event = services.record_stripe_event(create_event("evt_2", str(load.id)))
+
+    assert services.process_stripe_events(later_event.id) == failing_event
+
+    failing_event.refresh_from_db()
+    later_event.refresh_from_db()
+    assert failing_event.attempts == 1
+    assert "Stripe is down" in failing_event.last_error
+    assert failing_event.next_attempt_at > timezone.now()
+    assert later_event.attempts == 0
+    assert later_event.last_error == ""
+    assert handled_events == []
+
+    # the failed event is not attempted again before its retry is due
+    assert services.process_stripe_events(later_event.id) == failing_event
+    failing_event.refresh_from_db()
+    assert failing_event.attempts == 1
+
+    failing_event.payload["data"]["object"]["fail"] = False
+    failing_event.next_attempt_at = timezone.now()
+    failing_event.save()
+    assert services.process_stripe_events(later_event.id) is None
+    assert handled_events == ["evt_1", "evt_2"]
+
+
+@pytest.mark.django_db
+def test_only_the_lost_events_are_dispatched_again(handled_events):
+    created_at = timezone.now() - tasks.STRIPE_EVENT_DISPATCH_DELAY - timedelta(minutes=1)
+    lost_event = services.record_stripe_event(create_event("evt_lost"))
+    scheduled_event = services.record_stripe_event(create_event("evt_scheduled"))
+    late_event = services.record_stripe_event(create_event("evt_late"))
+    services.record_stripe_event(create_event("evt_new"))
+    StripeEvent.objects.exclude(stripe_event_id="evt_new").update(created_at=created_at)
+    StripeEvent.objects.filter(pk=scheduled_event.pk).update(attempts=1, next_attempt_at=timezone.now())
+    StripeEvent.objects.filter(pk=late_event.pk).update(attempts=1, next_attempt_at=created_at)
+
+    lost_events = services.get_lost_stripe_events(tasks.STRIPE_EVENT_DISPATCH_DELAY)
+
+    assert sorted(lost_events.values_list("id", flat=True)) == [lost_event.id, late_event.id]
+
+
+@pytest.mark.django_db
+def test_events_without_a_handler_are_not_saved(handled_events):
+    assert services.record_stripe_event({"id": "evt_other", "type": "customer.created", "data": {"object": {}}}) is None
+    assert not StripeEvent.objects.exists()
@@ -8,7 +8,8 @@ from rest_framework.test import APITestCase
 
 from nauvus.apps.loads.models import Load
 from nauvus.apps.payments.models import Payment
-from nauvus.apps.webhooks.models import ProcessedStripeEvent
+from nauvus.apps.webhooks.models import ProcessedStripeEvent, StripeEvent
+from nauvus.apps.webhooks.tasks import process_stripe_event
 from nauvus.services.credit.oatfi.api import Oatfi
 from nauvus.services.stripe import StripeClient
 from nauvus.utils.testing import create_stripe_checkout_session_event
@@ -82,6 +83,12 @@ class TestStripeWebhook(APITestCase):
     def tearDown(self) -> None:
         stripe.checkout.Session.expire(self.checkout_session["id"])
 
+    def process_events(self):
+        # the events are processed by the webhook worker once the request commits, which a test case never does
+        pending_events = StripeEvent.objects.filter(status=StripeEvent.Status.PENDING)
+        for stripe_event_id in pending_events.values_list("id", flat=True):
+            process_stripe_event.apply(args=[stripe_event_id])
+
     @pytest.mark.django_db
     def test_checkout_session_completed(self):
         event_time = int(time.time())
@@ -102,6 +109,7 @@ class TestStripeWebhook(APITestCase):
 
         response = self.client.post(self.url, data=event, content_type="application/json", HTTP_STRIPE_SIGNATURE=header)
         self.assertEqual(response.status_code, 200)
+        self.process_events()
 
         # invoice status should be "checkout_complete"
         self.invoice.refresh_from_db()
@@ -113,8 +121,9 @@ class TestStripeWebhook(APITestCase):
 
         response = self.client.post(self.url, data=event, content_type="application/json", HTTP_STRIPE_SIGNATURE=header)
         self.assertEqual(response.status_code, 200)
+        self.process_events()
 
-        # TODO: add a check to ensure that the event did not get processed again
+        self.assertEqual(StripeEvent.objects.filter(stripe_event_id=event_id).count(), 1)
 
     @pytest.mark.django_db
     def test_checkout_session_payment_succeeded_on_instantpay(self):
@@ -143,6 +152,7 @@ class TestStripeWebhook(APITestCase):
 
         response = self.client.post(self.url, data=event, content_type="application/json", HTTP_STRIPE_SIGNATURE=header)
         self.assertEqual(response.status_code, 200)
+        self.process_events()
 
         # check the db for the payment record
         broker_payment = Payment.objects.get(
@@ -180,6 +190,7 @@ class TestStripeWebhook(APITestCase):
 
         response = self.client.post(self.url, data=event, content_type="application/json", HTTP_STRIPE_SIGNATURE=header)
         self.assertEqual(response.status_code, 200)
+        self.process_events()
 
         # check the db for the payment record
         broker_payment = Payment.objects.get(
@@ -16,6 +16,7 @@ from nauvus.api.permissions import IsNauvusBackRoomStaff
 from nauvus.api.viewsets import BaseCreateViewSet, BaseModelViewSet
 from nauvus.apps.carrier.models import Carrier, CarrierUser
 from nauvus.apps.dispatcher.models import Dispatcher, DispatcherUser
+from nauvus.apps.outbox.services import enqueue
 from nauvus.auth.api.serializers import (
     CarrierSignUpSerializer,
     DispatcherSignUpSerializer,
@@ -34,10 +35,9 @@ from nauvus.auth.api.serializers import (
     UserInformationSerializer,
     UserSerializer,
 )
-from nauvus.auth.tasks import send_nauvus_service_agreement, send_password_reset_mail, send_welcome_mail
+from nauvus.auth.tasks import send_password_reset_mail
 from nauvus.auth.utils import create_user_account_stripe
 from nauvus.services import twilio
-from nauvus.services.credit.oatfi.api import Oatfi
 from nauvus.users.models import User
 
 # Get an instance of a logger
@@ -249,16 +249,16 @@ class RegistrationViewset(BaseCreateViewSet):
 
         user_data = UserSerializer(user).data
 
-        send_nauvus_service_agreement.delay(user.id)
-        send_welcome_mail.delay(
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
+        # delivered once the registration is committed
+        enqueue("docusign.service_agreement", {"user_id": user.id})
+        enqueue(
+            "email.welcome",
+            {"email": user.email, "first_name": user.first_name, "last_name": user.last_name},
         )
 
         carrier_user = CarrierUser.get_by_user(user)
         # send the carrier to oatfi once they have a stripe account
-        Oatfi().save_carrier(carrier_user)
+        enqueue("oatfi.save_carrier", {"carrier_user_id": carrier_user.id})
         carrier = Carrier.objects.get(id=carrier_user.carrier.id)
         organization = LoginCarrierResponseSerializer(carrier).data
 
@@ -294,11 +294,11 @@ class RegistrationViewset(BaseCreateViewSet):
 
         user_data = UserSerializer(user).data
 
-        send_nauvus_service_agreement.delay(user.id)
-        send_welcome_mail.delay(
-            email=user.email,
-            first_name=user.first_name,
-            last_name=user.last_name,
+        # delivered once the registration is committed
+        enqueue("docusign.service_agreement", {"user_id": user.id})
+        enqueue(
+            "email.welcome",
+            {"email": user.email, "first_name": user.first_name, "last_name": user.last_name},
         )
         dispatcher_user = DispatcherUser.get_by_user(user)
         dispatcher = Dispatcher.objects.get(id=dispatcher_user.dispatcher.id)
@@ -331,11 +331,11 @@ class RegistrationViewset(BaseCreateViewSet):
         # jwt token
         user_data = UserSerializer(driver.user).data
 
-        send_nauvus_service_agreement.delay(driver.user.id)
-        send_welcome_mail.delay(
-            email=driver.user.email,
-            first_name=driver.user.first_name,
-            last_name=driver.user.last_name,
+        # delivered once the registration is committed
+        enqueue("docusign.service_agreement", {"user_id": driver.user.id})
+        enqueue(
+            "email.welcome",
+            {"email": driver.user.email, "first_name": driver.user.first_name, "last_name": driver.user.last_name},
         )
 
         response = {}
@@ -2,6 +2,7 @@ import random
 import time
 
 import pytest
+from django.core.cache import cache
 
 from nauvus.apps.broker.tests.fixtures import broker, broker_for_class
 from nauvus.apps.carrier.tests.fixtures import carrier, carrier_user
@@ -33,6 +34,11 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
 @pytest.fixture
 def user(faker):
     return create_user(faker)
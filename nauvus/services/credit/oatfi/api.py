@@ -1,40 +1,108 @@
 import base64
 import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from uuid import UUID
 
 import httpx
 from django.conf import settings
+from django.core.cache import cache
 
 from nauvus.apps.broker.models import Broker
 from nauvus.apps.carrier.models import CarrierUser
 from nauvus.apps.payments.models import Invoice, Loan, Payment
-from nauvus.services.stripe import StripeClient
 
 logger = logging.getLogger("OATFI")
-stripe_client = StripeClient()
+
+# responses of requests that Oatfi did not process, safe to retry for any method
+RETRY_STATUS_CODES = {429, 503}
+# responses that may follow a processed request, only retried for the idempotent methods
+IDEMPOTENT_RETRY_STATUS_CODES = {500, 502, 504}
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+RETRY_BACKOFF_IN_SECONDS = 0.5
+MAX_RETRY_BACKOFF_IN_SECONDS = 10
+# seconds the pre-approvals and credit limits of a business are reused, unless they are invalidated first
+BUSINESS_CREDIT_CACHE_TTL = 5 * 60
+# the invoices of a carrier are looked up one at a time below this count, the whole listing is paged above it
+INVOICE_LISTING_MIN_INVOICES = 10
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the HTTP client shared by the Oatfi instances of the process, created on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                encode_client = base64.b64encode(settings.OATFI_API_KEY.encode())
+                decode_client = encode_client.decode()
+
+                # set up the header
+                headers = {
+                    "Authorization": "Basic " + str(decode_client),
+                }
+                timeout = httpx.Timeout(10.0, connect=5.0, read=30.0)
+                limits = httpx.Limits(
+                    max_connections=settings.OATFI_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OATFI_MAX_CONNECTIONS,
+                )
+                _client = httpx.Client(timeout=timeout, limits=limits, headers=headers, verify=False)
+    return _client
+
+
+def get_retry_delay(response, attempt):
+    """Return the seconds to wait before retrying, honoring the Retry-After header of rate limited responses."""
+    if response is not None:
+        try:
+            return min(float(response.headers.get("Retry-After")), MAX_RETRY_BACKOFF_IN_SECONDS)
+        except (TypeError, ValueError):
+            pass
+    backoff = min(RETRY_BACKOFF_IN_SECONDS * 2**attempt, MAX_RETRY_BACKOFF_IN_SECONDS)
+    return backoff + random.uniform(0, backoff / 2)
 
 
 class Oatfi:
-    api_key = settings.OATFI_API_KEY
     url_base = settings.OATFI_URL
     partner_id = settings.OATFI_PARTNER_ID
     factoring_product_uuid = settings.OATFI_FACTORING_PRODUCT_ID
+    max_retries = settings.OATFI_MAX_RETRIES
 
-    def __new__(cls):
-
-        encode_client = base64.b64encode(cls.api_key.encode())
-        decode_client = encode_client.decode()
+    @property
+    def client(self):
+        return get_client()
 
-        # set up the header
-        headers = {
-            "Authorization": "Basic " + str(decode_client),
-        }
-        timeout = httpx.Timeout(10.0, connect=20.0, read=None)
-        cls.client = httpx.Client(timeout=timeout, verify=False)
-        cls.client.headers.update(headers)
-        return object.__new__(cls)
+    def _request(self, method, url, **kwargs):
+        """Send a request, retrying the requests that failed before reaching Oatfi or were rate limited.
 
-    def __save_business(
+        The requests that may have been processed, e.g. a timed out POST, are only retried for idempotent methods.
+        """
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        for attempt in range(self.max_retries + 1):
+            response = None
+            try:
+                response = self.client.request(method, url, **kwargs)
+                retry = response.status_code in RETRY_STATUS_CODES or (
+                    idempotent and response.status_code in IDEMPOTENT_RETRY_STATUS_CODES
+                )
+                if not retry or attempt == self.max_retries:
+                    return response
+                logger.info(f"{method} {url} returned {response.status_code}, retrying.")
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                if attempt == self.max_retries:
+                    raise
+                logger.info(f"{method} {url} failed with {repr(e)}, retrying.")
+            except httpx.TransportError as e:
+                if not idempotent or attempt == self.max_retries:
+                    raise
+                logger.info(f"{method} {url} failed with {repr(e)}, retrying.")
+
+            time.sleep(get_retry_delay(response, attempt))
+
+    def get_business_payload(
         self,
         id,
         business_name: str,
@@ -49,8 +117,7 @@ class Oatfi:
         tax_id="000000000",
         stripe_acct_id="",
     ):
-        """Creates a new oatfi business record with the given information.  If record is present already,
-        then updates the record.
+        """Returns the Oatfi business record with the given information.
 
         Args:
             id : The id of the business within our system (e.g. the carrier uid)
@@ -58,17 +125,8 @@ class Oatfi:
             business_address : the address of the business as a JSON object
             contact_email : the email of the company contact
             mc_number : The motor carrier (MC) number for the business
-
-        Returns:
-            ``200``, if successful.  Payload returns the ``id`` of the object sent to Oatfi.
-
-            Sample payload::
-
-                {"businesses": [{"externalId": "20c64a3d-71cb-4400-8225-6d19918aa183"}]}
         """
 
-        url = f"{self.url_base}/business"
-
         # ensure that there is always some sort of email address sent to Oatfi
         contact_email = email
         if email is None or len(email) == 0:
@@ -88,20 +146,49 @@ class Oatfi:
             "taxId": tax_id,
             "paymentSettings": [{"type": "STRIPE", "data": {"account_id": stripe_acct_id}}],
         }
+        return payload
 
-        try:
-            self.get_business_information(id)
+    def save_business(self, payload):
+        """Creates a new oatfi business record from the payload.  If record is present already,
+        then updates the record.
 
-            response = self.client.put(url, json=payload)
+        Returns:
+            ``True``, if successful.  Throws an Exception otherwise.
+        """
+        try:
+            self.get_business_information(payload["externalId"])
         except Exception:
             # business wasn't found, so create a new one
-            payload = {"businesses": [payload]}
-            response = self.client.post(url, json=payload)
+            return self.create_businesses([payload])
+        self.update_business(payload)
+        # the changed record may change the pre-approval of the business
+        self.invalidate_business_credit(payload["externalId"])
+        return True
+
+    def create_businesses(self, payloads: list):
+        """Creates the oatfi business records of the payloads in a single request.
+
+        Sample payload::
+
+            {"businesses": [{"externalId": "20c64a3d-71cb-4400-8225-6d19918aa183"}]}
+        """
+        url = f"{self.url_base}/business"
+
+        response = self._request("POST", url, json={"businesses": payloads})
+
+        if int(response.status_code) >= 400:
+            raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
+
+        return True
+
+    def update_business(self, payload):
+        url = f"{self.url_base}/business"
+
+        response = self._request("PUT", url, json=payload)
 
         if int(response.status_code) >= 400:
             raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
 
-        # if no exception return True.
         return True
 
     def __get_business_id(self, business):
@@ -120,37 +207,120 @@ class Oatfi:
 
         return id
 
+    @staticmethod
+    def get_preapproval_key(id):
+        return f"oatfi:preapproval:{id}"
+
+    @staticmethod
+    def get_credit_limit_key(id):
+        return f"oatfi:credit_limit:{id}"
+
+    def invalidate_business_credit(self, business):
+        """Forget the cached pre-approval and credit limit of the business after a change that affects them."""
+        id = self.__get_business_id(business)
+        cache.delete_many([self.get_preapproval_key(id), self.get_credit_limit_key(id)])
+
     def __get_preapproval(self, id):
+        key = self.get_preapproval_key(id)
+        preapproval = cache.get(key)
+        if preapproval is not None:
+            return preapproval
+
         url = f"{self.url_base}/business/{id}/preapproval/{self.factoring_product_uuid}"
 
-        response = self.client.get(url)
+        response = self._request("GET", url)
 
         if int(response.status_code) >= 400:
             raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
 
         preapproval_status = response.json()
+        cache.set(key, preapproval_status["preapproved"], BUSINESS_CREDIT_CACHE_TTL)
         return preapproval_status["preapproved"]
 
     def __get_underwriting(self, id):
+        key = self.get_credit_limit_key(id)
+        credit_limit = cache.get(key)
+        if credit_limit is not None:
+            return credit_limit
+
         url = f"{self.url_base}/business/{id}/underwrite/{self.factoring_product_uuid}"
 
-        response = self.client.get(url)
+        response = self._request("GET", url)
 
         if response.status_code >= 400:
             raise Exception(f"No business found for id: {id}")
 
-        return response.json()["creditLimit"]
+        credit_limit = response.json()["creditLimit"]
+        cache.set(key, credit_limit, BUSINESS_CREDIT_CACHE_TTL)
+        return credit_limit
+
+    def __get_loan_offer_invoices(self, carrier_id):
+        url = f"{self.url_base}/loan/offer"
+
+        # check for a loan offer for the carrier
+        payload = {
+            "productUUID": self.factoring_product_uuid,
+            "businessExternalId": carrier_id,
+        }
+
+        response = self._request("POST", url, json=payload)
+
+        if int(response.status_code) >= 401:
+            raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
+
+        return response.json()["invoices"]
 
     def __has_invoice(self, id):
         url = f"{self.url_base}/invoice/{id}/"
 
-        response = self.client.get(url)
+        response = self._request("GET", url)
 
         if response.status_code >= 400:
             return False
 
         return True
 
+    def get_existing_invoice_ids(self, invoices: list) -> set:
+        """Return the uids of the invoices already at Oatfi.
+
+        A few invoices of a carrier are looked up one at a time. For bulk backfills, the listing of the invoices of
+        the carrier is paged once instead, and the invoices of a carrier whose listing fails are looked up one at a
+        time.
+        """
+        invoices_by_carrier = {}
+        for invoice in invoices:
+            invoices_by_carrier.setdefault(str(invoice.carrier_user.carrier.uid), []).append(invoice)
+
+        existing_ids = set()
+        for carrier_id, carrier_invoices in invoices_by_carrier.items():
+            listed_ids = None
+            if len(carrier_invoices) >= INVOICE_LISTING_MIN_INVOICES:
+                listed_ids = self.get_listed_invoice_ids(carrier_id)
+            if listed_ids is not None:
+                existing_ids.update(str(invoice.uid) for invoice in carrier_invoices if str(invoice.uid) in listed_ids)
+            else:
+                existing_ids.update(str(invoice.uid) for invoice in carrier_invoices if self.__has_invoice(invoice.uid))
+        return existing_ids
+
+    def get_listed_invoice_ids(self, business):
+        """Return the external ids of all the invoices of the business, or None if a page could not be listed."""
+        listed_ids = set()
+        cursors = set()
+        cursor = None
+        while True:
+            response = self.get_invoices(business, cursor)
+            if response.status_code >= 400:
+                return None
+
+            content = response.json()
+            listed = content.get("invoices", []) if isinstance(content, dict) else content
+            listed_ids.update(str(item.get("externalId")) for item in listed)
+
+            cursor = content.get("nextCursor") if isinstance(content, dict) else None
+            if not cursor or cursor in cursors:
+                return listed_ids
+            cursors.add(cursor)
+
     def save_broker(self, broker: Broker):
         """Adds a broker as a business to Oatfi.  If broker exists, updates the record.
 
@@ -161,7 +331,10 @@ class Oatfi:
             True, if successful.  Throws an Exception otherwise.
         """
 
-        self.__save_business(
+        return self.save_business(self.get_broker_payload(broker))
+
+    def get_broker_payload(self, broker: Broker):
+        return self.get_business_payload(
             id=str(broker.uid),
             business_name=broker.name,
             mc_number=broker.mc_number,
@@ -174,15 +347,13 @@ class Oatfi:
             zip=broker.zip_code,
         )
 
-        return True
-
     def save_carrier(self, carrier_user: CarrierUser):
 
         carrier = carrier_user.carrier
         user = carrier_user.user
 
         # TODO: revisit this after reworking the carrier & user model
-        self.__save_business(
+        payload = self.get_business_payload(
             id=str(carrier.uid),
             business_name=carrier.organization_name,
             mc_number=carrier.mc_number,
@@ -196,12 +367,13 @@ class Oatfi:
             stripe_acct_id=user.stripe_customer_id,
         )
 
-        return True
+        return self.save_business(payload)
 
     def send_invoice_history(self, invoices: list):
 
         url = f"{self.url_base}/invoice"
         invoice_array = []
+        existing_ids = self.get_existing_invoice_ids(invoices)
 
         for invoice in invoices:
             temp = {
@@ -219,10 +391,10 @@ class Oatfi:
                 temp["paymentDate"] = invoice.paid_date_in_milliseconds()
 
             # if the invoice is already at Oatfi, then update it
-            if self.__has_invoice(invoice.uid) is False:
+            if str(invoice.uid) not in existing_ids:
                 invoice_array.append(temp)
             else:
-                response = self.client.put(url, json=temp)
+                response = self._request("PUT", url, json=temp)
                 if int(response.status_code) >= 400:
                     raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
 
@@ -230,7 +402,7 @@ class Oatfi:
 
             payload = {"invoices": invoice_array}
 
-            response = self.client.post(url, json=payload)
+            response = self._request("POST", url, json=payload)
 
             if int(response.status_code) >= 400:
                 raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
@@ -245,42 +417,29 @@ class Oatfi:
 
     def get_loan_offer(self, invoice: Invoice) -> Loan:
 
-        url = f"{self.url_base}/loan/offer"
-
         broker_id = str(invoice.broker.uid)
         carrier_id = str(invoice.carrier_user.carrier.uid)
 
-        # first get preapproval for broker and carrier
-        broker_preapproval = self.__get_preapproval(broker_id)
-        carrier_preapproval = self.__get_preapproval(carrier_id)
+        # the pre-approvals and the underwriting are independent reads, request them at once
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            broker_preapproval = executor.submit(self.__get_preapproval, broker_id)
+            carrier_preapproval = executor.submit(self.__get_preapproval, carrier_id)
+            credit_limit = executor.submit(self.__get_underwriting, carrier_id)
 
-        if not (broker_preapproval and carrier_preapproval):
-            # if the carrier and broker are not pre-approved, then do NOT return a loan offer
-            return None
+            if not (broker_preapproval.result() and carrier_preapproval.result()):
+                # if the carrier and broker are not pre-approved, then do NOT return a loan offer
+                return None
 
-        # check for underwriting
-        credit_limit = self.__get_underwriting(carrier_id)
+            if credit_limit.result() <= 0:
+                # if there is no credit, do not return a loan
+                return None
 
-        if credit_limit <= 0:
-            # if there is no credit, do not return a loan
-            return None
-
-        # check for a loan offer for the carrier
-        payload = {
-            "productUUID": self.factoring_product_uuid,
-            "businessExternalId": carrier_id,
-        }
-
-        response = self.client.post(url, json=payload)
-
-        if int(response.status_code) >= 401:
-            raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
-
-        invoices = response.json()["invoices"]
+        # the offer is only requested for the pre-approved businesses with credit
+        invoices = self.__get_loan_offer_invoices(carrier_id)
 
         loan_details = [item for item in invoices if item.get("externalId") == str(invoice.uid)]
 
-        if loan_details.count == 0:
+        if not loan_details:
             return None
 
         loan_details = loan_details[0]
@@ -310,12 +469,14 @@ class Oatfi:
             "invoiceExternalId": str(invoice.uid),
         }
 
-        response = self.client.post(url, json=payload)
+        response = self._request("POST", url, json=payload)
 
         if int(response.status_code) >= 400:
             raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
 
         loan.current_status = Loan.Status.OUTSTANDING
+        # the funded loan uses part of the credit of the carrier
+        self.invalidate_business_credit(invoice.carrier_user)
 
         details = response.json()
         loan.lender_loan_id = details["loanId"]
@@ -331,49 +492,33 @@ class Oatfi:
 
         return payment
 
-    def repay_loan(self, loan: Loan) -> Payment:
-        """Transfer loan principal and fees to Oatfi via Stripe and send a payload
-        with the information in order to get the loan closed out.
-        """
-        # start by initiating a transfer to oatfi
+    def record_loan_repayment(self, loan: Loan, transfer_id, amount_in_cents):
+        """Send Oatfi the transfer that repaid the loan in order to get the loan closed out."""
         url = f"{self.url_base}/payment"
-
-        transfer_amount = loan.fee_amount_in_cents + loan.principal_amount_in_cents
-        transfer_msg = f"Repayment of loan {loan.uid} for {loan.invoice.load_settlement.load.id}"
-        stripe_transfer = stripe_client.create_transfer(transfer_amount, settings.OATFI_STRIPE_ACCOUNT, transfer_msg)
-
-        transfer_id = stripe_transfer["id"]
-
         invoice = loan.invoice
 
         payload = {
             "productUUID": self.factoring_product_uuid,
             "businessExternalId": str(invoice.carrier_user.carrier.uid),
-            "invoiceExternalId": str(loan.invoice.uid),
+            "invoiceExternalId": str(invoice.uid),
             "transferId": transfer_id,
-            "amount": transfer_amount,
+            "amount": amount_in_cents,
         }
 
-        response = self.client.post(url, json=payload)
+        response = self._request("POST", url, json=payload)
         if int(response.status_code) >= 400:
             raise Exception(f"Received {response.status_code}.  Full Response: {response.text}")
 
-        # create the payment and reference the transfer
-        payment = Payment.objects.create(
-            payment_type=Payment.PaymentType.LOAN_REPAYMENT,
-            amount_in_cents=transfer_amount,
-            load_settlement=loan.invoice.load_settlement,
-            stripe_ref_id=transfer_id,
-        )
-
-        return payment
+        # the repaid loan frees the credit of the carrier
+        self.invalidate_business_credit(invoice.carrier_user)
 
-    def get_invoices(self, business) -> list:
+    def get_invoices(self, business, cursor=None) -> list:
         id = self.__get_business_id(business)
 
         url = f"{self.url_base}/business/{id}/invoices"
 
-        response = self.client.get(url)
+        params = {"cursor": cursor} if cursor else None
+        response = self._request("GET", url, params=params)
 
         # TODO: make this return invoice objects
         return response
@@ -384,7 +529,7 @@ class Oatfi:
 
         url = f"{self.url_base}/business/{id}"
 
-        response = self.client.get(url)
+        response = self._request("GET", url)
 
         if response.status_code >= 400:
             # business was not found, raise an exception
@@ -403,7 +548,7 @@ class Oatfi:
         if invoice.paid_date is not None:
             payload["paymentDate"] = invoice.paid_date_in_milliseconds()
 
-        response = self.client.put(url, json=payload)
+        response = self._request("PUT", url, json=payload)
 
         if int(response.status_code) >= 400:
             logger.error(f"OATFI Error: {response.text}")
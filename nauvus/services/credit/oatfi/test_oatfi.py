@@ -26,7 +26,7 @@ class TestOatfi(APITestCase):
         self.invoice.carrier_user = self.carrier_user
         self.invoice.save()
 
-    def test_repay_loan(self):
+    def test_accept_loan(self):
         self.oatfi.save_carrier(self.carrier_user)
 
         self.oatfi.send_invoice_history([self.invoice])
@@ -34,18 +34,13 @@ class TestOatfi(APITestCase):
         loan = self.oatfi.get_loan_offer(self.invoice)
 
         self.assertIsNotNone(loan)
-        self.oatfi.accept_loan(loan)
-
-        # TODO: transfer the money in from the stripe test bank to ensure there is always $
-        # in the account
-
-        response = self.oatfi.repay_loan(loan)
+        response = self.oatfi.accept_loan(loan)
 
         self.assertIs(type(response), Payment)
 
         self.assertEqual(
             Payment.objects.filter(
-                load_settlement=self.load_settlement, payment_type=Payment.PaymentType.LOAN_REPAYMENT
+                load_settlement=self.load_settlement, payment_type=Payment.PaymentType.LOAN_PAYOUT
             ).count(),
             1,
         )
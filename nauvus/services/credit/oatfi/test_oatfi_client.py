@@ -0,0 +1,152 @@
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+import pytest
+
+from nauvus.apps.broker.models import Broker
+from nauvus.apps.carrier.models import Carrier, CarrierUser
+from nauvus.apps.payments.models import Invoice
+from nauvus.services.credit.oatfi import api
+
+
+@pytest.fixture
+def requests(monkeypatch):
+    """Route the shared Oatfi client to the responses of the test."""
+    sent = []
+    responses = {}
+
+    def handler(request):
+        sent.append((request.method, request.url.path))
+        queued = responses.get((request.method, request.url.path))
+        if queued:
+            return queued.pop(0)
+        return httpx.Response(404)
+
+    monkeypatch.setattr(api, "_client", httpx.Client(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(api, "get_retry_delay", lambda response, attempt: 0)
+    monkeypatch.setattr(api.Oatfi, "url_base", "https://oatfi.test")
+    return sent, responses
+
+
+def create_invoice(carrier_uid):
+    return SimpleNamespace(uid=uuid4(), carrier_user=SimpleNamespace(carrier=SimpleNamespace(uid=carrier_uid)))
+
+
+def test_the_oatfi_instances_share_the_client():
+    assert api.Oatfi().client is api.Oatfi().client
+
+
+def test_rate_limited_requests_are_retried(requests):
+    sent, responses = requests
+    responses[("POST", "/invoice")] = [httpx.Response(429), httpx.Response(200, json={})]
+
+    response = api.Oatfi()._request("POST", "https://oatfi.test/invoice", json={})
+
+    assert response.status_code == 200
+    assert sent == [("POST", "/invoice"), ("POST", "/invoice")]
+
+
+def test_server_errors_are_not_retried_for_a_post(requests):
+    sent, responses = requests
+    responses[("POST", "/loan/funding")] = [httpx.Response(500), httpx.Response(200, json={})]
+
+    response = api.Oatfi()._request("POST", "https://oatfi.test/loan/funding", json={})
+
+    assert response.status_code == 500
+    assert len(sent) == 1
+
+
+def test_a_few_invoices_are_looked_up_one_at_a_time(requests):
+    sent, responses = requests
+    carrier_uid = uuid4()
+    invoices = [create_invoice(carrier_uid) for _ in range(2)]
+    responses[("GET", f"/invoice/{invoices[0].uid}/")] = [httpx.Response(200, json={})]
+
+    existing_ids = api.Oatfi().get_existing_invoice_ids(invoices)
+
+    assert existing_ids == {str(invoices[0].uid)}
+    assert sorted(sent) == sorted([("GET", f"/invoice/{invoice.uid}/") for invoice in invoices])
+
+
+def test_existing_invoices_are_listed_from_every_page_for_a_backfill(requests):
+    sent, responses = requests
+    carrier_uid = uuid4()
+    invoices = [create_invoice(carrier_uid) for _ in range(api.INVOICE_LISTING_MIN_INVOICES)]
+    responses[("GET", f"/business/{carrier_uid}/invoices")] = [
+        httpx.Response(200, json={"invoices": [{"externalId": str(invoices[0].uid)}], "nextCursor": "page-2"}),
+        httpx.Response(200, json={"invoices": [{"externalId": str(invoices[1].uid)}], "nextCursor": None}),
+    ]
+
+    existing_ids = api.Oatfi().get_existing_invoice_ids(invoices)
+
+    assert existing_ids == {str(invoices[0].uid), str(invoices[1].uid)}
+    assert sent == [("GET", f"/business/{carrier_uid}/invoices")] * 2
+
+
+def test_loan_offer_lookups_are_cached_per_business(requests, monkeypatch):
+    sent, responses = requests
+    monkeypatch.setattr(api.Oatfi, "factoring_product_uuid", "product")
+    broker_uid, carrier_uid = uuid4(), uuid4()
+    invoice = Invoice(broker=Broker(uid=broker_uid), carrier_user=CarrierUser(carrier=Carrier(uid=carrier_uid)))
+
+    def queue_responses():
+        responses[("GET", f"/business/{broker_uid}/preapproval/product")] = [
+            httpx.Response(200, json={"preapproved": True})
+        ]
+        responses[("GET", f"/business/{carrier_uid}/preapproval/product")] = [
+            httpx.Response(200, json={"preapproved": True})
+        ]
+        responses[("GET", f"/business/{carrier_uid}/underwrite/product")] = [
+            httpx.Response(200, json={"creditLimit": 100000})
+        ]
+        responses[("POST", "/loan/offer")] = [
+            httpx.Response(
+                200,
+                json={
+                    "invoices": [
+                        {"externalId": str(invoice.uid), "principalAmount": 900, "feeAmount": 100, "termsLink": "terms"}
+                    ]
+                },
+            )
+        ]
+
+    queue_responses()
+    oatfi = api.Oatfi()
+    loan = oatfi.get_loan_offer(invoice)
+
+    assert loan.principal_amount_in_cents == 900
+    assert len(sent) == 4
+
+    queue_responses()
+    oatfi.get_loan_offer(invoice)
+    # only the offer is requested again, the pre-approvals and the credit limit come from the cache
+    assert sent[4:] == [("POST", "/loan/offer")]
+
+    oatfi.invalidate_business_credit(str(carrier_uid))
+    queue_responses()
+    oatfi.get_loan_offer(invoice)
+    assert sorted(sent[5:]) == [
+        ("GET", f"/business/{carrier_uid}/preapproval/product"),
+        ("GET", f"/business/{carrier_uid}/underwrite/product"),
+        ("POST", "/loan/offer"),
+    ]
+
+
+def test_no_loan_offer_is_requested_without_the_preapprovals(requests, monkeypatch):
+    sent, responses = requests
+    monkeypatch.setattr(api.Oatfi, "factoring_product_uuid", "product")
+    broker_uid, carrier_uid = uuid4(), uuid4()
+    invoice = Invoice(broker=Broker(uid=broker_uid), carrier_user=CarrierUser(carrier=Carrier(uid=carrier_uid)))
+    responses[("GET", f"/business/{broker_uid}/preapproval/product")] = [
+        httpx.Response(200, json={"preapproved": False})
+    ]
+    responses[("GET", f"/business/{carrier_uid}/preapproval/product")] = [
+        httpx.Response(200, json={"preapproved": True})
+    ]
+    responses[("GET", f"/business/{carrier_uid}/underwrite/product")] = [
+        httpx.Response(200, json={"creditLimit": 100000})
+    ]
+
+    assert api.Oatfi().get_loan_offer(invoice) is None
+    assert ("POST", "/loan/offer") not in sent
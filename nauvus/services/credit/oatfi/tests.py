@@ -128,8 +128,3 @@ def test_get_and_accept_loan_offer(unpaid_invoice, load_settlement, invoices):
         assert False, f"Invoice: id: {unpaid_invoice.uid}, broker id: {unpaid_invoice.broker.uid}  Exception {e}"
 
     assert True
-
-
-def test_repay_loan():
-    # TODO: write test
-    assert True
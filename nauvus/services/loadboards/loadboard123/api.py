@@ -1,21 +1,93 @@
 import base64
 import logging
+import queue
+import random
+import threading
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
 
 import httpx
+from dateutil import parser
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from psqlextra.types import ConflictAction
+from psqlextra.util import postgres_manager
+
+from nauvus.apps.loads.cache import invalidate_load_searches
+from nauvus.apps.loads.models import Load, LoadboardSyncState, LoadSource
+from nauvus.apps.loads.services import delete_available_loads, delete_loads_by_external_id
+
+from .brokers import BrokerCache, get_broker_details
+from .handle_load import Loadboard123Load
+from .tokens import TokenManager
 
-from nauvus.apps.broker.models import Broker
-from nauvus.apps.loads.models import AccessToken, Load, LoadSource
-from nauvus.services.credit.oatfi.api import Oatfi
+logger = logging.getLogger("123Loadboard")
 
-from .handle_load import Loadboard123Load
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BACKOFF_IN_SECONDS = 1
+MAX_RETRY_BACKOFF_IN_SECONDS = 60
+
+# number of fetched pages waiting to be processed before the fetching threads block
+PAGE_QUEUE_SIZE = 4
+
+# number of loads written per upsert statement
+UPSERT_BATCH_SIZE = 1000
+# the columns of the imported loads written by the upsert, the other columns keep their values on updates
+UPSERT_FIELDS = [
+    "origin",
+    "destination",
+    "pickup_date",
+    "dropoff_date",
+    "current_status",
+    "broker_id",
+    "details",
+    "contact",
+    "posted_rate",
+    "estimated_mileage",
+    "reference_title",
+    "origin_latitude",
+    "origin_longitude",
+    "destination_latitude",
+    "destination_longitude",
+    "trip_distance_in_miles",
+    "geodata_updated_at",
+]
+
+# loads posted this long before the watermark of a state are fetched again to tolerate late postings
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+class LoadSearchError(Exception):
+    pass
+
+
+class StatePage(NamedTuple):
+    state: str
+    loads: list
+
+
+class StateDone(NamedTuple):
+    state: str
+    completed: bool
+    latest_posted_date: Optional[datetime]
+
+
+def get_posted_date(load):
+    try:
+        posted_date = parser.parse(load.get("postedDate"))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if timezone.is_naive(posted_date):
+        posted_date = timezone.make_aware(posted_date, timezone.utc)
+    return posted_date
 
-oatfi = Oatfi()
 
-logger = logging.getLogger("123Loadboard")
 US_STATES = [
     "AL",
     "AK",
@@ -79,14 +151,18 @@ class Loadboard123:
         self.base_url = settings.LOADBOARD_URL
 
         self.loadboard_name = "LOADBOARD_123"
-        self.token_max_time = 30
+        self.max_workers = settings.LOADBOARD_MAX_WORKERS
+        self.max_retries = settings.LOADBOARD_MAX_RETRIES
+        self.token_manager = TokenManager(self)
 
         headers = {
             "User-Agent": "Nauvus TMP Pro/1.47.2(nauvus@nauvus.com)",
             "123LB-Api-Version": "1.3",
         }
         timeout = httpx.Timeout(10.0, connect=20.0, read=None)
-        self.client = httpx.Client(timeout=timeout, verify=False)
+        # the connection pool is shared by the threads fetching the states concurrently
+        limits = httpx.Limits(max_connections=self.max_workers, max_keepalive_connections=self.max_workers)
+        self.client = httpx.Client(timeout=timeout, limits=limits, verify=False)
         self.client.headers.update(headers)
 
     def get_authorization_code(self):
@@ -124,29 +200,11 @@ class Loadboard123:
 
         return authorization_code
 
-    def get_access_token(self):
-
-        """Generate The Access Token or send the token from database if it did not expire"""
-
-        # Check if the token is valid and update the header with it
-        try:
-            token = AccessToken.objects.get(loadboard_name=self.loadboard_name)
-            if token.expires > round(time.time()) + self.token_max_time:
-                self.client.headers.update({"Authorization": f"Bearer {token.access_token}"})
-                return True
-        except ObjectDoesNotExist as e:
-            logger.exception(e)
-            pass
+    def request_token(self, payload):
+        """Exchange a grant for a token on the token endpoint, returning None when the grant is refused."""
 
         url = self.base_url + "/token"
 
-        # Get the authotization Code
-        authorization_code = self.get_authorization_code()
-
-        if authorization_code is None:
-            logger.info("Authorization Code is none.")
-            return False
-
         client_credentials = self.loadboard_client_id + ":" + self.loadboard_client_secret
         encode_client_credentials = base64.b64encode(client_credentials.encode())
         decode_client_credentials = encode_client_credentials.decode()
@@ -157,6 +215,45 @@ class Loadboard123:
             "User-Agent": "Nauvus TMP Pro/1.47.2(nauvus@nauvus.com)",
         }
 
+        try:
+            auth_response = self.client.post(url, headers=headers, data=payload)
+        except httpx.HTTPError as e:
+            logger.exception(e)
+            return None
+
+        if auth_response.status_code != 200:
+            logger.info(f"Token request failed: {auth_response.status_code=}, {auth_response.content=}")
+            return None
+
+        auth_response = auth_response.json()
+
+        return {
+            "access_token": auth_response.get("access_token"),
+            "refresh_token": auth_response.get("refresh_token") or payload.get("refresh_token"),
+            "expires": round(time.time()) + int(auth_response.get("expires_in")),
+        }
+
+    def refresh_access_token(self, refresh_token):
+        """Renew the token with the refresh token"""
+
+        payload = {
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": self.loadboard_client_id,
+        }
+
+        return self.request_token(payload)
+
+    def login(self):
+        """Renew the token with a new authorization code"""
+
+        # Get the authotization Code
+        authorization_code = self.get_authorization_code()
+
+        if not authorization_code:
+            logger.info("Authorization Code is none.")
+            return None
+
         payload = {
             "grant_type": "authorization_code",
             "code": authorization_code,
@@ -164,25 +261,17 @@ class Loadboard123:
             "redirect_uri": self.base_url + "/tokenreceiver",
         }
 
-        # auth_response = requests.post(url=url, headers=header, data=body)
-        auth_response = self.client.post(url, headers=headers, data=payload)
-        auth_response = auth_response.json()
-
-        access_token = auth_response.get("access_token")
-        refresh_token = auth_response.get("refresh_token")
-        expires = round(time.time()) + int(auth_response.get("expires_in"))
+        return self.request_token(payload)
 
-        data = {
-            "access_token": access_token,
-            "refresh_token": refresh_token,
-            "expires": expires,
-        }
+    def get_access_token(self):
 
-        # Update the header
-        self.client.headers.update({"Authorization": f"Bearer {access_token}"})
+        """Update the header with the shared access token, renewing the token when it is about to expire"""
 
-        AccessToken.objects.update_or_create(loadboard_name=self.loadboard_name, defaults=data)
+        access_token = self.token_manager.get_access_token()
+        if not access_token:
+            return False
 
+        self.client.headers.update({"Authorization": f"Bearer {access_token}"})
         return True
 
     class Decorators:
@@ -217,49 +306,189 @@ class Loadboard123:
 
         return body
 
-    @Decorators.refresh_token
-    def get_loads(self, max_age=None, us_states=[]):
-        """Search the 123loadboard api for loads and import them.
+    @staticmethod
+    def get_retry_delay(response, attempt):
+        """Return the seconds to wait before retrying, honoring the Retry-After header of rate limited responses."""
+        if response is not None:
+            try:
+                return min(float(response.headers.get("Retry-After")), MAX_RETRY_BACKOFF_IN_SECONDS)
+            except (TypeError, ValueError):
+                pass
+        backoff = min(RETRY_BACKOFF_IN_SECONDS * 2**attempt, MAX_RETRY_BACKOFF_IN_SECONDS)
+        return backoff + random.uniform(0, backoff / 2)
 
-        Params:
-            max_age: the maximum age in days of the load
-            us_states: an array of US state abbreviations to import e.g. ["GA", "AL"]
-                If not included, it defaults to all states.
+    def search_loads(self, body):
+        """Post a load search, retrying rate limited, failed and timed out requests with a backoff.
 
-        Returns:
-            _type_: _description_
+        The access token is read for every request, so the token renewed by another thread or worker is picked up
+        during long imports. A refused token is renewed once and the request is sent again.
         """
+        search_url = self.base_url + "/loads/search"
 
-        loads = []
+        attempt = 0
+        refused_token = None
+        while True:
+            access_token = self.token_manager.get_access_token(refused_token)
+            if not access_token:
+                logger.error("Load search failed, could not get an access token.")
+                return None
 
-        states = us_states
+            response = None
+            try:
+                headers = {"Authorization": f"Bearer {access_token}"}
+                response = self.client.post(url=search_url, json=body, headers=headers)
+                if response.status_code == 401:
+                    if refused_token is not None:
+                        logger.error("Load search was refused with the renewed access token.")
+                        return None
+                    logger.info("Load search was refused, renewing the access token.")
+                    refused_token = access_token
+                    continue
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response.json()
+                logger.info(f"Load search returned {response.status_code}, retrying.")
+            except httpx.TransportError as e:
+                logger.info(f"Load search failed with {repr(e)}, retrying.")
+
+            if attempt >= self.max_retries:
+                break
+            time.sleep(self.get_retry_delay(response, attempt))
+            attempt += 1
+
+        logger.error(f"Load search failed after {self.max_retries} retries.")
+        return None
+
+    def iter_state_pages(self, state, max_age=None, posted_after=None):
+        """Yield the loads of each page of the search for the loads with the origin in the state.
+
+        The search is sorted by the posted date, so when ``posted_after`` is informed the paging stops at the
+        first page reaching loads posted before it.
+        """
+        next_token = None
+
+        while True:
+            body = self.get_body(state, next_token, max_age)
+            loads_data = self.search_loads(body)
+            if loads_data is None:
+                raise LoadSearchError(f"Could not search the loads of {state}.")
+
+            try:
+                page = loads_data.get("loads")
+                is_last_result = loads_data.get("metadata").get("isLastResult")
+                next_token = loads_data.get("metadata").get("nextToken")
+            except (AttributeError, TypeError) as e:
+                raise LoadSearchError(f"Unexpected search response for {state}.") from e
+
+            reached_watermark = False
+            if page and posted_after is not None:
+                posted_dates = [get_posted_date(load) for load in page]
+                reached_watermark = any(date is not None and date < posted_after for date in posted_dates)
+                page = [load for load, date in zip(page, posted_dates) if date is None or date >= posted_after]
+
+            if page:
+                yield page
+
+            if is_last_result or not next_token or reached_watermark:
+                break
+
+    def get_state_loads(self, state, max_age=None):
+        """Return the loads with the origin in the state, following the pages of the search."""
+        return [load for page in self.iter_state_pages(state, max_age) for load in page]
+
+    @staticmethod
+    def get_valid_states(us_states):
         if len(us_states) == 0:
             # if no states are passed, then do all states
-            states = US_STATES
+            return US_STATES
 
-        for state in states:
+        valid_states = []
+        for state in us_states:
             if state not in US_STATES:
-                # if not a US state, then skip this iteration
+                # if not a US state, then skip this state
                 logger.error(f"Could not import loads for {state}.  It is not a valid state in the USA.")
                 continue
-            is_last_result = False
-            next_token = None
-            while not is_last_result:
-                search_url = self.base_url + "/loads/search"
-                body = self.get_body(state, next_token, max_age)
-                response = self.client.post(url=search_url, json=body)
-                loads_data = response.json()
+            valid_states.append(state)
+        return valid_states
+
+    def iter_load_pages(self, max_age=None, us_states=[], watermarks=None, on_state_done=None):
+        """Yield the pages of loads of the states as they are fetched, as StatePage tuples.
+
+        The states are fetched concurrently by up to LOADBOARD_MAX_WORKERS threads and the pages of each state
+        are followed sequentially since every page depends on the token of the previous one. The fetched pages
+        wait in a bounded queue, so the fetching threads block until the consumer catches up and at most
+        PAGE_QUEUE_SIZE pages are held in memory.
 
+        Params:
+            watermarks: the last posted date imported by state, only the loads posted after it are fetched
+            on_state_done: called with the state and its latest posted date once all its pages were consumed
+        """
+        watermarks = watermarks or {}
+        states = self.get_valid_states(us_states)
+        if not states:
+            return
+
+        pages = queue.Queue(maxsize=PAGE_QUEUE_SIZE)
+        stopped = threading.Event()
+
+        def put(item):
+            while not stopped.is_set():
                 try:
-                    for load in loads_data.get("loads"):
-                        loads.append(load)
-                        is_last_result = loads_data.get("metadata").get("isLastResult")
-                        next_token = loads_data.get("metadata").get("nextToken")
-                except TypeError as e:
-                    logger.exception(e)
-                    break
+                    pages.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def fetch_state(state):
+            latest_posted_date = watermarks.get(state)
+            posted_after = latest_posted_date - WATERMARK_OVERLAP if latest_posted_date else None
+            completed = False
+            try:
+                for page in self.iter_state_pages(state, max_age, posted_after):
+                    if not put(StatePage(state, page)):
+                        return
+                    logger.info(f"Fetched {len(page)} loads for {state}.")
+                    posted_dates = [date for date in map(get_posted_date, page) if date is not None]
+                    if posted_dates:
+                        latest_posted_date = max([latest_posted_date or posted_dates[0]] + posted_dates)
+                completed = True
+            except Exception as e:
+                logger.error(f"Could not import loads for {state}.  Full message: {repr(e)}")
+            finally:
+                put(StateDone(state, completed, latest_posted_date))
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(states)))
+        try:
+            for state in states:
+                executor.submit(fetch_state, state)
+
+            pending_states = len(states)
+            while pending_states:
+                page = pages.get()
+                if isinstance(page, StateDone):
+                    pending_states -= 1
+                    # the pages of the state were all yielded and processed before its marker is read
+                    if page.completed and on_state_done:
+                        on_state_done(page.state, page.latest_posted_date)
+                    continue
+                yield page
+        finally:
+            # unblock the fetching threads when the consumer stops early
+            stopped.set()
+            executor.shutdown(wait=False)
+
+    def get_loads(self, max_age=None, us_states=[]):
+        """Search the 123loadboard api for loads.
+
+        Params:
+            max_age: the maximum age in days of the load
+            us_states: an array of US state abbreviations to import e.g. ["GA", "AL"]
+                If not included, it defaults to all states.
 
-        return loads
+        Returns:
+            list: the raw loads of all states
+        """
+        return [load for page in self.iter_load_pages(max_age, us_states) for load in page.loads]
 
     @Decorators.refresh_token
     def get_load_details(self, load_id):
@@ -276,122 +505,201 @@ class Loadboard123:
         logger.info(f"{response.status_code=}, {response.content=}")
         raise ObjectDoesNotExist(f"Could not find load {load_id} on Loadboard123.")
 
-    @staticmethod
-    def create_broker(load):
-        """
-        Create or update the Broker and returns the Broker object.
+    def is_full_sync_due(self, states):
+        """Return True when a state was never fully imported or its last full import is older than the interval."""
+        full_sync_after = timezone.now() - timedelta(hours=settings.LOADBOARD_FULL_SYNC_INTERVAL_HOURS)
+        last_full_syncs = dict(
+            LoadboardSyncState.objects.filter(loadboard_name=self.loadboard_name, state__in=states).values_list(
+                "state", "last_full_sync"
+            )
+        )
+        return any(not last_full_syncs.get(state) or last_full_syncs[state] < full_sync_after for state in states)
 
-        load_id: Load uid from 123Loadboard
+    def get_watermarks(self, states):
+        return dict(
+            LoadboardSyncState.objects.filter(
+                loadboard_name=self.loadboard_name, state__in=states, last_posted_date__isnull=False
+            ).values_list("state", "last_posted_date")
+        )
 
-        mc_number: MC Number of the Broker from 123Loadboard
+    def save_watermark(self, state, latest_posted_date, full_sync=False):
+        defaults = {"last_posted_date": latest_posted_date}
+        if full_sync:
+            defaults["last_full_sync"] = timezone.now()
+        LoadboardSyncState.objects.update_or_create(loadboard_name=self.loadboard_name, state=state, defaults=defaults)
+
+    def process_loads(self, max_age=None, states=[], full_sync=None):
+
+        """Process the pages of loads as they are fetched.
+
+        Only the loads posted after the watermark of each state are imported, unless it is a full sync. When
+        ``full_sync`` is None, a full sync runs every LOADBOARD_FULL_SYNC_INTERVAL_HOURS.
         """
+        logger.info(f"Importing loads from {states}")
+        valid_states = self.get_valid_states(states)
+        if full_sync is None:
+            full_sync = self.is_full_sync_due(valid_states)
 
-        broker_details = load.get("poster")
+        watermarks = {} if full_sync else self.get_watermarks(valid_states)
+        logger.info(f"Running a {'full' if full_sync else 'delta'} import.")
 
-        external_broker_id = broker_details.get("id")
-        name = broker_details.get("name")
+        started_at = timezone.now()
+        completed_states = []
+        failed_states = set()
 
-        try:
-            mc_number = str(broker_details.get("docketNumber").get("number"))
-        except AttributeError:
-            mc_number = None
-
-        broker = {
-            "external_broker_id": external_broker_id,
-            "name": name,
-            "mc_number": mc_number,
-            "metadata": "",
-        }
+        def on_state_done(state, latest_posted_date):
+            if state in failed_states:
+                # the loads that were not stored would be reconciled away and skipped by the next delta import
+                logger.error(f"Some loads of {state} were not stored, the state is imported again on the next run.")
+                return
+            self.save_watermark(state, latest_posted_date, full_sync)
+            completed_states.append(state)
 
-        obj = None
-        if mc_number:
-            obj, broker_created = Broker.objects.get_or_create(mc_number=mc_number, defaults=broker)
-            if broker_created:
-                oatfi.save_broker(obj)
-        else:
-            # if no MC number for the broker, skip the load
-            load_id = load.get("id")
-            logger.info(f"Load {load_id} was not imported. MC Number for broker was not present")
-            raise ValidationError("No MC number for broker")
-            # obj, broker_created = Broker.objects.get_or_create(external_broker_id=external_broker_id, defaults=broker)
+        broker_cache = BrokerCache()
 
-        return obj
+        for page in self.iter_load_pages(max_age, valid_states, watermarks, on_state_done):
+            if not self.process_page(page.loads, broker_cache):
+                failed_states.add(page.state)
 
-    def process_loads(self, max_age=None, states=[]):
+        # only a complete listing of a state tells which of its loads vanished from the board
+        if full_sync and not max_age and completed_states:
+            self.reconcile_loads(completed_states, started_at)
 
-        """Process the Response Data"""
-        logger.info(f"Importing loads from {states}")
-        loads = self.get_loads(max_age, states)
+        return True
 
+    def process_page(self, loads, broker_cache=None):
+
+        """Process the Response Data, returning False when some of the online loads could not be stored"""
+        if broker_cache is None:
+            broker_cache = BrokerCache()
+
+        stored = True
+        online_loads = [load for load in loads if load.get("status") == "Online"]
+        try:
+            broker_cache.add_brokers(online_loads)
+        except Exception as e:
+            stored = False
+            logger.error(f"Exception encountered when creating the brokers of the page.  Full message: {repr(e)}")
+
+        normalized_loads = {}
+        offline_load_ids = []
         for load in loads:
 
             try:
                 load_id = load.get("id")
 
                 if load.get("status") != "Online":
-                    # If the Load status is not Online, try to delete the load
-                    self.delete_load(load_id)
+                    # If the Load status is not Online, delete the load with the others of the page
+                    offline_load_ids.append(load_id)
                     continue
 
-                broker = self.create_broker(load)
+                mc_number = get_broker_details(load).get("mc_number")
+                if not mc_number:
+                    # if no MC number for the broker, skip the load
+                    logger.info(f"Load {load_id} was not imported. MC Number for broker was not present")
+                    continue
+
+                broker = broker_cache.get(mc_number)
 
                 # If the broker does not come from 123Loadboard, it goes on to the next load.
                 if broker is None:
                     logger.info(f"Load {load_id} was not imported. Broker empty.")
                     continue
 
-                self.save_update_load(load, broker)
+                normalized_load = Loadboard123Load.normalize_load(load, broker)
+                if not normalized_load:
+                    logger.info(f"Could not create load for load id {load_id}")
+                    continue
+
+                normalized_load.id = load_id
+                normalized_loads[str(load_id)] = normalized_load
             except Exception as e:
+                stored = False
                 logger.error(
                     f"Exception encountered when importing load {load_id} from 123Loadboard.  Full message: {repr(e)}"
                 )
 
-        return True
+        loads_to_upsert = list(normalized_loads.values())
+        for index in range(0, len(loads_to_upsert), UPSERT_BATCH_SIZE):
+            batch = loads_to_upsert[index : index + UPSERT_BATCH_SIZE]
+            try:
+                self.upsert_loads(batch)
+            except Exception as e:
+                stored = False
+                logger.error(f"Exception encountered when upserting {len(batch)} loads.  Full message: {repr(e)}")
+        if loads_to_upsert:
+            # the bulk upsert sends no signals, invalidate the cached searches once for the page
+            invalidate_load_searches()
 
-    def save_update_load(self, raw_load, broker):
-        """Save or Update the Load"""
-        load_id = raw_load.get("id")
         try:
-            load = Load.objects.get(pk=load_id)
-            if load.current_status != Load.Status.AVAILABLE:
-                logger.info(f"Load {load_id} is no longer available; doing nothing.")
-                return load
-            # update the existing load if it is still available
-            load = Loadboard123Load.normalize_load(raw_load, broker, load)
-            logger.info(f"Load {load_id} is still available and will be updated.")
-            load.save()
-            return load
-        except Load.DoesNotExist:
-            pass
-
-        load = Loadboard123Load.normalize_load(raw_load, broker)
-
-        if not load:
-            logger.info(f"Could not create load for load id {load_id}")
-            return None
-        # this should only execute for new loads that have not been seen before
-        load_source_obj, load_source_created = LoadSource.objects.get_or_create(
-            load_id=load_id,
-            defaults={"source": self.loadboard_name, "load_id": load_id},
-        )
+            self.delete_loads(offline_load_ids)
+        except Exception as e:
+            logger.error(f"Exception encountered when deleting the offline loads.  Full message: {repr(e)}")
 
-        load.source = load_source_obj
-        load.id = load_id
-        load.save()
-        logger.info(f"Load {load_id} was created.")
-        return load
+        return stored
 
-    def delete_load(self, load_id):
+    def upsert_loads(self, loads):
+        """Insert the new loads and update the existing ones that are still available in a single statement.
 
+        The loads that are no longer available are left untouched by the update condition of the upsert.
         """
-        Delete the Load with status different of "Online" on 123Loadboard. Locally, the load with current_status
-        different of "available" will NOT be deleted.
+        load_ids = [str(load.id) for load in loads]
+
+        with transaction.atomic():
+            # keep the source of the loads that were already imported
+            existing_loads = Load.objects.filter(pk__in=load_ids).values_list("id", "source_id")
+            source_ids = {str(load_id): source_id for load_id, source_id in existing_loads}
+            sources = {}
+            for load_source in LoadSource.objects.filter(load_id__in=load_ids).exclude(id__in=source_ids.values()):
+                sources.setdefault(load_source.load_id, load_source.id)
+
+            new_sources = [
+                LoadSource(source=self.loadboard_name, load_id=load_id)
+                for load_id in load_ids
+                if source_ids.get(load_id) is None and load_id not in sources
+            ]
+            # mark the sources of the existing loads as seen by this import
+            LoadSource.objects.filter(
+                Q(id__in=[source_id for source_id in source_ids.values() if source_id]) | Q(id__in=sources.values())
+            ).update(updated_at=timezone.now())
+            LoadSource.objects.bulk_create(new_sources)
+            sources.update({load_source.load_id: load_source.id for load_source in new_sources})
+
+            rows = []
+            for load in loads:
+                load_id = str(load.id)
+                row = {field: getattr(load, field) for field in UPSERT_FIELDS}
+                row["id"] = load_id
+                row["source_id"] = source_ids.get(load_id) or sources.get(load_id)
+                rows.append(row)
+
+            with postgres_manager(Load) as manager:
+                manager.on_conflict(
+                    ["id"], ConflictAction.UPDATE, update_condition=Q(current_status=Load.Status.AVAILABLE)
+                ).bulk_insert(rows)
+
+        logger.info(f"{len(rows)} loads were upserted.")
+        return rows
+
+    def delete_loads(self, load_ids):
+        """Delete the available loads of the external ids that are no longer Online on 123Loadboard."""
+        if not load_ids:
+            return 0
+        deleted = delete_loads_by_external_id(load_ids)
+        logger.info(f"{deleted} loads that are no longer online were removed.")
+        return deleted
+
+    def reconcile_loads(self, states, seen_before):
+        """Delete the available loads of the states that were not seen by the full import started at ``seen_before``.
+
+        Every load returned by the import marks its source as seen, so the loads whose source was not updated
+        since the import started are no longer on the board.
         """
-
-        try:
-            Load.objects.filter(source__load_id=load_id).filter(current_status="available").delete()
-            LoadSource.objects.filter(load_id=load_id).delete()
-            logger.info(f"Load {load_id} was removed.")
-        except ObjectDoesNotExist:
-            logger.info(f"Load {load_id} was not remove. It does not exist.")
-            pass
+        vanished_loads = Load.objects.filter(
+            source__source=self.loadboard_name,
+            source__updated_at__lt=seen_before,
+            origin__state__in=states,
+        )
+        deleted = delete_available_loads(vanished_loads)
+        logger.info(f"{deleted} loads that are no longer on 123Loadboard were removed.")
+        return deleted
@@ -0,0 +1,77 @@
+import logging
+
+from django.db import connection, transaction
+
+from nauvus.apps.broker.models import Broker
+from nauvus.apps.broker.tasks import register_brokers_with_oatfi
+
+logger = logging.getLogger("123Loadboard")
+
+# key of the postgres advisory lock taken by the imports while they create brokers
+BROKER_CREATION_LOCK = 1230001
+
+
+def get_broker_details(load):
+    """Return the fields of the broker that posted the load."""
+    broker_details = load.get("poster") or {}
+
+    try:
+        mc_number = str(broker_details.get("docketNumber").get("number"))
+    except AttributeError:
+        mc_number = None
+
+    return {
+        "external_broker_id": broker_details.get("id"),
+        "name": broker_details.get("name"),
+        "mc_number": mc_number,
+        "metadata": "",
+    }
+
+
+class BrokerCache:
+    """Brokers of a load import keyed by MC number.
+
+    The known brokers are loaded in one query when the import starts and the brokers posting the loads of a page
+    for the first time are created together, with their Oatfi registration deferred to a background task.
+    """
+
+    def __init__(self):
+        self.brokers = {}
+        for broker in Broker.objects.exclude(mc_number__isnull=True).order_by("id").iterator():
+            self.brokers.setdefault(broker.mc_number, broker)
+
+    def get(self, mc_number):
+        return self.brokers.get(mc_number)
+
+    def add_brokers(self, loads):
+        """Create the brokers of the loads that are not known yet."""
+        new_brokers = {}
+        for load in loads:
+            details = get_broker_details(load)
+            mc_number = details.get("mc_number")
+            if mc_number and mc_number not in self.brokers and mc_number not in new_brokers:
+                new_brokers[mc_number] = Broker(**details)
+
+        if not new_brokers:
+            return []
+
+        with transaction.atomic():
+            # the MC number is not unique in the table, so imports running at the same time take turns to create
+            # the brokers rather than relying on a conflict of the insert
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [BROKER_CREATION_LOCK])
+
+            # another import may have created some of the brokers since the cache was loaded
+            for broker in Broker.objects.filter(mc_number__in=new_brokers.keys()).order_by("id"):
+                self.brokers.setdefault(broker.mc_number, broker)
+                new_brokers.pop(broker.mc_number, None)
+
+            created_brokers = Broker.objects.bulk_create(new_brokers.values())
+        self.brokers.update({broker.mc_number: broker for broker in created_brokers})
+
+        broker_ids = [broker.id for broker in created_brokers]
+        if broker_ids:
+            transaction.on_commit(lambda: register_brokers_with_oatfi.delay(broker_ids))
+            logger.info(f"{len(broker_ids)} brokers were created.")
+
+        return created_brokers
@@ -111,5 +111,6 @@ class Loadboard123Load:
         return_load.posted_rate = posted_rate
         return_load.estimated_mileage = mileage
         return_load.reference_title = ref_title
+        return_load.update_geodata()
 
         return return_load
@@ -0,0 +1,36 @@
+import pytest
+
+from nauvus.apps.broker.models import Broker
+from nauvus.services.loadboards.loadboard123 import brokers
+from nauvus.services.loadboards.loadboard123.brokers import BrokerCache
+
+
+def raw_load(mc_number):
+    return {"poster": {"id": f"poster-{mc_number}", "name": "Broker", "docketNumber": {"number": mc_number}}}
+
+
+@pytest.mark.django_db
+def test_broker_cache_creates_each_new_broker_once(monkeypatch, broker):
+    registered = []
+    monkeypatch.setattr(brokers.register_brokers_with_oatfi, "delay", registered.append)
+    monkeypatch.setattr(brokers.transaction, "on_commit", lambda callback: callback())
+
+    broker_cache = BrokerCache()
+    created_brokers = broker_cache.add_brokers([raw_load(broker.mc_number), raw_load(111), raw_load(111), {}])
+
+    assert [created_broker.mc_number for created_broker in created_brokers] == ["111"]
+    assert broker_cache.get(broker.mc_number) == broker
+    assert Broker.objects.filter(mc_number="111").count() == 1
+    assert registered == [[created_brokers[0].id]]
+    assert broker_cache.add_brokers([raw_load(111)]) == []
+
+
+@pytest.mark.django_db
+def test_broker_cache_reuses_the_brokers_created_by_another_import(monkeypatch):
+    monkeypatch.setattr(brokers.register_brokers_with_oatfi, "delay", lambda broker_ids: None)
+    broker_cache = BrokerCache()
+    other_import_broker = Broker.objects.create(name="Broker", mc_number="222")
+
+    assert broker_cache.add_brokers([raw_load(222), raw_load(333)])[0].mc_number == "333"
+    assert broker_cache.get("222") == other_import_broker
+    assert Broker.objects.filter(mc_number="222").count() == 1
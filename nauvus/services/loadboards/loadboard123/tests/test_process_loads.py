@@ -1,5 +1,9 @@
+from datetime import timedelta
+
 import pytest
+from django.utils import timezone
 
+from nauvus.apps.loads.models import Load, LoadboardSyncState, LoadSource
 from nauvus.services.loadboards.loadboard123.api import Loadboard123
 
 
@@ -7,3 +11,31 @@ from nauvus.services.loadboards.loadboard123.api import Loadboard123
 def test_process_loads():
     result = Loadboard123().process_loads(states=["RI"])
     assert result is not None
+
+
+@pytest.mark.django_db
+def test_full_sync_keeps_the_loads_of_a_state_with_a_failed_batch(monkeypatch, load):
+    loadboard = Loadboard123()
+    load.source = LoadSource.objects.create(source=loadboard.loadboard_name, load_id=load.id)
+    load.save()
+    LoadSource.objects.filter(pk=load.source_id).update(updated_at=timezone.now() - timedelta(days=1))
+
+    def search_loads(body):
+        raw_load = {"id": str(load.id), "status": "Online", "poster": {"docketNumber": {"number": "123456"}}}
+        return {"loads": [raw_load], "metadata": {"isLastResult": True}}
+
+    def upsert_loads(loads):
+        raise Exception("upsert failed")
+
+    monkeypatch.setattr(loadboard, "search_loads", search_loads)
+    monkeypatch.setattr(loadboard, "upsert_loads", upsert_loads)
+    monkeypatch.setattr("nauvus.services.loadboards.loadboard123.api.BrokerCache.add_brokers", lambda *args: None)
+    monkeypatch.setattr("nauvus.services.loadboards.loadboard123.api.BrokerCache.get", lambda *args: load.broker)
+    monkeypatch.setattr(
+        "nauvus.services.loadboards.loadboard123.api.Loadboard123Load.normalize_load", lambda *args: Load()
+    )
+
+    loadboard.process_loads(states=["GA"], full_sync=True)
+
+    assert Load.objects.filter(pk=load.pk).exists()
+    assert not LoadboardSyncState.objects.filter(loadboard_name=loadboard.loadboard_name, state="GA").exists()
@@ -0,0 +1,89 @@
+from datetime import datetime, timezone
+
+import httpx
+
+from nauvus.services.loadboards.loadboard123 import api
+from nauvus.services.loadboards.loadboard123.api import Loadboard123
+
+
+def test_search_loads_retries_rate_limited_requests(monkeypatch):
+    responses = [
+        httpx.Response(429, headers={"Retry-After": "2"}),
+        httpx.Response(503),
+        httpx.Response(200, json={"loads": [{"id": "1"}], "metadata": {"isLastResult": True}}),
+    ]
+    delays = []
+    monkeypatch.setattr(api.time, "sleep", delays.append)
+
+    loadboard = Loadboard123()
+    monkeypatch.setattr(loadboard.token_manager, "get_access_token", lambda refused_token=None: "token")
+    loadboard.client = httpx.Client(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+
+    assert loadboard.get_state_loads("GA") == [{"id": "1"}]
+    assert delays[0] == 2
+    assert len(delays) == 2
+
+
+def test_search_loads_renews_a_refused_token_once(monkeypatch):
+    tokens = {None: "expired", "expired": "renewed"}
+    refused_tokens = []
+    authorizations = []
+
+    def get_access_token(refused_token=None):
+        refused_tokens.append(refused_token)
+        return tokens[refused_token]
+
+    def handler(request):
+        authorizations.append(request.headers["Authorization"])
+        if request.headers["Authorization"] == "Bearer expired":
+            return httpx.Response(401)
+        return httpx.Response(200, json={"loads": [{"id": "1"}], "metadata": {"isLastResult": True}})
+
+    loadboard = Loadboard123()
+    monkeypatch.setattr(loadboard.token_manager, "get_access_token", get_access_token)
+    loadboard.client = httpx.Client(transport=httpx.MockTransport(handler))
+
+    assert loadboard.get_state_loads("GA") == [{"id": "1"}]
+    assert refused_tokens == [None, "expired"]
+    assert authorizations == ["Bearer expired", "Bearer renewed"]
+
+    tokens["expired"] = "expired"
+    assert loadboard.search_loads(loadboard.get_body("GA", None, None)) is None
+
+
+def test_iter_load_pages_yields_the_pages_of_each_state(monkeypatch):
+    def search_loads(body):
+        state = body["origin"]["states"][0]
+        if body["metadata"]["nextToken"] is None:
+            return {"loads": [{"id": f"{state}-1"}], "metadata": {"isLastResult": False, "nextToken": "next"}}
+        return {"loads": [{"id": f"{state}-2"}], "metadata": {"isLastResult": True}}
+
+    loadboard = Loadboard123()
+    monkeypatch.setattr(loadboard, "search_loads", search_loads)
+
+    pages = list(loadboard.iter_load_pages(us_states=["GA", "AL", "XX"]))
+
+    assert len(pages) == 4
+    assert sorted(load["id"] for page in pages for load in page.loads) == ["AL-1", "AL-2", "GA-1", "GA-2"]
+    assert all(load["id"].startswith(page.state) for page in pages for load in page.loads)
+
+
+def test_iter_state_pages_stops_at_the_watermark(monkeypatch):
+    page = [
+        {"id": "new", "postedDate": "2022-11-10T12:00:00Z"},
+        {"id": "old", "postedDate": "2022-11-09T12:00:00Z"},
+    ]
+    requests = []
+
+    def search_loads(body):
+        requests.append(body)
+        return {"loads": page, "metadata": {"isLastResult": False, "nextToken": "next"}}
+
+    loadboard = Loadboard123()
+    monkeypatch.setattr(loadboard, "search_loads", search_loads)
+
+    posted_after = datetime(2022, 11, 10, tzinfo=timezone.utc)
+    pages = list(loadboard.iter_state_pages("GA", posted_after=posted_after))
+
+    assert pages == [[page[0]]]
+    assert len(requests) == 1
@@ -0,0 +1,66 @@
+import time
+
+import pytest
+from django.core.cache import cache
+
+from nauvus.apps.loads.models import AccessToken
+from nauvus.services.loadboards.loadboard123 import tokens
+from nauvus.services.loadboards.loadboard123.api import Loadboard123
+
+
+@pytest.fixture(autouse=True)
+def clear_tokens():
+    cache.clear()
+    tokens._tokens.clear()
+
+
+@pytest.mark.django_db
+def test_valid_token_is_reused_without_renewing(monkeypatch):
+    loadboard = Loadboard123()
+    AccessToken.objects.create(
+        loadboard_name=loadboard.loadboard_name,
+        access_token="valid",
+        refresh_token="refresh",
+        expires=round(time.time()) + 3600,
+    )
+    monkeypatch.setattr(loadboard, "login", lambda: pytest.fail("the token should not be renewed"))
+
+    assert loadboard.token_manager.get_access_token() == "valid"
+    AccessToken.objects.all().delete()
+    # the following calls are served by the process memory
+    assert loadboard.token_manager.get_access_token() == "valid"
+
+
+@pytest.mark.django_db
+def test_expiring_token_is_renewed_with_the_refresh_token(monkeypatch):
+    loadboard = Loadboard123()
+    AccessToken.objects.create(
+        loadboard_name=loadboard.loadboard_name,
+        access_token="expiring",
+        refresh_token="refresh",
+        expires=round(time.time()) + 60,
+    )
+    renewed_token = {"access_token": "renewed", "refresh_token": "refresh", "expires": round(time.time()) + 3600}
+    monkeypatch.setattr(loadboard, "refresh_access_token", lambda refresh_token: renewed_token)
+    monkeypatch.setattr(loadboard, "login", lambda: pytest.fail("the refresh token should be used"))
+
+    assert loadboard.token_manager.get_access_token() == "renewed"
+    assert AccessToken.objects.get(loadboard_name=loadboard.loadboard_name).access_token == "renewed"
+    assert cache.get(loadboard.token_manager.cache_key)["access_token"] == "renewed"
+
+
+@pytest.mark.django_db
+def test_refused_token_is_renewed_before_it_expires(monkeypatch):
+    loadboard = Loadboard123()
+    AccessToken.objects.create(
+        loadboard_name=loadboard.loadboard_name,
+        access_token="revoked",
+        refresh_token="refresh",
+        expires=round(time.time()) + 3600,
+    )
+    renewed_token = {"access_token": "renewed", "refresh_token": "refresh", "expires": round(time.time()) + 3600}
+    monkeypatch.setattr(loadboard, "refresh_access_token", lambda refresh_token: renewed_token)
+
+    assert loadboard.token_manager.get_access_token() == "revoked"
+    assert loadboard.token_manager.get_access_token(refused_token="revoked") == "renewed"
+    assert loadboard.token_manager.get_access_token() == "renewed"
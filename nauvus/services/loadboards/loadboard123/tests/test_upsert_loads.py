@@ -0,0 +1,31 @@
+import uuid
+
+import pytest
+
+from nauvus.apps.loads.models import Load, LoadSource
+from nauvus.apps.loads.tests.fixtures import create_load
+from nauvus.services.loadboards.loadboard123.api import Loadboard123
+
+
+@pytest.mark.django_db
+def test_upsert_loads_creates_updates_and_skips_unavailable_loads(faker, broker, load):
+    booked_load = create_load(faker)
+    booked_load.broker = broker
+    booked_load.current_status = Load.Status.BOOKED
+    booked_load.reference_title = "booked"
+    booked_load.save()
+
+    new_load = create_load(faker)
+    new_load.broker = broker
+    new_load.id = str(uuid.uuid4())
+    new_load.update_geodata()
+
+    load.reference_title = "updated"
+    booked_load.reference_title = "updated"
+
+    Loadboard123().upsert_loads([new_load, load, booked_load])
+
+    assert Load.objects.get(pk=new_load.id).source.load_id == new_load.id
+    assert LoadSource.objects.filter(load_id=new_load.id).count() == 1
+    assert Load.objects.get(pk=load.pk).reference_title == "updated"
+    assert Load.objects.get(pk=booked_load.pk).reference_title == "booked"
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+
+from django.core.cache import cache
+
+from nauvus.apps.loads.models import AccessToken
+
+logger = logging.getLogger("123Loadboard")
+
+# tokens expiring within this many seconds are renewed before they are used
+REFRESH_MARGIN_IN_SECONDS = 300
+# tokens expiring within this many seconds are no longer used while another worker renews them
+MIN_VALIDITY_IN_SECONDS = 30
+RENEW_LOCK_TIMEOUT_IN_SECONDS = 60
+RENEW_WAIT_IN_SECONDS = 15
+
+_tokens = {}
+_tokens_lock = threading.Lock()
+
+
+class TokenManager:
+    """Access token of a loadboard shared by the threads of a process and by the workers.
+
+    The token is read from the process memory, then the cache and finally the ``AccessToken`` table. It is
+    renewed ahead of its expiration, with the refresh token when possible, by the single worker holding the
+    renew lock while the others keep using the current token or wait for the renewed one. A token refused by
+    the api is renewed even if it has not expired.
+    """
+
+    def __init__(self, loadboard):
+        self.loadboard = loadboard
+        self.loadboard_name = loadboard.loadboard_name
+        self.cache_key = f"loadboard_token:{self.loadboard_name}"
+        self.lock_key = f"loadboard_token:{self.loadboard_name}:lock"
+
+    @staticmethod
+    def is_valid(token, margin, refused_token=None):
+        return bool(
+            token
+            and token.get("access_token")
+            and token["access_token"] != refused_token
+            and token.get("expires", 0) > round(time.time()) + margin
+        )
+
+    def get_stored_token(self, refused_token=None):
+        token = _tokens.get(self.loadboard_name)
+        if self.is_valid(token, REFRESH_MARGIN_IN_SECONDS, refused_token):
+            return token
+
+        token = cache.get(self.cache_key)
+        if not self.is_valid(token, REFRESH_MARGIN_IN_SECONDS, refused_token):
+            token = (
+                AccessToken.objects.filter(loadboard_name=self.loadboard_name)
+                .values("access_token", "refresh_token", "expires")
+                .first()
+            )
+            if token and self.is_valid(token, REFRESH_MARGIN_IN_SECONDS, refused_token):
+                cache.set(self.cache_key, token, token["expires"] - round(time.time()))
+
+        if token:
+            with _tokens_lock:
+                _tokens[self.loadboard_name] = token
+        return token
+
+    def save_token(self, token):
+        AccessToken.objects.update_or_create(loadboard_name=self.loadboard_name, defaults=token)
+        cache.set(self.cache_key, token, max(token["expires"] - round(time.time()), 1))
+        with _tokens_lock:
+            _tokens[self.loadboard_name] = token
+
+    def invalidate(self):
+        with _tokens_lock:
+            _tokens.pop(self.loadboard_name, None)
+        cache.delete(self.cache_key)
+
+    def get_access_token(self, refused_token=None):
+        """Return the access token, renewing it when it is about to expire, or None if it cannot be renewed.
+
+        Params:
+            refused_token: an access token the api answered with 401, it is renewed and never returned again
+        """
+        token = self.get_stored_token(refused_token)
+        if self.is_valid(token, REFRESH_MARGIN_IN_SECONDS, refused_token):
+            return token["access_token"]
+
+        if cache.add(self.lock_key, True, RENEW_LOCK_TIMEOUT_IN_SECONDS):
+            try:
+                return self.renew_token(token, refused_token)
+            finally:
+                cache.delete(self.lock_key)
+
+        # another worker is renewing the token, keep using the current one while it is still valid
+        if self.is_valid(token, MIN_VALIDITY_IN_SECONDS, refused_token):
+            return token["access_token"]
+
+        deadline = time.monotonic() + RENEW_WAIT_IN_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(0.5)
+            token = cache.get(self.cache_key)
+            if self.is_valid(token, MIN_VALIDITY_IN_SECONDS, refused_token):
+                with _tokens_lock:
+                    _tokens[self.loadboard_name] = token
+                return token["access_token"]
+
+        logger.info("Timed out waiting for the access token to be renewed.")
+        return None
+
+    def renew_token(self, token, refused_token=None):
+        # the token may have been renewed between the read and the lock
+        renewed_token = cache.get(self.cache_key)
+        if self.is_valid(renewed_token, REFRESH_MARGIN_IN_SECONDS, refused_token):
+            with _tokens_lock:
+                _tokens[self.loadboard_name] = renewed_token
+            return renewed_token["access_token"]
+
+        new_token = None
+        if token and token.get("refresh_token"):
+            new_token = self.loadboard.refresh_access_token(token["refresh_token"])
+
+        if new_token is None:
+            # the refresh token expired or was revoked, log in again
+            new_token = self.loadboard.login()
+
+        if new_token is None:
+            return None
+
+        self.save_token(new_token)
+        return new_token["access_token"]
@@ -136,10 +136,14 @@ class StripeClient(object):
 
     # Transfers
     @staticmethod
-    def create_transfer(amount_in_cents, destination_account, description=""):
-        """Create stripe transfer"""
+    def create_transfer(amount_in_cents, destination_account, description="", idempotency_key=None):
+        """Create stripe transfer, a transfer created again with the same idempotency key is not repeated"""
         return stripe.Transfer.create(
-            amount=amount_in_cents, currency="usd", destination=destination_account, description=description
+            amount=amount_in_cents,
+            currency="usd",
+            destination=destination_account,
+            description=description,
+            idempotency_key=idempotency_key,
         )
 
     @staticmethod
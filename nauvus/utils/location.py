@@ -1,36 +1,160 @@
 import logging
+import math
+from functools import lru_cache
 
-from geopy.geocoders import Nominatim
+from django.core.cache import cache
 from uszipcode import SearchEngine
 
 logger = logging.getLogger(__file__)
 
+EARTH_RADIUS_IN_MILES = 3958.8
+MILES_PER_DEGREE_OF_LATITUDE = 69.0
+
+CITY_COORDINATES_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+_search_engine = None
+
+
+def get_search_engine():
+    """Return a search engine shared by the cached zip code lookups."""
+    global _search_engine
+    if _search_engine is None:
+        _search_engine = SearchEngine(db_file_path="/tmp/simple_db.sqlite")
+    return _search_engine
+
+
+@lru_cache(maxsize=None)
+def get_zipcode_coordinates(zipcode: str):
+    """Return the (latitude, longitude) of the zip code centroid or None if the zip code is unknown."""
+    result = get_search_engine().by_zipcode(zipcode)
+    if not result or getattr(result, "lat", None) is None or getattr(result, "lng", None) is None:
+        return None
+    return (float(result.lat), float(result.lng))
+
+
+def get_location_coordinates(location: dict):
+    """Return the (latitude, longitude) used to index a load location for radius searches.
+
+    The zip code centroid is preferred so that radius searches keep matching on zip codes, and the raw
+    coordinates of the location are used when the zip code is unknown.
+    """
+    if not location:
+        return (None, None)
+
+    zipcode = location.get("zipcode")
+    if zipcode:
+        coordinates = get_zipcode_coordinates(str(zipcode))
+        if coordinates:
+            return coordinates
+
+    try:
+        return (float(location.get("latitude")), float(location.get("longitude")))
+    except (TypeError, ValueError):
+        return (None, None)
+
+
+def get_trip_distance(origin: dict, destination: dict):
+    """Return the great circle distance in miles between the coordinates of two locations or None if unknown."""
+    try:
+        origin_latitude, origin_longitude = float(origin.get("latitude")), float(origin.get("longitude"))
+        destination_latitude = float(destination.get("latitude"))
+        destination_longitude = float(destination.get("longitude"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+    origin_latitude, origin_longitude = math.radians(origin_latitude), math.radians(origin_longitude)
+    destination_latitude = math.radians(destination_latitude)
+    destination_longitude = math.radians(destination_longitude)
+
+    haversine = (
+        math.sin((destination_latitude - origin_latitude) / 2) ** 2
+        + math.cos(origin_latitude)
+        * math.cos(destination_latitude)
+        * math.sin((destination_longitude - origin_longitude) / 2) ** 2
+    )
+    return round(2 * EARTH_RADIUS_IN_MILES * math.asin(min(1.0, math.sqrt(haversine))))
+
+
+def get_bounding_box(latitude: float, longitude: float, radius: float):
+    """Return the (min_latitude, max_latitude, min_longitude, max_longitude) enclosing the radius in miles."""
+    latitude_delta = radius / MILES_PER_DEGREE_OF_LATITUDE
+    # avoid a division by zero close to the poles
+    longitude_delta = radius / (MILES_PER_DEGREE_OF_LATITUDE * max(math.cos(math.radians(latitude)), 0.01))
+
+    return (
+        latitude - latitude_delta,
+        latitude + latitude_delta,
+        longitude - longitude_delta,
+        longitude + longitude_delta,
+    )
+
+
+def normalize_city_key(city: str, state: str):
+    """Return the (city, state_code) pair used to store and look up city coordinates."""
+    return (" ".join(str(city or "").split()).lower(), str(state or "").strip().upper())
+
+
+def _lookup_city_coordinates(city: str, state: str):
+    """Resolve the coordinates from the shared cache, the city coordinate table or the uszipcode database."""
+    from nauvus.apps.cities.models import CityCoordinate
+
+    cache_key = f"city_coordinates:{state}:{city}".replace(" ", "_")
+    coordinates = cache.get(cache_key)
+    if coordinates:
+        return tuple(coordinates)
+
+    coordinates = (
+        CityCoordinate.objects.filter(city=city, state_code=state).values_list("latitude", "longitude").first()
+    )
+
+    if not coordinates:
+        try:
+            zipcodes = get_search_engine().by_city_and_state(city=city, state=state, returns=0)
+        except ValueError:
+            zipcodes = []
+        points = [(float(z.lat), float(z.lng)) for z in zipcodes if z.lat is not None and z.lng is not None]
+        if points:
+            coordinates = (
+                sum(point[0] for point in points) / len(points),
+                sum(point[1] for point in points) / len(points),
+            )
+
+    if not coordinates:
+        return None
+
+    cache.set(cache_key, coordinates, CITY_COORDINATES_CACHE_TIMEOUT)
+    return tuple(coordinates)
+
+
+@lru_cache(maxsize=4096)
+def _get_cached_city_coordinates(city: str, state: str):
+    coordinates = _lookup_city_coordinates(city, state)
+    if coordinates is None:
+        # raising keeps unknown cities out of the LRU so they resolve once the table is rebuilt
+        raise LookupError(f"{city}, {state}")
+    return coordinates
+
 
 class Location:
     def __init__(self):
-        self.search = SearchEngine(db_file_path="/tmp/simple_db.sqlite")
+        self.search = get_search_engine()
 
     @staticmethod
     def get_city_coordinates(city: str, state: str):
 
         '''
-        Return the coordinates for the city and state.
+        Return the coordinates for the city and state or None if the city is unknown.
         '''
 
-        geolocator = Nominatim(user_agent="Nauvum")
-
-        query = {
-            'city': city,
-            'state': state
-        }
+        city, state = normalize_city_key(city, state)
+        if not city or not state:
+            return None
 
-        location = geolocator.geocode(query=query, exactly_one=True)
-
-        location_data = location.raw
-        city_latitude = float(location_data.get('lat', ''))
-        city_longitude = float(location_data.get('lon', ''))
-
-        return (city_latitude, city_longitude)
+        try:
+            return _get_cached_city_coordinates(city, state)
+        except LookupError:
+            logger.info(f'Coordinates did not found for {city=} and {state=}')
+        return None
 
     def get_zipcode_by_coordinates(self, latitude=None, longitude=None):
 
@@ -68,7 +192,10 @@ class Location:
         '''
 
         if not latitude or not longitude:
-            latitude, longitude = self.get_city_coordinates(city, state)
+            coordinates = self.get_city_coordinates(city, state)
+            if not coordinates:
+                return []
+            latitude, longitude = coordinates
 
         cities = self.search.by_coordinates(lat=latitude, lng=longitude, radius=radius, returns=returns)
 